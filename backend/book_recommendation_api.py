@@ -1,50 +1,111 @@
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
 import requests
-from bs4 import BeautifulSoup
 import json
 import time
 import re
 import asyncio
-from typing import List, Dict, Optional
-from openai import OpenAI
+from typing import Any, AsyncIterator, Callable, List, Dict, Optional
 import os
-from dotenv import load_dotenv
+from book_utils import normalize_title
+from cache_backend import get_shared_cache
+from edition_dedup import normalize_author
+from keyword_batcher import get_keyword_batcher
+from keyword_expander import get_keyword_expander
+from llm_client import load_env, parse_numbered_line, stream_chat_lines
+from llm_scheduler import get_llm_scheduler
+from page_parser import (
+    get_parse_pool,
+    parse_aladin_detail,
+    parse_aladin_search,
+    stream_aladin_search,
+    streaming_enabled
+)
+from schemas import (
+    BookRecommendationRequest,
+    BookInfo,
+    BookRecommendationResponse
+)
 
-# 환경변수 로드
-load_dotenv()
+# 환경변수 로드 (프로세스당 한 번)
+load_env()
 
-app = FastAPI(title="Book Recommendation API", version="1.0.0")
+ITEM_ID_PATTERN = re.compile(r'ItemId=(\d+)')
+# 검색 결과 한 페이지의 항목 수
+SEARCH_PAGE_SIZE = 25
 
-# OpenAI 클라이언트 초기화
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY", "your-api-key-here"))
 
-class BookRecommendationRequest(BaseModel):
-    lecture_title: str
-    major_field: str
-    interest_technology: str
-    learning_difficulty: str
+class DetailFetchTracker:
+    """
+    한 추천 요청의 모든 키워드 작업이 공유하는 상세 페이지 요청 기록.
+    같은 도서가 여러 키워드에서 검색되어도 상세 페이지는 한 번만 받고, 진행 중인 요청은 다른 키워드 작업이 함께 기다립니다.
+    도서는 ItemId로 구분하며 (정규화 제목은 권차·부제를 지우므로 "1권"/"2권"이 같아짐),
+    상품 주소에 ItemId가 없는 경우에만 정규화 제목+저자를 사용합니다.
+    """
+
+    def __init__(self):
+        self._details: Dict[str, asyncio.Future] = {}
+        self.fetched = 0
+        self.saved = 0
+
+    @staticmethod
+    def book_keys(book_info: Dict) -> List[str]:
+        match = ITEM_ID_PATTERN.search(book_info.get('product_url') or '')
+        if match:
+            return [f"item:{match.group(1)}"]
+        title_key = normalize_title(book_info.get('title'))
+        if title_key:
+            return [f"title:{title_key}:{normalize_author(book_info.get('author'))}"]
+        return []
+
+    async def get_or_fetch(self, book_info: Dict, fetch) -> Dict:
+        keys = self.book_keys(book_info)
+        shared = next((self._details[key] for key in keys if key in self._details), None)
+        if shared is not None:
+            try:
+                # 기다리는 키워드 작업이 취소되어도 공유 중인 요청에는 영향 없음
+                detail_info = dict(await asyncio.shield(shared))
+                self.saved += 1
+                return detail_info
+            except asyncio.CancelledError:
+                # 요청하던 키워드 작업만 취소(마감, 연결 끊김)되었으면 이 작업이 직접 요청
+                if not shared.cancelled() or asyncio.current_task().cancelling():
+                    raise
+            except Exception:
+                pass
+            return await self.get_or_fetch(book_info, fetch)
+
+        future = asyncio.get_running_loop().create_future()
+        # 대기자가 없을 때 "exception was never retrieved" 경고 방지
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        for key in keys:
+            self._details[key] = future
+        self.fetched += 1
+        try:
+            detail_info = await fetch()
+        except asyncio.CancelledError:
+            self._forget(keys, future)
+            future.cancel()
+            raise
+        except Exception as e:
+            self._forget(keys, future)
+            future.set_exception(e)
+            raise
+        future.set_result(detail_info)
+        return detail_info
 
-class BookInfo(BaseModel):
-    title: str
-    author: Optional[str] = None
-    publisher: Optional[str] = None
-    price: Optional[str] = None
-    image_url: Optional[str] = None
-    product_url: Optional[str] = None
-    description: Optional[str] = None
-    table_of_contents: Optional[str] = None
-    publication_date: Optional[str] = None
+    def _forget(self, keys: List[str], future: asyncio.Future):
+        """실패/취소된 요청은 기록에서 빼서 다음 키워드 작업이 다시 요청하게 함"""
+        for key in keys:
+            if self._details.get(key) is future:
+                del self._details[key]
 
-class BookRecommendationResponse(BaseModel):
-    recommended_books: List[BookInfo]
-    search_keywords: List[str]
-    total_books_analyzed: int
-    recommendation_reason: str
+    def report(self) -> str:
+        total = self.fetched + self.saved
+        return f"상세 페이지 {total}건 중 {self.fetched}건 요청, 중복 {self.saved}건 생략"
 
 class AdvancedBookCrawler:
     def __init__(self):
-        self.session = requests.Session()
+        self._session = None
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
@@ -53,12 +114,77 @@ class AdvancedBookCrawler:
             'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1',
         }
-        self.session.headers.update(self.headers)
+        # 알라딘 서버 동시 요청 수 제한 (호스트 단위)
+        self.host_limit = asyncio.Semaphore(int(os.getenv("ALADIN_MAX_CONCURRENCY", "4")))
+        # 워커 간 공유 캐시 (CACHE_BACKEND_URL)
+        self.cache = get_shared_cache()
+        self.search_cache_ttl = int(os.getenv("ALADIN_SEARCH_CACHE_TTL", str(6 * 3600)))
+        self.detail_cache_ttl = int(os.getenv("ALADIN_DETAIL_CACHE_TTL", str(7 * 24 * 3600)))
+    
+    @property
+    def session(self) -> requests.Session:
+        """requests 세션은 첫 요청 시 생성"""
+        if self._session is None:
+            self._session = requests.Session()
+            self._session.headers.update(self.headers)
+        return self._session
+    
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+    
+    @staticmethod
+    def new_detail_tracker() -> DetailFetchTracker:
+        """추천 요청 하나 동안 키워드 작업들이 공유할 상세 페이지 요청 기록"""
+        return DetailFetchTracker()
+    
+    async def _get(self, url: str, consume: Optional[Callable[[requests.Response], Any]] = None, **kwargs):
+        """
+        호스트 동시 요청 제한 하에서 블로킹 요청을 스레드로 실행.
+        consume을 넘기면 본문을 스트리밍으로 받으며 같은 스레드에서 consume(response)의 결과를 반환 (끝나면 연결을 닫음)
+        """
+        await self.host_limit.acquire()
+        request = asyncio.ensure_future(asyncio.to_thread(self._request, url, consume, **kwargs))
+        # 기다리던 작업이 취소되어도 스레드의 요청은 끝까지 진행되므로 끝날 때 호스트 슬롯 반환
+        request.add_done_callback(lambda task: self.host_limit.release() or task.cancelled() or task.exception())
+        return await asyncio.shield(request)
+    
+    def _request(self, url: str, consume: Optional[Callable[[requests.Response], Any]], **kwargs):
+        if consume is None:
+            return self.session.get(url, **kwargs)
+        with self.session.get(url, stream=True, **kwargs) as response:
+            return consume(response)
     
     async def generate_search_keywords(self, lecture_title: str) -> List[str]:
         """
         OpenAI API를 사용해서 강의 제목으로부터 검색 키워드 10개를 생성합니다.
         """
+        return [keyword async for keyword in self.stream_search_keywords(lecture_title)]
+    
+    async def stream_search_keywords(self, lecture_title: str) -> AsyncIterator[str]:
+        """
+        검색 키워드를 LLM 스트리밍 응답에서 한 줄씩 파싱하는 즉시 전달.
+        알려진 강의는 시소러스에서 바로 응답하고, LLM 실패 시 제목 기반 확장 키워드로 채움
+        """
+        expander = get_keyword_expander()
+        known = expander.expand(lecture_title)
+        if known:
+            print(f"시소러스 키워드 사용 (LLM 생략): {known}")
+            for keyword in known:
+                yield keyword
+            return
+        
+        # 동시에 들어온 다른 강의들과 묶어 LLM 한 번으로 생성 (혼자이거나 배치 실패 시 아래 단일 스트리밍 호출)
+        batched = await get_keyword_batcher().submit(lecture_title)
+        if batched:
+            print(f"배치 키워드 사용: {batched}")
+            await asyncio.to_thread(expander.learn, lecture_title, batched)
+            for keyword in batched:
+                yield keyword
+            return
+        
+        emitted = []
         try:
             prompt = f"""
             강의 제목: "{lecture_title}"
@@ -75,7 +201,8 @@ class AdvancedBookCrawler:
             키워드만 나열해주세요.
             """
             
-            response = client.chat.completions.create(
+            lines = stream_chat_lines(
+                stage="keywords",
                 model="gpt-3.5-turbo",
                 messages=[
                     {"role": "system", "content": "당신은 교육 전문가이자 도서 추천 전문가입니다."},
@@ -84,106 +211,95 @@ class AdvancedBookCrawler:
                 max_tokens=500,
                 temperature=0.7
             )
-            
-            content = response.choices[0].message.content
-            keywords = []
-            
-            # 응답에서 키워드 추출
-            lines = content.strip().split('\n')
-            for line in lines:
-                if re.match(r'^\d+\.', line.strip()):
-                    keyword = re.sub(r'^\d+\.\s*', '', line.strip())
-                    if keyword:
-                        keywords.append(keyword)
-            
-            return keywords[:10]
+            try:
+                async for line in lines:
+                    keyword = parse_numbered_line(line)
+                    if keyword and keyword not in emitted:
+                        emitted.append(keyword)
+                        yield keyword
+                        if len(emitted) >= 10:
+                            break
+            finally:
+                # 10개를 받으면 (또는 소비자가 멈추면) 스트림을 닫아 남은 생성을 중단
+                await lines.aclose()
             
         except Exception as e:
             print(f"키워드 생성 실패: {e}")
-            # 실패 시 기본 키워드 반환
-            return [lecture_title, "입문서", "기초", "이론", "실습", "가이드", "교재", "참고서", "개론", "핸드북"]
+        else:
+            if emitted:
+                # 다음 요청부터 같은 강의는 LLM 없이 응답하도록 학습
+                await asyncio.to_thread(expander.learn, lecture_title, emitted)
+        
+        if emitted:
+            return
+        # 실패 시 일반어 대신 강의 제목과 제목 속 용어의 관련어 사용
+        for keyword in expander.fallback(lecture_title):
+            yield keyword
     
     async def crawl_book_detail(self, product_url: str) -> Dict[str, str]:
         """
-        개별 책의 상세 페이지에서 목차와 상세 정보를 크롤링합니다.
+        개별 책의 상세 페이지에서 목차와 상세 정보를 크롤링합니다 (ItemId 기준 캐시).
+        요청이 중간에 취소되어도 이미 받은 상세 정보는 캐시에 남아 재시도 시 다시 받지 않습니다.
         """
+        match = ITEM_ID_PATTERN.search(product_url)
+        fetched = False
+        
+        async def fetch():
+            nonlocal fetched
+            fetched = True
+            return await self._crawl_book_detail(product_url)
+        
+        detail_info = await self.cache.get_or_compute(
+            f"aladin:detail:{match.group(1) if match else product_url}",
+            fetch,
+            ttl=self.detail_cache_ttl
+        )
+        if fetched:
+            await asyncio.sleep(0.5)  # 요청 간격 조절 (결과를 캐시에 저장한 뒤, 실제로 요청했을 때만)
+        return detail_info
+    
+    async def _crawl_book_detail(self, product_url: str) -> Dict[str, str]:
         try:
-            response = self.session.get(product_url)
+            response = await self._get(product_url)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.text, 'html.parser')
-            detail_info = {}
-            
-            # 책 설명 추출
-            desc_elem = soup.find('div', class_='Ere_prod_mconts_R')
-            if desc_elem:
-                detail_info['description'] = desc_elem.get_text(strip=True)[:500]
-            
-            # 목차 추출 - 여러 선택자 시도
-            toc_selectors = [
-                'div.Ere_prod_mconts_LS',  # 알라딘 목차 영역
-                'div#div_PublisherDesc',   # 출판사 서평
-                'div.Ere_prod_mconts_R',   # 상세 설명
-                'div.book_info_inner'      # 도서 정보
-            ]
+            # 파싱/추출은 작업자 풀에서 (원본 바이트 → 간결한 dict)
+            detail_info = await get_parse_pool().run(parse_aladin_detail, response.content, response.encoding)
             
-            toc_text = ""
-            for selector in toc_selectors:
-                toc_elem = soup.select_one(selector)
-                if toc_elem:
-                    text = toc_elem.get_text(strip=True)
-                    if '목차' in text or '차례' in text or len(text) > 100:
-                        toc_text = text[:1000]  # 목차는 1000자로 제한
-                        break
-            
-            detail_info['table_of_contents'] = toc_text
-            
-            # 출간일 추출
-            date_elem = soup.find('li', class_='Ere_sub2_title')
-            if date_elem:
-                date_text = date_elem.get_text()
-                date_match = re.search(r'(\d{4}-\d{2}-\d{2})', date_text)
-                if date_match:
-                    detail_info['publication_date'] = date_match.group(1)
-            
-            await asyncio.sleep(0.5)  # 요청 간격 조절
             return detail_info
             
         except Exception as e:
             print(f"상세 정보 크롤링 실패 {product_url}: {e}")
             return {}
     
-    async def crawl_books_by_keyword(self, keyword: str, major_field: str, limit: int = 20) -> List[Dict]:
+    async def crawl_books_by_keyword(self, keyword: str, major_field: str, limit: int = 20,
+                                     details: Optional[DetailFetchTracker] = None) -> List[Dict]:
+        """
+        특정 키워드로 알라딘에서 책을 크롤링합니다.
+        워커 간 공유 캐시를 사용하며, 같은 키워드는 한 워커만 크롤링합니다.
+        details를 넘기면 같은 요청의 다른 키워드에서 이미 받은 상세 페이지는 다시 받지 않습니다.
+        """
+        return await self.cache.get_or_compute(
+            f"aladin:search:{limit}:{major_field}:{keyword}",
+            lambda: self._crawl_books_by_keyword(keyword, major_field, limit, details),
+            ttl=self.search_cache_ttl
+        )
+    
+    async def _crawl_books_by_keyword(self, keyword: str, major_field: str, limit: int = 20,
+                                      details: Optional[DetailFetchTracker] = None) -> List[Dict]:
         """
         특정 키워드로 알라딘에서 책을 크롤링합니다.
         """
         try:
             print(f"'{keyword}' 키워드로 검색 중...")
-            
-            # 알라딘 검색 URL
-            search_url = "https://www.aladin.co.kr/search/wsearchresult.aspx"
-            params = {
-                'SearchTarget': 'Book',
-                'SearchWord': keyword,
-                'x': '0',
-                'y': '0'
-            }
-            
-            response = self.session.get(search_url, params=params)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
+            candidates = await self._search_list(keyword, major_field, limit)
             books = []
             
-            # 도서 목록 추출
-            book_items = soup.find_all('div', class_='ss_book_box')
-            
-            for i, item in enumerate(book_items[:limit]):
+            for book_info in candidates:
                 try:
-                    book_info = await self.extract_book_info_with_details(item, major_field)
-                    if book_info and book_info.get('title'):
-                        books.append(book_info)
-                        print(f"크롤링 완료: {len(books)}/{limit} - {book_info['title']}")
+                    book_info = await self.attach_details(book_info, details)
+                    books.append(book_info)
+                    print(f"크롤링 완료: {len(books)}/{limit} - {book_info['title']}")
                     
                     if len(books) >= limit:
                         break
@@ -200,106 +316,77 @@ class AdvancedBookCrawler:
             print(f"'{keyword}' 크롤링 실패: {e}")
             return []
     
-    async def extract_book_info_with_details(self, item, major_field: str) -> Dict:
+    async def search_books_by_keyword(self, keyword: str, major_field: str, limit: int = 20,
+                                      raise_errors: bool = False) -> List[Dict]:
         """
-        기본 책 정보를 추출하고 상세 페이지 정보도 가져옵니다.
+        검색 결과 목록의 기본 정보만 (상세 페이지 없이, 워커 간 공유 캐시).
+        여러 키워드의 결과에서 판본 중복을 먼저 제거한 뒤 남은 후보만 enrich_books로 보강할 때 사용합니다.
+        raise_errors가 False이면 실패를 빈 결과로 바꾸고, True이면 그대로 올려 "결과 없음"과 구별하게 합니다.
         """
-        book_info = {}
+        async def search():
+            print(f"'{keyword}' 키워드로 검색 중... (목록만)")
+            return await self._search_list(keyword, major_field, limit)
         
         try:
-            # 제목 추출
-            title_elem = item.find('a', class_='bo3')
-            if title_elem:
-                title_text = title_elem.get_text(strip=True)
-                title_text = re.sub(r'\[.*?\]', '', title_text).strip()
-                book_info['title'] = title_text
-            
-            # 전체 텍스트에서 정보 추출
-            full_text = item.get_text()
-            
-            # 전공분야와 관련성 체크 (간단한 키워드 매칭)
-            if major_field and not self.is_relevant_to_major(full_text, major_field):
-                return None
-            
-            # 저자 추출
-            author_patterns = [
-                r'([가-힣a-zA-Z\s,]+)\s*\(지은이\)',
-                r'([가-힣a-zA-Z\s,]+)\s*저',
-                r'저자\s*:\s*([^|]+)',
-            ]
-            
-            for pattern in author_patterns:
-                match = re.search(pattern, full_text)
-                if match:
-                    author = match.group(1).strip()
-                    author = re.sub(r'\(.*?\)', '', author).strip()
-                    if author and len(author) < 50:
-                        book_info['author'] = author
-                        break
-            
-            # 출판사 추출
-            publisher_patterns = [
-                r'([가-힣a-zA-Z0-9\s]+)\s*\|\s*\d{4}',
-                r'\|\s*([가-힣a-zA-Z0-9\s]+)\s*\|\s*\d{4}',
-            ]
-            
-            for pattern in publisher_patterns:
-                match = re.search(pattern, full_text)
-                if match:
-                    publisher = match.group(1).strip()
-                    if publisher and len(publisher) < 30:
-                        book_info['publisher'] = publisher
-                        break
-            
-            # 가격 추출
-            price_elem = item.find('span', class_='ss_p2')
-            if price_elem:
-                book_info['price'] = price_elem.get_text(strip=True)
-            
-            # 이미지 URL
-            img_elem = item.find('img')
-            if img_elem and img_elem.get('src'):
-                img_url = img_elem.get('src')
-                if img_url.startswith('//'):
-                    img_url = 'https:' + img_url
-                book_info['image_url'] = img_url
-            
-            # 상품 링크
-            link_elem = item.find('a', href=lambda x: x and 'ItemId=' in x)
-            if link_elem and link_elem.get('href'):
-                href = link_elem.get('href')
-                if href.startswith('/'):
-                    product_url = 'https://www.aladin.co.kr' + href
-                else:
-                    product_url = href
-                book_info['product_url'] = product_url
-                
-                # 상세 정보 크롤링
-                detail_info = await self.crawl_book_detail(product_url)
-                book_info.update(detail_info)
-            
-            return book_info
-            
+            return await self.cache.get_or_compute(
+                f"aladin:list:{limit}:{major_field}:{keyword}", search, ttl=self.search_cache_ttl
+            )
         except Exception as e:
-            print(f"책 정보 추출 중 오류: {e}")
-            return None
+            if raise_errors:
+                raise
+            print(f"'{keyword}' 검색 실패: {e}")
+            return []
     
-    def is_relevant_to_major(self, text: str, major_field: str) -> bool:
+    async def search_page(self, keyword: str, major_field: str, page: int, page_size: int = SEARCH_PAGE_SIZE) -> List[Dict]:
         """
-        텍스트가 전공분야와 관련이 있는지 간단히 체크합니다.
+        검색 결과의 page번째 페이지 기본 정보 (대량 수집용, 캐시 없이).
+        오류를 빈 결과로 바꾸지 않고 그대로 올려 수집기가 실패한 검색어를 다시 시도하게 합니다.
         """
-        if not major_field:
-            return True
-        
-        # 전공분야 키워드를 공백으로 분리
-        major_keywords = major_field.replace(',', ' ').split()
-        
-        # 텍스트에 전공분야 키워드가 하나라도 포함되면 관련성 있음
-        for keyword in major_keywords:
-            if keyword.strip().lower() in text.lower():
-                return True
+        return await self._search_list(keyword, major_field, page_size, page)
+    
+    async def _search_list(self, keyword: str, major_field: str, limit: int, page: int = 1) -> List[Dict]:
+        """검색 결과 page번째 페이지에서 앞쪽 limit개 항목의 기본 정보만 파싱"""
+        # 알라딘 검색 URL
+        search_url = "https://www.aladin.co.kr/search/wsearchresult.aspx"
+        params = {
+            'SearchTarget': 'Book',
+            'SearchWord': keyword,
+            'x': '0',
+            'y': '0'
+        }
+        if page > 1:
+            params['page'] = str(page)
         
-        return True  # 기본적으로 관련성 있다고 가정
+        if streaming_enabled():
+            # 본문을 받는 대로 파싱하고 limit개 항목을 읽으면 나머지는 받지 않음
+            return await self._get(
+                search_url, consume=lambda response: stream_aladin_search(response, major_field, limit),
+                params=params
+            )
+        response = await self._get(search_url, params=params)
+        response.raise_for_status()
+        return await get_parse_pool().run(
+            parse_aladin_search, response.content, response.encoding, major_field, limit
+        )
+    
+    async def enrich_books(self, books: List[Dict], details: Optional[DetailFetchTracker] = None) -> List[Dict]:
+        """후보 도서에 상세 페이지 정보를 채움 (제자리 갱신, 호스트 동시 요청 제한 안에서 동시에)"""
+        await asyncio.gather(*(self.attach_details(book_info, details) for book_info in books))
+        return books
+    
+    async def attach_details(self, book_info: Dict, details: Optional[DetailFetchTracker] = None) -> Dict:
+        """
+        검색 결과에서 추출한 기본 책 정보에 상세 페이지 정보를 더합니다.
+        """
+        product_url = book_info.get('product_url')
+        if product_url:
+            # 상세 정보 크롤링 (요청 단위 중복 제거)
+            if details is not None:
+                detail_info = await details.get_or_fetch(book_info, lambda: self.crawl_book_detail(product_url))
+            else:
+                detail_info = await self.crawl_book_detail(product_url)
+            book_info.update(detail_info)
+        return book_info
     
     async def get_ai_book_recommendations(self, books: List[Dict], interest_technology: str, learning_difficulty: str) -> Dict:
         """
@@ -317,6 +404,10 @@ class AdvancedBookCrawler:
                     "목차": book.get('table_of_contents', ''),
                     "설명": book.get('description', '')
                 }
+                # 통합 검색 결과는 도서관 소장 정보도 함께 전달
+                if book.get('availability'):
+                    book_info["소장위치"] = book.get('location', 'N/A')
+                    book_info["도서상태"] = book['availability']
                 books_data.append(book_info)
             
             # JSON 형태로 책 정보 구성
@@ -347,7 +438,8 @@ class AdvancedBookCrawler:
 }}
 """
             
-            response = client.chat.completions.create(
+            response = await get_llm_scheduler().chat_completion(
+                stage="selection",
                 model="gpt-3.5-turbo-16k",  # 16k 모델 사용으로 토큰 한계 확장
                 messages=[
                     {"role": "system", "content": "당신은 전문 도서 추천 분석가입니다. 사용자의 관심 기술과 도서의 목차를 정밀하게 분석하여 최적의 추천을 제공하세요."},
@@ -414,7 +506,6 @@ class AdvancedBookCrawler:
 # 전역 크롤러 인스턴스
 crawler = AdvancedBookCrawler()
 
-@app.post("/recommend-books", response_model=BookRecommendationResponse)
 async def recommend_books(request: BookRecommendationRequest):
     """
     강의 제목을 바탕으로 도서를 추천하는 API
@@ -483,14 +574,27 @@ async def recommend_books(request: BookRecommendationRequest):
         print(f"API 오류: {e}")
         raise HTTPException(status_code=500, detail=f"서버 오류: {str(e)}")
 
-@app.get("/")
 async def root():
     return {"message": "Book Recommendation API", "version": "1.0.0"}
 
-@app.get("/health")
 async def health_check():
     return {"status": "healthy"}
 
+def create_app() -> FastAPI:
+    """단독 실행용 FastAPI 앱 (main.py에서 import할 때는 만들지 않음)"""
+    standalone_app = FastAPI(title="Book Recommendation API", version="1.0.0")
+    standalone_app.post("/recommend-books", response_model=BookRecommendationResponse)(recommend_books)
+    standalone_app.get("/")(root)
+    standalone_app.get("/health")(health_check)
+    return standalone_app
+
+def __getattr__(name: str):
+    # `uvicorn 모듈:app` 으로 실행할 때 최초 접근 시에만 앱 생성
+    if name == "app":
+        globals()["app"] = create_app()
+        return globals()["app"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
+    uvicorn.run(create_app(), host="0.0.0.0", port=8000) 
\ No newline at end of file
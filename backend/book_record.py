@@ -0,0 +1,150 @@
+"""
+세종대 / 알라딘 / GPT 추천 경로가 함께 쓰는 간결한 도서 레코드
+
+- __slots__ 로 레코드마다 dict를 만들지 않고, 출판사·소장위치처럼 반복되는 문자열은 하나의 객체로 공유(intern)
+  (최근 사용한 INTERN_CACHE_SIZE개 값만 보관하는 LRU라 오래 실행해도 커지지 않음)
+- 응답 모델(SejongBookInfo, BookInfo, FederatedBookInfo, BookRecommendation)로는 검증 없이
+  model_construct 로 변환해 문자열을 복사하지 않고 그대로 참조
+
+사용법:
+    python book_record.py --benchmark 100000     # 레코드당 메모리 사용량 비교 (dict / pydantic / BookRecord)
+"""
+import argparse
+import gc
+import sys
+import tracemalloc
+from functools import lru_cache
+from typing import Dict, Iterable, Type
+
+# 반복되는 값이 많은 필드 (레코드 간 같은 문자열 객체를 공유)
+INTERNED_FIELDS = (
+    'publisher', 'publication_year', 'publication_date', 'price', 'location', 'availability',
+    'subject_category', 'difficulty',
+)
+# 응답 모델 필드명 → 레코드 필드명 (GPT 추천 모델은 camelCase)
+FIELD_ALIASES = {
+    'publicationYear': 'publication_year',
+    'imageUrl': 'image_url',
+}
+
+# 공유할 값의 최대 개수 (출판사·소장위치·발행연도 등 반복되는 값은 수천 개 이내)
+INTERN_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=INTERN_CACHE_SIZE)
+def _shared(value):
+    """같은 값이면 처음 본 객체를 반환 (LRU에서 밀려난 값은 다음부터 새 객체를 공유)"""
+    return value
+
+
+def intern_value(value):
+    if isinstance(value, str):
+        return _shared(value)
+    return value
+
+
+class BookRecord:
+    __slots__ = (
+        'title', 'author', 'publisher', 'isbn', 'publication_year', 'publication_date', 'price',
+        'location', 'call_number', 'availability', 'subject_category', 'description', 'table_of_contents',
+        'image_url', 'product_url', 'detail_url', 'difficulty', 'rating', 'sources',
+    )
+
+    def __init__(self, **values):
+        for field in self.__slots__:
+            setattr(self, field, values.get(field))
+        for field in INTERNED_FIELDS:
+            setattr(self, field, intern_value(getattr(self, field)))
+        sources = tuple(values.get('sources') or ())
+        self.sources = _shared(sources)
+
+    @classmethod
+    def from_dict(cls, book: Dict) -> 'BookRecord':
+        """크롤러 dict 또는 GPT 응답 dict (camelCase 필드 허용)"""
+        values = {FIELD_ALIASES.get(key, key): value for key, value in book.items()}
+        return cls(**values)
+
+    def get(self, field: str, default=None):
+        value = getattr(self, FIELD_ALIASES.get(field, field), None)
+        return default if value is None else value
+
+    def to_dict(self) -> Dict:
+        """값이 있는 필드만 dict로 (캐시 저장/직렬화용)"""
+        book = {field: getattr(self, field) for field in self.__slots__ if getattr(self, field) is not None}
+        if self.sources:
+            book['sources'] = list(self.sources)
+        else:
+            book.pop('sources', None)
+        return book
+
+    def to_model(self, model_cls: Type):
+        """응답 모델로 변환 (재검증 없이 같은 문자열 객체를 참조)"""
+        values = {}
+        for name in model_cls.model_fields:
+            value = getattr(self, FIELD_ALIASES.get(name, name), None)
+            if name == 'sources':
+                value = list(self.sources)
+            if value is not None:
+                values[name] = value
+        return model_cls.model_construct(**values)
+
+    def __repr__(self):
+        return f"BookRecord(title={self.title!r}, isbn={self.isbn!r}, sources={self.sources!r})"
+
+
+def to_models(books: Iterable[Dict], model_cls: Type) -> list:
+    return [BookRecord.from_dict(book).to_model(model_cls) for book in books]
+
+
+def sample_book(i: int) -> Dict:
+    """크롤러 dict와 같은 형태의 벤치마크용 레코드 (HTML 파싱처럼 문자열은 매번 새 객체)"""
+    def fresh(value: str) -> str:
+        return (value + ' ')[:-1]
+
+    return {
+        'title': fresh(f'자료구조와 알고리즘 {i}'),
+        'author': fresh(f'홍길동{i % 500}'),
+        'publisher': fresh(['한빛미디어', '길벗', '인사이트', '생능출판', '이지스퍼블리싱'][i % 5]),
+        'publication_year': fresh(str(2010 + i % 15)),
+        'location': fresh(['중앙도서관 3층', '중앙도서관 4층', '학술정보원 2층'][i % 3]),
+        'call_number': fresh(f'005.{i % 1000} 홍{i % 97}'),
+        'availability': fresh(['대출가능', '대출중'][i % 2]),
+        'isbn': fresh(f'979{i:010d}'),
+        'subject_category': fresh(['005 컴퓨터 프로그래밍', '004 컴퓨터 과학', '310 통계학'][i % 3]),
+        'detail_url': fresh(f'https://library.sejong.ac.kr/search/DetailView.ax?cid={i}'),
+        'description': '',
+        'table_of_contents': '',
+    }
+
+
+def measure(label: str, build, count: int) -> float:
+    """레코드 count개를 파싱 결과(dict)에서 만들어 보관할 때 남는 메모리"""
+    gc.collect()
+    tracemalloc.start()
+    records = build(sample_book(i) for i in range(count))
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    per_record = retained / count
+    print(f"  {label:<24} {per_record:>8.1f} bytes/record  ({retained / 1024 / 1024:.1f}MB)")
+    del records
+    return per_record
+
+
+def main():
+    parser = argparse.ArgumentParser(description="도서 레코드 메모리 벤치마크")
+    parser.add_argument("--benchmark", type=int, default=100000, help="생성할 레코드 수")
+    args = parser.parse_args()
+
+    from schemas import SejongBookInfo
+
+    count = args.benchmark
+    print(f"=== 도서 레코드 {count:,}개 메모리 사용량 (Python {sys.version.split()[0]}) ===")
+    baseline = measure("dict (크롤러 형태)", list, count)
+    measure("pydantic SejongBookInfo", lambda books: [SejongBookInfo(**book) for book in books], count)
+    compact = measure("BookRecord (__slots__)", lambda books: [BookRecord.from_dict(book) for book in books], count)
+    print(f"  → dict 대비 {compact / baseline * 100:.0f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+import re
+from typing import Optional
+
+# 알라딘 상세 설명에 포함된 "ISBN : 9791234567890" 형태
+ISBN_PATTERN = re.compile(r'ISBN\s*:?\s*(97[89](?:[\-\s]?\d){10}|\d(?:[\-\s]?\d){8}[\-\s]?[\dXx])(?![\dXx])')
+
+
+def extract_isbn(text: Optional[str]) -> str:
+    """텍스트에서 ISBN(13자리 우선, 10자리 허용)을 추출합니다."""
+    if not text:
+        return ''
+
+    for match in ISBN_PATTERN.finditer(text):
+        isbn = re.sub(r'[\s\-]', '', match.group(1)).upper()
+        if len(isbn) == 13 and isbn.isdigit():
+            return isbn
+        if len(isbn) == 10 and isbn[:9].isdigit():
+            return isbn
+
+    return ''
+
+
+def normalize_title(title: Optional[str]) -> str:
+    """ISBN이 없을 때 병합 기준으로 쓰는 정규화된 제목"""
+    if not title:
+        return ''
+
+    title = re.sub(r'\[.*?\]|\(.*?\)', '', title)
+    title = title.split(':')[0].split(' - ')[0]
+    return re.sub(r'[^0-9a-zA-Z가-힣]', '', title).lower()
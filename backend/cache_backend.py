@@ -0,0 +1,361 @@
+import asyncio
+import copy
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Union
+
+# 잠금 보유 시간 (계산 중에는 LOCK_TTL / 3마다 연장하므로 워커가 죽었을 때 다른 워커가 이어받기까지의 시간)
+LOCK_TTL = 30.0
+# 다른 워커의 계산을 기다리는 최대 시간 (넘으면 이 워커에서 직접 계산)
+LOCK_WAIT_TIMEOUT = 60.0
+# SQLite 캐시의 만료된 행 정리 주기 (초)
+CLEANUP_INTERVAL = 300.0
+
+
+class CacheBackend(ABC):
+    """
+    크롤링/추천 결과 캐시 공통 인터페이스.
+    값은 JSON으로 직렬화 가능한 객체여야 하며, 여러 워커가 같은 키를 동시에 계산하지 않도록
+    get_or_compute()가 워커 내 요청 병합 + 워커 간 잠금(single-flight)을 함께 처리합니다.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: float):
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str):
+        ...
+
+    @abstractmethod
+    async def acquire_lock(self, key: str, owner: str, ttl: float) -> bool:
+        ...
+
+    @abstractmethod
+    async def release_lock(self, key: str, owner: str):
+        ...
+
+    @abstractmethod
+    async def renew_lock(self, key: str, owner: str, ttl: float) -> bool:
+        """owner가 보유한 잠금의 만료 시간을 연장 (이미 잃었으면 False)"""
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]],
+                             ttl: Union[float, Callable[[Any], float]], lock_ttl: float = LOCK_TTL,
+                             wait_timeout: float = LOCK_WAIT_TIMEOUT) -> Any:
+        """
+        캐시에 값이 있으면 반환하고, 없으면 한 워커만 compute()를 실행해 결과를 저장합니다.
+        빈 결과(None, [], {})는 일시적인 크롤링 실패일 수 있으므로 저장하지 않습니다.
+        ttl이 함수이면 결과로 유지 시간을 정하며, 0 이하이면 저장하지 않습니다.
+        다른 워커의 계산을 wait_timeout초 넘게 기다리면 잠금 없이 이 워커에서 직접 계산합니다.
+        """
+        cached = await self.get(key)
+        if cached is not None:
+            return cached
+
+        # 같은 워커 안의 동일 요청은 진행 중인 계산 결과를 공유
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            try:
+                return copy.deepcopy(await asyncio.shield(inflight))
+            except asyncio.CancelledError:
+                # 계산하던 요청만 취소(클라이언트 연결 끊김)되었으면 이 요청이 이어받아 계산
+                if not inflight.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                return await self.get_or_compute(key, compute, ttl, lock_ttl, wait_timeout)
+
+        future = asyncio.get_running_loop().create_future()
+        # 대기자가 없을 때 "exception was never retrieved" 경고 방지
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = future
+
+        try:
+            result = await self._compute_with_lock(key, compute, ttl, lock_ttl, wait_timeout)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _compute_with_lock(self, key: str, compute: Callable[[], Awaitable[Any]],
+                                 ttl: Union[float, Callable[[Any], float]], lock_ttl: float,
+                                 wait_timeout: float) -> Any:
+        lock_key = f"lock:{key}"
+        owner = uuid.uuid4().hex
+
+        # 다른 워커가 계산 중이면 결과가 저장되거나 잠금이 풀릴 때까지 대기
+        # (계산하는 워커가 잠금을 계속 연장하므로 계산이 길어도 중복 계산하지 않고, 워커가 죽으면 lock_ttl 뒤 이어받음)
+        # 계산이 wait_timeout보다 길어지면 더 기다리지 않고 직접 계산 (중복 계산보다 무한 대기를 피함)
+        wait_until = time.monotonic() + wait_timeout
+        while not await self.acquire_lock(lock_key, owner, lock_ttl):
+            if time.monotonic() >= wait_until:
+                print(f"캐시 잠금 대기 {wait_timeout:.0f}초 초과, 이 워커에서 직접 계산: {key}")
+                return await self._compute_and_store(key, compute, ttl)
+            await asyncio.sleep(0.1)
+            cached = await self.get(key)
+            if cached is not None:
+                return cached
+
+        renewal = asyncio.ensure_future(self._renew_while_computing(lock_key, owner, lock_ttl))
+        try:
+            cached = await self.get(key)
+            if cached is not None:
+                return cached
+            return await self._compute_and_store(key, compute, ttl)
+        finally:
+            renewal.cancel()
+            await self.release_lock(lock_key, owner)
+
+    async def _compute_and_store(self, key: str, compute: Callable[[], Awaitable[Any]],
+                                 ttl: Union[float, Callable[[Any], float]]) -> Any:
+        result = await compute()
+        expires_in = ttl(result) if callable(ttl) else ttl
+        if result and expires_in > 0:
+            await self.set(key, result, expires_in)
+        return result
+
+    async def _renew_while_computing(self, lock_key: str, owner: str, lock_ttl: float):
+        while True:
+            await asyncio.sleep(lock_ttl / 3)
+            try:
+                renewed = await self.renew_lock(lock_key, owner, lock_ttl)
+            except Exception as e:
+                print(f"캐시 잠금 연장 실패: {lock_key} ({e})")
+                continue
+            if not renewed:
+                print(f"캐시 잠금을 잃음, 다른 워커가 함께 계산할 수 있음: {lock_key}")
+                return
+
+
+class MemoryCache(CacheBackend):
+    """프로세스 내 TTL + LRU 캐시 (단일 워커 기본값)"""
+
+    def __init__(self, max_entries: int = 10000):
+        super().__init__()
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._locks: Dict[str, tuple] = {}
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, payload = entry
+        if expires_at < time.time():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        # 공유 백엔드와 동일하게 호출자마다 독립된 사본을 반환
+        return json.loads(payload)
+
+    async def set(self, key: str, value: Any, ttl: float):
+        self._entries[key] = (time.time() + ttl, json.dumps(value, ensure_ascii=False))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def delete(self, key: str):
+        self._entries.pop(key, None)
+
+    async def acquire_lock(self, key: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        holder = self._locks.get(key)
+        if holder and holder[1] > now:
+            return False
+        self._locks[key] = (owner, now + ttl)
+        return True
+
+    async def release_lock(self, key: str, owner: str):
+        holder = self._locks.get(key)
+        if holder and holder[0] == owner:
+            del self._locks[key]
+
+    async def renew_lock(self, key: str, owner: str, ttl: float) -> bool:
+        holder = self._locks.get(key)
+        if not holder or holder[0] != owner:
+            return False
+        self._locks[key] = (owner, time.time() + ttl)
+        return True
+
+
+class SQLiteCache(CacheBackend):
+    """같은 호스트의 여러 uvicorn 워커가 공유하는 SQLite(WAL) 캐시"""
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self._db_lock = threading.Lock()
+        self._cleaned_at = time.monotonic()
+        self._conn = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS locks (key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    def _execute(self, sql: str, params: tuple = ()) -> int:
+        """변경된 행 수 (커서는 같은 연결을 쓰는 다른 스레드와 공유되므로 잠금 안에서 읽음)"""
+        with self._db_lock:
+            return self._conn.execute(sql, params).rowcount
+
+    def _fetchone(self, sql: str, params: tuple = ()) -> Optional[tuple]:
+        with self._db_lock:
+            return self._conn.execute(sql, params).fetchone()
+
+    def _get(self, key: str) -> Optional[Any]:
+        row = self._fetchone("SELECT value, expires_at FROM cache WHERE key = ?", (key,))
+        if row is None:
+            return None
+        if row[1] < time.time():
+            self._execute("DELETE FROM cache WHERE key = ? AND expires_at < ?", (key, time.time()))
+            return None
+        return json.loads(row[0])
+
+    def _set(self, key: str, value: Any, ttl: float):
+        self._execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value, ensure_ascii=False), time.time() + ttl)
+        )
+        if time.monotonic() - self._cleaned_at >= CLEANUP_INTERVAL:
+            self._cleanup()
+
+    def _cleanup(self) -> int:
+        """다시 조회되지 않는 만료된 캐시 행과 잠금 정리"""
+        self._cleaned_at = time.monotonic()
+        now = time.time()
+        removed = self._execute("DELETE FROM cache WHERE expires_at < ?", (now,))
+        self._execute("DELETE FROM locks WHERE expires_at < ?", (now,))
+        if removed:
+            print(f"SQLite 캐시 만료 항목 {removed}개 정리")
+        return removed
+
+    def _acquire_lock(self, key: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        with self._db_lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM locks WHERE key = ? AND expires_at < ?", (key, now))
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO locks (key, owner, expires_at) VALUES (?, ?, ?)",
+                    (key, owner, now + ttl)
+                )
+                acquired = cursor.rowcount == 1
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return acquired
+
+    async def get(self, key: str) -> Optional[Any]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, value: Any, ttl: float):
+        await asyncio.to_thread(self._set, key, value, ttl)
+
+    async def delete(self, key: str):
+        await asyncio.to_thread(self._execute, "DELETE FROM cache WHERE key = ?", (key,))
+
+    async def acquire_lock(self, key: str, owner: str, ttl: float) -> bool:
+        return await asyncio.to_thread(self._acquire_lock, key, owner, ttl)
+
+    async def release_lock(self, key: str, owner: str):
+        await asyncio.to_thread(self._execute, "DELETE FROM locks WHERE key = ? AND owner = ?", (key, owner))
+
+    async def renew_lock(self, key: str, owner: str, ttl: float) -> bool:
+        return await asyncio.to_thread(
+            self._execute, "UPDATE locks SET expires_at = ? WHERE key = ? AND owner = ?", (time.time() + ttl, key, owner)
+        ) == 1
+
+
+# 잠금 보유자만 해제하도록 비교 후 삭제
+REDIS_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+# 잠금 보유자만 만료 시간을 연장
+REDIS_RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+class RedisCache(CacheBackend):
+    """여러 호스트의 워커가 공유하는 Redis 프로토콜 서버 캐시"""
+
+    def __init__(self, url: str, prefix: str = "unibooks:"):
+        super().__init__()
+        try:
+            import redis.asyncio as redis_asyncio
+        except ImportError:
+            raise RuntimeError("Redis 캐시를 사용하려면 redis 패키지를 설치하세요: pip install redis")
+
+        self.prefix = prefix
+        self._redis = redis_asyncio.from_url(url)
+
+    async def get(self, key: str) -> Optional[Any]:
+        payload = await self._redis.get(self.prefix + key)
+        return json.loads(payload) if payload is not None else None
+
+    async def set(self, key: str, value: Any, ttl: float):
+        await self._redis.set(self.prefix + key, json.dumps(value, ensure_ascii=False), px=int(ttl * 1000))
+
+    async def delete(self, key: str):
+        await self._redis.delete(self.prefix + key)
+
+    async def acquire_lock(self, key: str, owner: str, ttl: float) -> bool:
+        return bool(await self._redis.set(self.prefix + key, owner, nx=True, px=int(ttl * 1000)))
+
+    async def release_lock(self, key: str, owner: str):
+        await self._redis.eval(REDIS_RELEASE_SCRIPT, 1, self.prefix + key, owner)
+
+    async def renew_lock(self, key: str, owner: str, ttl: float) -> bool:
+        return bool(await self._redis.eval(REDIS_RENEW_SCRIPT, 1, self.prefix + key, owner, int(ttl * 1000)))
+
+
+def create_cache_backend(url: str) -> CacheBackend:
+    """memory:// | sqlite:///경로 | redis://호스트:포트/DB 형식의 URL로 캐시 백엔드 생성"""
+    if url.startswith("sqlite:///"):
+        return SQLiteCache(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisCache(url)
+    if url in ("", "memory://"):
+        return MemoryCache()
+    raise ValueError(f"지원하지 않는 캐시 백엔드: {url}")
+
+
+_shared_cache: Optional[CacheBackend] = None
+
+
+def get_shared_cache() -> CacheBackend:
+    """CACHE_BACKEND_URL 환경변수로 선택된 프로세스 공용 캐시 인스턴스"""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = create_cache_backend(os.getenv("CACHE_BACKEND_URL", "memory://"))
+    return _shared_cache
@@ -0,0 +1,364 @@
+"""
+강의 목록 추천 미리 계산 (오프라인 작업 + 키 단위 조회 저장소)
+
+개설 강의 목록(CSV)의 강의마다 키워드 생성 → 크롤링 → 판본 중복 제거 → AI 선정 파이프라인을 미리 실행해 SQLite에 저장합니다.
+추천 엔드포인트는 강의 제목+전공이 목록에 있으면
+- 난이도와 관심 기술까지 미리 계산한 조합이면 저장된 응답을 그대로 반환하고 (LLM/크롤링 없음)
+- 강의만 같으면 저장된 검색 키워드와 후보 도서로 AI 선정 단계만 실행합니다.
+항목은 유효 기간(--ttl-hours)이 지나면 사용하지 않으며, 작업을 다시 실행하면 없거나 곧 만료될 항목만 새로 계산합니다.
+
+CSV 열: lecture_title, major_field, interest_technology(선택, 여러 개는 | 로 구분)
+
+사용법:
+    python course_catalog.py --courses courses.csv                               # 없거나 만료된 강의만 계산
+    python course_catalog.py --courses courses.csv --refresh-within-hours 24     # 24시간 안에 만료될 항목도 갱신
+    python course_catalog.py --courses courses.csv --pipelines sejong --concurrency 2 --max-per-host 2 --force
+    python course_catalog.py --stats
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import re
+import sqlite3
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from keyword_yield import book_identity, get_keyword_stats
+from recommendation_pipeline import DIFFICULTY_HINTS, make_plan
+
+PIPELINES = ('sejong', 'aladin', 'federated')
+DEFAULT_TTL_HOURS = 168
+
+# 미리 계산 작업이 3단계(AI 선정)를 실행하는 동안 방금 수집한 (검색 키워드, 후보 도서)
+# (저장 전이므로 catalog_candidates_or_collect가 다시 수집하지 않도록 이 값을 먼저 사용)
+prepared_candidates: ContextVar[Optional[Tuple[List[str], List[Dict]]]] = ContextVar(
+    "prepared_candidates", default=None
+)
+# 미리 계산 작업에서 AI 선정 결과를 바로 기록하지 않고 모아 두는 목록
+# (난이도 × 관심 기술마다 3단계를 반복하므로 강의마다 한 번만 키워드 수확량에 반영)
+deferred_selections: ContextVar[Optional[List[Dict]]] = ContextVar("deferred_selections", default=None)
+
+
+def normalize_key(text: Optional[str]) -> str:
+    return re.sub(r'[^0-9a-zA-Z가-힣]', '', text or '').lower()
+
+
+def course_key(lecture_title: str, major_field: str) -> str:
+    return f"{normalize_key(lecture_title)}|{normalize_key(major_field)}"
+
+
+def difficulty_level(learning_difficulty: Optional[str]) -> Optional[str]:
+    """'초급자', '중급' 같은 표기를 난이도 단계(초급/중급/고급)로 (알 수 없으면 None)"""
+    return next((level for level in DIFFICULTY_HINTS if level in (learning_difficulty or '')), None)
+
+
+def selection_key(learning_difficulty: str, interest_technology: str) -> Optional[str]:
+    level = difficulty_level(learning_difficulty)
+    return f"{level}|{normalize_key(interest_technology)}" if level else None
+
+
+def read_courses(path: str) -> List[Dict]:
+    """강의 목록 CSV → [{'lecture_title', 'major_field', 'interests': [...]}] (같은 강의는 관심 기술을 합침)"""
+    courses: Dict[str, Dict] = {}
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        for row in csv.DictReader(f):
+            title = (row.get('lecture_title') or '').strip()
+            if not title:
+                continue
+            major = (row.get('major_field') or '').strip()
+            interests = [part.strip() for part in (row.get('interest_technology') or '').split('|') if part.strip()]
+            course = courses.setdefault(course_key(title, major), {
+                'lecture_title': title, 'major_field': major, 'interests': []
+            })
+            for interest in interests or [title]:
+                if interest not in course['interests']:
+                    course['interests'].append(interest)
+    return list(courses.values())
+
+
+class CourseCatalogStore:
+    """
+    미리 계산된 강의별 검색 키워드/후보 도서/선정 결과.
+    조회는 (pipeline, course_key) 기본 키로 한 행만 읽으며, 이벤트 루프를 막지 않도록 스레드에서 실행합니다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.stats = {'response_hits': 0, 'candidate_hits': 0, 'expired': 0}
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path)
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS courses (
+                pipeline TEXT NOT NULL,
+                course_key TEXT NOT NULL,
+                lecture_title TEXT NOT NULL,
+                major_field TEXT NOT NULL,
+                keywords TEXT NOT NULL,
+                candidates TEXT NOT NULL,
+                selections TEXT NOT NULL,
+                computed_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (pipeline, course_key)
+            )
+        """)
+        return db
+
+    def _row(self, pipeline: str, key: str, columns: str) -> Optional[tuple]:
+        # 작업을 한 번도 실행하지 않았으면 파일을 만들지 않음
+        if not os.path.exists(self.path):
+            return None
+        db = sqlite3.connect(self.path)
+        try:
+            row = db.execute(
+                f"SELECT expires_at, {columns} FROM courses WHERE pipeline = ? AND course_key = ?",
+                (pipeline, key)
+            ).fetchone()
+        except sqlite3.OperationalError:
+            return None
+        finally:
+            db.close()
+        if row is None:
+            return None
+        if row[0] < time.time():
+            self.stats['expired'] += 1
+            return None
+        return row[1:]
+
+    def _candidates(self, pipeline: str, key: str) -> Optional[Tuple[List[str], List[Dict]]]:
+        row = self._row(pipeline, key, "keywords, candidates")
+        if row is None:
+            return None
+        self.stats['candidate_hits'] += 1
+        return json.loads(row[0]), json.loads(row[1])
+
+    def _response(self, pipeline: str, key: str, selection: str) -> Optional[Dict]:
+        row = self._row(pipeline, key, "selections")
+        if row is None:
+            return None
+        stored = json.loads(row[0]).get(selection)
+        if stored is None:
+            return None
+        self.stats['response_hits'] += 1
+        response = json.loads(stored)
+        response['shortcuts'] = response.get('shortcuts', []) + ['precomputed']
+        return response
+
+    async def candidates(self, pipeline: str, request) -> Optional[Tuple[List[str], List[Dict]]]:
+        """강의의 (검색 키워드, 후보 도서) 또는 None"""
+        prepared = prepared_candidates.get()
+        if prepared is not None:
+            keywords, candidates = prepared
+            return list(keywords), [dict(book) for book in candidates]
+        return await asyncio.to_thread(
+            self._candidates, pipeline, course_key(request.lecture_title, request.major_field)
+        )
+
+    async def response(self, pipeline: str, request) -> Optional[Dict]:
+        """같은 강의/난이도/관심 기술로 미리 계산한 응답 dict 또는 None"""
+        selection = selection_key(request.learning_difficulty, request.interest_technology)
+        if selection is None:
+            return None
+        return await asyncio.to_thread(
+            self._response, pipeline, course_key(request.lecture_title, request.major_field), selection
+        )
+
+    def expiring(self, pipeline: str, course: Dict, before: float) -> bool:
+        """작업에서 다시 계산할 항목인지 (없음 / before 전에 만료 / CSV의 관심 기술이 늘어남)"""
+        with self._connect() as db:
+            row = db.execute(
+                "SELECT selections, expires_at FROM courses WHERE pipeline = ? AND course_key = ?",
+                (pipeline, course_key(course['lecture_title'], course['major_field']))
+            ).fetchone()
+        if row is None or row[1] < before:
+            return True
+        stored = json.loads(row[0])
+        return any(selection_key(level, interest) not in stored
+                   for level in DIFFICULTY_HINTS for interest in course['interests'])
+
+    def put(self, pipeline: str, course: Dict, keywords: List[str], candidates: List[Dict],
+            selections: Dict[str, Dict], ttl: float):
+        now = time.time()
+        with self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO courses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (pipeline, course_key(course['lecture_title'], course['major_field']),
+                 course['lecture_title'], course['major_field'],
+                 json.dumps(keywords, ensure_ascii=False),
+                 json.dumps(candidates, ensure_ascii=False),
+                 json.dumps({key: json.dumps(value, ensure_ascii=False) for key, value in selections.items()},
+                            ensure_ascii=False),
+                 now, now + ttl)
+            )
+
+    def summary(self) -> Dict:
+        if not os.path.exists(self.path):
+            return {'path': self.path, 'courses': 0}
+        now = time.time()
+        with self._connect() as db:
+            rows = db.execute("SELECT pipeline, expires_at, selections FROM courses").fetchall()
+        by_pipeline: Dict[str, Dict] = {}
+        for pipeline, expires_at, selections in rows:
+            counts = by_pipeline.setdefault(pipeline, {'courses': 0, 'expired': 0, 'selections': 0})
+            counts['courses'] += 1
+            counts['expired'] += int(expires_at < now)
+            counts['selections'] += len(json.loads(selections))
+        return {'path': self.path, 'courses': len(rows), 'by_pipeline': by_pipeline, 'lookups': dict(self.stats)}
+
+
+_catalog: Optional[CourseCatalogStore] = None
+
+
+def get_course_catalog() -> CourseCatalogStore:
+    global _catalog
+    if _catalog is None:
+        _catalog = CourseCatalogStore(os.getenv("COURSE_CATALOG_DB", "course_catalog.db"))
+    return _catalog
+
+
+class CatalogPrecomputer:
+    """강의 목록을 제한된 동시성으로 미리 계산 (호스트별 동시 요청 수 제한, LLM은 가장 낮은 우선순위)"""
+
+    def __init__(self, store: CourseCatalogStore, pipelines: List[str], concurrency: int = 2,
+                 max_per_host: Optional[int] = None, ttl_hours: float = DEFAULT_TTL_HOURS,
+                 refresh_within_hours: float = 0, force: bool = False):
+        self.store = store
+        self.pipelines = pipelines
+        self.concurrency = concurrency
+        self.max_per_host = max_per_host
+        self.ttl = ttl_hours * 3600
+        self.refresh_within = refresh_within_hours * 3600
+        self.force = force
+        self.stats = {'computed': 0, 'skipped': 0, 'failed': 0}
+
+    def _setup(self):
+        import main
+        from llm_scheduler import PREFETCH, current_priority
+
+        # 사용자 요청보다 뒤에 처리되도록 작업 전체를 미리 계산 우선순위로
+        current_priority.set(PREFETCH)
+        if self.max_per_host:
+            for crawler in (main.get_sejong_crawler(), main.get_aladin_crawler()):
+                crawler.host_limit = asyncio.Semaphore(self.max_per_host)
+        self.main = main
+
+    async def compute(self, pipeline: str, course: Dict):
+        main = self.main
+        request_type = main.SejongBookRecommendationRequest if pipeline == 'sejong' else main.AladinRequest
+        collect, run = {
+            'sejong': (main.collect_sejong_candidates, main.run_sejong_recommendation),
+            'aladin': (main.collect_aladin_candidates, main.run_aladin_recommendation),
+            'federated': (main.collect_federated_candidates, main.run_federated_recommendation),
+        }[pipeline]
+
+        def make_request(difficulty: str, interest: str):
+            return request_type(
+                lecture_title=course['lecture_title'], major_field=course['major_field'],
+                interest_technology=interest, learning_difficulty=difficulty, tier='thorough'
+            )
+
+        # 1~2단계는 강의마다 한 번 (세종대는 상세 보강까지 저장)
+        base = make_request(next(iter(DIFFICULTY_HINTS)), course['interests'][0])
+        keywords, candidates = await collect(base, make_plan('thorough', max_candidates=50))
+        if pipeline == 'sejong' and candidates:
+            await main.get_sejong_crawler().enrich_books(candidates)
+        if not candidates:
+            raise ValueError("검색된 도서가 없습니다")
+
+        # 3단계는 난이도 × 관심 기술마다 (방금 수집한 후보를 사용), 강의마다 한 번에 저장
+        selections = {}
+        selected: List[Dict] = []
+        token = prepared_candidates.set((keywords, candidates))
+        deferred = deferred_selections.set(selected)
+        try:
+            for level in DIFFICULTY_HINTS:
+                for interest in course['interests']:
+                    response = await run(make_request(level, interest))
+                    selections[selection_key(level, interest)] = response.model_dump()
+        finally:
+            deferred_selections.reset(deferred)
+            prepared_candidates.reset(token)
+        self.store.put(pipeline, course, keywords, candidates, selections, self.ttl)
+        # 여러 선정에 뽑힌 도서도 강의마다 한 번만 가산
+        unique = {book_identity(book): book for book in selected}
+        get_keyword_stats().record_selected(pipeline, unique.values())
+
+    async def run(self, courses: List[Dict]) -> Dict:
+        self._setup()
+        before = float('inf') if self.force else time.time() + self.refresh_within
+        units = []
+        for course in courses:
+            for pipeline in self.pipelines:
+                if self.store.expiring(pipeline, course, before):
+                    units.append((pipeline, course))
+                else:
+                    self.stats['skipped'] += 1
+        print(f"미리 계산 대상 {len(units)}개 (최신 상태 {self.stats['skipped']}개 건너뜀)")
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def worker(pipeline: str, course: Dict):
+            async with semaphore:
+                started = time.time()
+                try:
+                    await self.compute(pipeline, course)
+                    self.stats['computed'] += 1
+                    print(f"✅ [{pipeline}] {course['lecture_title']} ({time.time() - started:.1f}초)")
+                except Exception as e:
+                    self.stats['failed'] += 1
+                    print(f"❌ [{pipeline}] {course['lecture_title']}: {e}")
+
+        await asyncio.gather(*(worker(pipeline, course) for pipeline, course in units))
+        return self.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="강의 목록 도서 추천 미리 계산")
+    parser.add_argument("--courses", help="강의 목록 CSV (lecture_title, major_field, interest_technology)")
+    parser.add_argument("--db", help="저장 파일 (기본: COURSE_CATALOG_DB 또는 course_catalog.db)")
+    parser.add_argument("--pipelines", default=",".join(PIPELINES), help="sejong, aladin, federated 중 쉼표로 선택")
+    parser.add_argument("--concurrency", type=int, default=2, help="동시에 계산할 강의 수")
+    parser.add_argument("--max-per-host", type=int, default=2, help="호스트별 최대 동시 요청 수")
+    parser.add_argument("--ttl-hours", type=float, default=DEFAULT_TTL_HOURS, help="결과 유효 기간 (시간)")
+    parser.add_argument("--refresh-within-hours", type=float, default=0, help="이 시간 안에 만료될 항목도 다시 계산")
+    parser.add_argument("--force", action="store_true", help="모든 항목 다시 계산")
+    parser.add_argument("--stats", action="store_true", help="저장된 항목 수만 출력")
+    args = parser.parse_args()
+
+    if args.db:
+        # 추천 파이프라인(main.py)도 같은 파일을 보도록
+        os.environ["COURSE_CATALOG_DB"] = args.db
+    store = get_course_catalog()
+    if args.stats:
+        print(json.dumps(store.summary(), ensure_ascii=False, indent=2))
+        return
+    if not args.courses:
+        parser.error("--courses 가 필요합니다.")
+
+    pipelines = [pipeline.strip() for pipeline in args.pipelines.split(',') if pipeline.strip()]
+    unknown = set(pipelines) - set(PIPELINES)
+    if unknown:
+        parser.error(f"지원하지 않는 경로: {', '.join(sorted(unknown))}")
+
+    courses = read_courses(args.courses)
+    precomputer = CatalogPrecomputer(
+        store, pipelines,
+        concurrency=args.concurrency,
+        max_per_host=args.max_per_host,
+        ttl_hours=args.ttl_hours,
+        refresh_within_hours=args.refresh_within_hours,
+        force=args.force
+    )
+    started = time.time()
+    try:
+        stats = asyncio.run(precomputer.run(courses))
+        print(f"\n미리 계산 완료: {stats} ({time.time() - started:.1f}초)")
+    except KeyboardInterrupt:
+        print(f"\n중단됨: {precomputer.stats} - 다시 실행하면 끝나지 않은 강의만 계산합니다.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+import asyncio
+import hashlib
+import io
+import os
+import threading
+from typing import Dict, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+try:
+    from PIL import Image
+except ImportError:  # 선택 의존성 - 없으면 원본 이미지를 그대로 제공
+    Image = None
+
+# 프록시 허용 호스트 (알라딘 표지 이미지 서버만)
+ALLOWED_HOSTS = set(os.getenv("COVER_ALLOWED_HOSTS", "image.aladin.co.kr").split(","))
+# 제공하는 썸네일 너비 (0 = 원본)
+ALLOWED_WIDTHS = (0, 80, 160, 320, 640)
+CACHE_HEADERS = {"Cache-Control": "public, max-age=31536000, immutable"}
+# 원본 이미지 최대 크기 (넘으면 받다가 중단)
+MAX_IMAGE_BYTES = int(os.getenv("COVER_MAX_IMAGE_BYTES", str(5 * 1024 * 1024)))
+# 따라갈 최대 리다이렉트 수 (매 단계 허용 호스트 확인)
+MAX_REDIRECTS = 3
+
+
+class CoverProxyError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class CoverImageProxy:
+    """
+    알라딘 표지 이미지를 한 번만 받아 디스크 캐시에 저장하고 너비별 썸네일로 제공.
+    같은 표지에 대한 동시 요청은 하나의 다운로드/리사이즈 작업을 공유합니다.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._client = None
+        self._total_bytes: Optional[int] = None
+        # 디스크 캐시 쓰기/정리는 스레드에서 실행되므로 용량 계산은 잠금 하에서만
+        self._disk_lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @property
+    def client(self):
+        if self._client is None:
+            import httpx
+
+            # 리다이렉트는 _fetch_original에서 허용 호스트를 확인하며 직접 따라감
+            self._client = httpx.AsyncClient(timeout=10.0, follow_redirects=False)
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @staticmethod
+    def validate(url: str, width: int) -> str:
+        parsed = urlparse(url if not url.startswith("//") else "https:" + url)
+        if parsed.scheme not in ("http", "https") or parsed.hostname not in ALLOWED_HOSTS:
+            raise CoverProxyError(400, "허용되지 않은 이미지 주소입니다.")
+        if width not in ALLOWED_WIDTHS:
+            raise CoverProxyError(400, f"지원하는 너비: {', '.join(str(w) for w in ALLOWED_WIDTHS)}")
+        return parsed.geturl()
+
+    def _path(self, url: str, width: int) -> str:
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}_w{width}")
+
+    async def get_cover(self, url: str, width: int = 0) -> Tuple[bytes, str]:
+        """(이미지 바이트, content-type) 반환"""
+        url = self.validate(url, width)
+        cached = await asyncio.to_thread(self._read, self._path(url, width))
+        if cached is not None:
+            return cached
+
+        key = f"{url}#{width}"
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = future
+        try:
+            result = await self._build(url, width)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _build(self, url: str, width: int) -> Tuple[bytes, str]:
+        if width == 0:
+            return await self._fetch_original(url)
+
+        original, content_type = await self.get_cover(url, 0)
+        if Image is None:
+            return original, content_type
+
+        resized = await asyncio.to_thread(self._resize, original, width)
+        if resized is None:
+            return original, content_type
+        await asyncio.to_thread(self._write, self._path(url, width), resized, "image/jpeg")
+        return resized, "image/jpeg"
+
+    async def _fetch_original(self, url: str) -> Tuple[bytes, str]:
+        target = url
+        for _ in range(MAX_REDIRECTS + 1):
+            try:
+                async with self.client.stream("GET", target) as response:
+                    if response.is_redirect:
+                        location = urljoin(target, response.headers.get("location", ""))
+                        try:
+                            target = self.validate(location, 0)
+                        except CoverProxyError:
+                            raise CoverProxyError(502, "허용되지 않은 주소로 리다이렉트되었습니다.")
+                        continue
+                    if response.status_code != 200:
+                        raise CoverProxyError(502, f"표지 이미지 다운로드 실패: {response.status_code}")
+
+                    content_type = response.headers.get("content-type", "image/jpeg").split(";")[0]
+                    if not content_type.startswith("image/"):
+                        raise CoverProxyError(502, "이미지가 아닌 응답입니다.")
+                    data = await self._read_limited(response)
+                    break
+            except CoverProxyError:
+                raise
+            except Exception as e:
+                raise CoverProxyError(502, f"표지 이미지 다운로드 실패: {e}")
+        else:
+            raise CoverProxyError(502, "리다이렉트가 너무 많습니다.")
+
+        await asyncio.to_thread(self._write, self._path(url, 0), data, content_type)
+        return data, content_type
+
+    @staticmethod
+    async def _read_limited(response) -> bytes:
+        """본문을 MAX_IMAGE_BYTES까지만 받음 (Content-Length가 크면 받지 않음)"""
+        declared = response.headers.get("content-length")
+        if declared and declared.isdigit() and int(declared) > MAX_IMAGE_BYTES:
+            raise CoverProxyError(502, "표지 이미지가 너무 큽니다.")
+        chunks = []
+        received = 0
+        async for chunk in response.aiter_bytes():
+            received += len(chunk)
+            if received > MAX_IMAGE_BYTES:
+                raise CoverProxyError(502, "표지 이미지가 너무 큽니다.")
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    @staticmethod
+    def _resize(data: bytes, width: int) -> Optional[bytes]:
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                if image.width <= width:
+                    return None
+                height = max(1, round(image.height * width / image.width))
+                thumbnail = image.convert("RGB").resize((width, height), Image.LANCZOS)
+                output = io.BytesIO()
+                thumbnail.save(output, format="JPEG", quality=82, optimize=True, progressive=True)
+                return output.getvalue()
+        except Exception as e:
+            print(f"표지 리사이즈 실패: {e}")
+            return None
+
+    # 디스크 캐시 (파일 앞에 content-type 한 줄 저장, 이벤트 루프를 막지 않도록 asyncio.to_thread에서 실행)
+    def _read(self, path: str) -> Optional[Tuple[bytes, str]]:
+        try:
+            with open(path, "rb") as f:
+                content_type = f.readline().decode("ascii").strip()
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        # 최근 사용 시각 갱신 (LRU 정리 기준)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return data, content_type
+
+    def _write(self, path: str, data: bytes, content_type: str):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(content_type.encode("ascii") + b"\n")
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._disk_lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(entry.stat().st_size for entry in os.scandir(self.cache_dir) if entry.is_file())
+            else:
+                self._total_bytes += len(data)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """캐시 용량 초과 시 가장 오래 사용하지 않은 파일부터 삭제 (최대 용량의 90%까지)"""
+        entries = [entry for entry in os.scandir(self.cache_dir) if entry.is_file()]
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        total = sum(entry.stat().st_size for entry in entries)
+        target = self.max_bytes * 0.9
+        for entry in entries:
+            if total <= target:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                total -= size
+            except OSError:
+                continue
+        self._total_bytes = total
+
+
+_cover_proxy: Optional[CoverImageProxy] = None
+
+
+def get_cover_proxy() -> CoverImageProxy:
+    global _cover_proxy
+    if _cover_proxy is None:
+        _cover_proxy = CoverImageProxy(
+            cache_dir=os.getenv("COVER_CACHE_DIR", "./cover_cache"),
+            max_bytes=int(os.getenv("COVER_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+        )
+    return _cover_proxy
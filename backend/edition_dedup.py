@@ -0,0 +1,259 @@
+"""
+판본 중복 제거 (MinHash + LSH)
+
+제목이 완전히 같을 때만 중복으로 보던 방식으로는 "(개정판)", "[eBook]", 권차, 부제만 다른 판본이 모두 후보로 남아
+상세 페이지 요청과 LLM 프롬프트 토큰을 낭비합니다. 정규화한 제목(+저자)의 문자 shingle로 MinHash 서명을 만들고
+LSH 버킷으로 후보 쌍만 비교해 판본 묶음을 찾은 뒤 (저자·권차가 같고 제목 유사도가 높은 쌍만), 묶음마다 대표 도서 하나(대출 가능 > 최신 > 정보가 많은 순)만 남깁니다.
+
+사용법:
+    python edition_dedup.py "자료구조 (개정판) / 홍길동" "[eBook] 자료구조 / 홍길동 지음" "운영체제 / 김철수"   # 묶음 확인
+    python edition_dedup.py --benchmark 20000                                # 처리 시간 측정
+"""
+import argparse
+import random
+import re
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+from book_utils import normalize_title
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+# LSH로 찾은 후보 쌍을 실제로 묶을 Jaccard 유사도 (제목 shingle 집합으로 다시 계산)
+DEFAULT_THRESHOLD = 0.8
+
+# multiply-shift 해시 계열: 홀수 64비트 곱수마다 (a * h mod 2^64) 의 상위 32비트
+MASK64 = (1 << 64) - 1
+_rng = random.Random(20240601)
+MULTIPLIERS = [_rng.getrandbits(64) | 1 for _ in range(NUM_PERM)]
+
+_numpy = None
+_numpy_checked = False
+
+# 괄호 안이 판/권/형태 표시면 괄호째 삭제 (그 외 괄호는 내용을 제목 일부로 유지)
+EDITION_WORDS = r'(개정|증보|전면|신판|초판|재판|\d+\s*판|판$|ebook|e-book|전자책|오디오북|리커버|특별판|한정판|에디션|edition|\bed\b|세트|set|\d+\s*권|권\d+|vol)'
+BRACKETED = re.compile(r'[\[(<【]([^\])>】]*)[\])>】]')
+EDITION_MARK = re.compile(EDITION_WORDS, re.IGNORECASE)
+STANDALONE_MARKS = re.compile(
+    r'(제?\s*\d+\s*판|개정\s*증보판|전면\s*개정판|개정판|증보판|\d+(st|nd|rd|th)\s*edition|\d+\s*권|vol\.?\s*\d+|'
+    r'\s(상|중|하)$|ebook|e-book|전자책)',
+    re.IGNORECASE
+)
+# 권차/편 표시 (판본 표시와 달리 서로 다르면 다른 책: "1권"과 "2권", "파이썬 편"과 "자바 편")
+VOLUME_MARKS = re.compile(
+    r'(?:제\s*)?(\d+)\s*권|vol(?:ume)?\.?\s*(\d+)|part\s*(\d+)|(?:^|[\s(\[])(상|중|하)(?=$|[\s)\]])|'
+    r'([0-9a-zA-Z가-힣]+)\s*편(?=$|[\s)\]:,])',
+    re.IGNORECASE
+)
+AUTHOR_ROLES = re.compile(r'(지음|지은이|글|저자|공저|편저|엮음|옮김|역자|감수|그림|\s외$|\s저$|\s역$|\s편$)')
+
+
+def normalize_edition_title(title: Optional[str]) -> str:
+    """판/권차/형태 표시와 부제를 뗀 제목 (공백·기호 제거, 소문자)"""
+    if not title:
+        return ''
+    title = BRACKETED.sub(lambda m: ' ' if EDITION_MARK.search(m.group(1)) else f' {m.group(1)} ', title)
+    main = re.split(r'\s*[:：]\s*|\s+-\s+|\s+=\s+', title.strip())[0]
+    main = STANDALONE_MARKS.sub(' ', main)
+    return re.sub(r'[^0-9a-zA-Z가-힣]', '', main).lower() or normalize_title(title)
+
+
+def volume_tokens(title: Optional[str]) -> Tuple[str, ...]:
+    """부제·괄호까지 포함한 제목 전체의 권차/편 표시 ("2권" → "2", "파이썬 편" → "파이썬")"""
+    tokens = set()
+    for match in VOLUME_MARKS.finditer(title or ''):
+        token = next(group for group in match.groups() if group)
+        tokens.add(str(int(token)) if token.isdigit() else token.lower())
+    return tuple(sorted(tokens))
+
+
+def normalize_author(author: Optional[str]) -> str:
+    """첫 번째 저자 이름만 (역할 표시 제거)"""
+    if not author:
+        return ''
+    first = re.split(r'[,;/·|]', author)[0]
+    first = AUTHOR_ROLES.sub(' ', re.sub(r'\(.*?\)', ' ', first))
+    return re.sub(r'[^0-9a-zA-Z가-힣]', '', first).lower()
+
+
+def shingles(title_key: str, author_key: str = '') -> set:
+    """제목 문자 3-gram (짧은 제목도 shingle이 생기도록 양끝 표시) + 저자 이름 shingle"""
+    padded = f'^{title_key}$'
+    result = {padded[i:i + SHINGLE_SIZE] for i in range(max(1, len(padded) - SHINGLE_SIZE + 1))}
+    if author_key:
+        result.add(f'@{author_key}')
+    return result
+
+
+def get_numpy():
+    """numpy는 첫 호출 시 임포트 (없으면 순수 파이썬 계산, 결과는 동일)"""
+    global _numpy, _numpy_checked
+    if not _numpy_checked:
+        try:
+            import numpy
+            _numpy = (numpy, numpy.array(MULTIPLIERS, dtype=numpy.uint64))
+        except ImportError:
+            _numpy = None
+        _numpy_checked = True
+    return _numpy
+
+
+def minhash(features: set) -> Tuple[int, ...]:
+    hashes = [zlib.crc32(feature.encode('utf-8')) for feature in features]
+    numpy_and_multipliers = get_numpy()
+    if numpy_and_multipliers:
+        numpy, multipliers = numpy_and_multipliers
+        products = numpy.outer(numpy.array(hashes, dtype=numpy.uint64), multipliers) >> numpy.uint64(32)
+        return tuple(products.min(axis=0).tolist())
+    rows = [[((a * h) & MASK64) >> 32 for a in MULTIPLIERS] for h in hashes]
+    return tuple(map(min, zip(*rows)))
+
+
+def jaccard(left: set, right: set) -> float:
+    return len(left & right) / len(left | right) if left or right else 1.0
+
+
+def publication_year(book: Dict) -> int:
+    match = re.search(r'(19|20)\d{2}', str(book.get('publication_year') or book.get('publication_date') or ''))
+    return int(match.group()) if match else 0
+
+
+def representative_rank(book: Dict) -> tuple:
+    """대표 도서 선택 기준: 도서관에서 바로 빌릴 수 있는 판본 > 최신 판본 > ISBN·목차 등 정보가 많은 판본"""
+    available = book.get('availability') == '대출가능'
+    in_library = 'sejong' in (book.get('sources') or []) or bool(book.get('call_number'))
+    filled = sum(1 for field in ('isbn', 'table_of_contents', 'description', 'image_url') if book.get(field))
+    return (available, in_library, publication_year(book), filled)
+
+
+class EditionGrouper:
+    """
+    LSH 밴드 버킷으로 유사 후보만 비교해 판본 묶음을 찾는 union-find.
+    후보 쌍은 저자가 모두 있고 같으며, 권차/편 표시가 같고, 한 제목이 다른 제목에 단어를 덧붙인 것이 아니며,
+    제목 shingle Jaccard 유사도가 threshold 이상일 때만 묶습니다.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self.buckets: Dict[Tuple[int, tuple], List[int]] = {}
+        self.signatures: List[Tuple[int, ...]] = []
+        self.features: List[set] = []
+        self.title_keys: List[str] = []
+        self.volumes: List[Tuple[str, ...]] = []
+        self.authors: List[str] = []
+        self.parent: List[int] = []
+
+    def _find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def _union(self, i: int, j: int):
+        root_i, root_j = self._find(i), self._find(j)
+        if root_i != root_j:
+            self.parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    def same_edition_group(self, index: int, other: int) -> bool:
+        # 저자를 모르면 같은 제목의 다른 책(예: 서로 다른 "자료구조" 교재)과 구별할 수 없으므로 묶지 않음
+        if not self.authors[index] or self.authors[index] != self.authors[other]:
+            return False
+        if self.volumes[index] != self.volumes[other]:
+            return False
+        left, right = self.title_keys[index], self.title_keys[other]
+        # "데이터베이스 시스템"과 "데이터베이스 시스템 설계"처럼 제목이 더 긴 쪽은 다른 책
+        if left != right and (left.startswith(right) or right.startswith(left)):
+            return False
+        return jaccard(self.features[index], self.features[other]) >= self.threshold
+
+    def add(self, title: Optional[str], author: Optional[str] = None) -> int:
+        index = len(self.signatures)
+        title_key = normalize_edition_title(title)
+        author_key = normalize_author(author)
+        features = shingles(title_key, author_key)
+        signature = minhash(features)
+        self.signatures.append(signature)
+        self.features.append(features)
+        self.title_keys.append(title_key)
+        self.volumes.append(volume_tokens(title))
+        self.authors.append(author_key)
+        self.parent.append(index)
+
+        compared = set()
+        for band in range(BANDS):
+            key = (band, signature[band * ROWS:(band + 1) * ROWS])
+            bucket = self.buckets.setdefault(key, [])
+            for other in bucket:
+                if other in compared:
+                    continue
+                compared.add(other)
+                if self.same_edition_group(index, other):
+                    self._union(index, other)
+            bucket.append(index)
+        return index
+
+    def groups(self) -> List[List[int]]:
+        """첫 등장 순서대로 묶음 목록"""
+        grouped: Dict[int, List[int]] = {}
+        for index in range(len(self.parent)):
+            grouped.setdefault(self._find(index), []).append(index)
+        return list(grouped.values())
+
+
+def collapse_editions(books: List[Dict], threshold: float = DEFAULT_THRESHOLD) -> List[Dict]:
+    """
+    판본·권차·eBook 변형을 묶어 묶음별 대표 도서만 반환 (묶음의 첫 등장 위치 유지).
+    제목이 없는 도서는 제외합니다.
+    """
+    books = [book for book in books if book.get('title')]
+    grouper = EditionGrouper(threshold)
+    for book in books:
+        grouper.add(book.get('title'), book.get('author'))
+
+    representatives = []
+    for group in grouper.groups():
+        best = max(group, key=lambda index: (representative_rank(books[index]), -index))
+        representatives.append(books[best])
+
+    merged = len(books) - len(representatives)
+    if merged:
+        print(f"판본 중복 제거: {len(books)}개 → {len(representatives)}개 ({merged}개 판본 병합)")
+    return representatives
+
+
+def main():
+    parser = argparse.ArgumentParser(description="판본 중복 제거 (MinHash + LSH)")
+    parser.add_argument("titles", nargs="*", help="묶음을 확인할 '제목 / 저자'들")
+    parser.add_argument("--benchmark", type=int, default=0, help="합성 도서 N개로 처리 시간 측정")
+    args = parser.parse_args()
+
+    if args.titles:
+        grouper = EditionGrouper()
+        for entry in args.titles:
+            title, _, author = entry.partition(' / ')
+            grouper.add(title, author)
+        for group in grouper.groups():
+            print(" | ".join(args.titles[index] for index in group))
+
+    if args.benchmark:
+        rng = random.Random(0)
+        variants = ['', ' (개정판)', ' [eBook]', ' 제3판', ' : 기초부터 실전까지']
+        words = ['자료구조', '운영체제', '데이터베이스', '네트워크', '알고리즘', '머신러닝', '선형대수', '확률', '통계',
+                 '파이썬', '자바', '웹', '보안', '클라우드', '컴파일러', '그래픽스', '딥러닝', '분산', '시스템', '설계']
+        books = []
+        for i in range(args.benchmark // 4):
+            base = ' '.join(rng.sample(words, 3)) + f' {rng.choice("가나다라마바사아자차카타파하")}{i}'
+            for _ in range(4):
+                books.append({'title': base + rng.choice(variants), 'author': f'저자{i} 지음',
+                              'publication_year': str(2000 + rng.randrange(25))})
+        start = time.perf_counter()
+        collapsed = collapse_editions(books)
+        elapsed = time.perf_counter() - start
+        print(f"{len(books):,}개 → {len(collapsed):,}개, {elapsed * 1000:.1f}ms ({elapsed / len(books) * 1e6:.1f}µs/도서)")
+
+
+if __name__ == "__main__":
+    main()
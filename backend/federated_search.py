@@ -0,0 +1,133 @@
+import asyncio
+from typing import List, Dict, Optional, Tuple
+
+from book_recommendation_api import DetailFetchTracker
+from book_utils import extract_isbn, normalize_title
+
+
+# 병합 시 어느 출처의 값을 우선할지 (알라딘: 서지/목차, 세종대: 소장 정보)
+ALADIN_FIELDS = ['title', 'author', 'publisher', 'price', 'image_url', 'product_url',
+                 'description', 'table_of_contents', 'publication_date']
+SEJONG_FIELDS = ['publication_year', 'location', 'availability', 'call_number',
+                 'subject_category', 'detail_url']
+
+
+class FederatedBookSearcher:
+    """알라딘과 세종대 학술정보원을 동시에 검색하고 ISBN 기준으로 병합"""
+
+    def __init__(self, sejong_crawler, aladin_crawler):
+        self.sejong_crawler = sejong_crawler
+        self.aladin_crawler = aladin_crawler
+
+    async def search_keyword(self, keyword: str, major_field: str,
+                             limit: int = 5) -> Tuple[Optional[List[Dict]], Optional[List[Dict]]]:
+        """
+        한 키워드로 두 출처를 동시에 검색 (알라딘은 검색 목록만, 상세 페이지는 enrich_aladin으로 따로 보강).
+        실패한 출처는 "결과 없음"과 구별되도록 None을 돌려줍니다.
+        """
+        sejong_result, aladin_result = await asyncio.gather(
+            self.sejong_crawler.search_books_by_keyword(keyword, limit=limit, raise_errors=True),
+            self.aladin_crawler.search_books_by_keyword(keyword, major_field, limit=limit, raise_errors=True),
+            return_exceptions=True
+        )
+
+        if isinstance(sejong_result, Exception):
+            print(f"'{keyword}' 세종대 검색 실패: {sejong_result}")
+            sejong_result = None
+        if isinstance(aladin_result, Exception):
+            print(f"'{keyword}' 알라딘 검색 실패: {aladin_result}")
+            aladin_result = None
+
+        return sejong_result, aladin_result
+
+    async def enrich_aladin(self, results: List[Tuple[List[Dict], List[Dict]]],
+                            details: Optional[DetailFetchTracker] = None) -> List[Tuple[List[Dict], List[Dict]]]:
+        """키워드별 알라딘 검색 목록에 상세 페이지(ISBN, 목차, 설명)를 제자리 보강 (details: 키워드 간 중복 요청 제거)"""
+        if details is None:
+            details = DetailFetchTracker()
+        aladin_books = [book for _, aladin_result in results for book in aladin_result or []]
+        await self.aladin_crawler.enrich_books(aladin_books, details)
+        print(details.report())
+        return results
+
+    def merge_results(self, keywords: List[str], results: List[Tuple[List[Dict], List[Dict]]]) -> List[Dict]:
+        """키워드별 (세종대, 알라딘) 검색 결과를 하나의 후보 집합으로 병합"""
+        sejong_books = []
+        aladin_books = []
+        for keyword, (sejong_result, aladin_result) in zip(keywords, results):
+            sejong_result, aladin_result = sejong_result or [], aladin_result or []
+            print(f"키워드 '{keyword}': 세종대 {len(sejong_result)}개, 알라딘 {len(aladin_result)}개 수집")
+            sejong_books.extend(sejong_result)
+            aladin_books.extend(aladin_result)
+
+        return self.merge_books(sejong_books, aladin_books)
+
+    def merge_books(self, sejong_books: List[Dict], aladin_books: List[Dict]) -> List[Dict]:
+        """ISBN이 같거나 (ISBN이 없으면) 정규화된 제목이 같은 도서를 하나로 병합"""
+        merged = []
+        by_isbn = {}
+        by_title = {}
+
+        def find_existing(book: Dict) -> Optional[Dict]:
+            isbn = book.get('isbn')
+            if isbn and isbn in by_isbn:
+                return by_isbn[isbn]
+            title_key = normalize_title(book.get('title'))
+            if title_key and title_key in by_title:
+                existing = by_title[title_key]
+                # ISBN이 서로 다르면 다른 판본으로 취급
+                if not (isbn and existing.get('isbn') and existing['isbn'] != isbn):
+                    return existing
+            return None
+
+        def register(record: Dict):
+            if record.get('isbn'):
+                by_isbn.setdefault(record['isbn'], record)
+            title_key = normalize_title(record.get('title'))
+            if title_key:
+                by_title.setdefault(title_key, record)
+
+        # 알라딘 결과를 먼저 등록 (ISBN, 목차, 설명 보유)
+        for book in aladin_books:
+            if not book.get('title'):
+                continue
+            book = dict(book)
+            if not book.get('isbn'):
+                book['isbn'] = extract_isbn(book.get('description'))
+            existing = find_existing(book)
+            if existing:
+                self._fill_missing(existing, book, ALADIN_FIELDS + ['isbn'])
+                continue
+            record = {field: book.get(field, '') for field in ALADIN_FIELDS + SEJONG_FIELDS + ['isbn']}
+            record['sources'] = ['aladin']
+            merged.append(record)
+            register(record)
+
+        # 세종대 결과는 기존 레코드에 소장 정보를 덧붙이거나 새 레코드로 추가
+        for book in sejong_books:
+            if not book.get('title'):
+                continue
+            existing = find_existing(book)
+            if existing:
+                for field in SEJONG_FIELDS:
+                    if book.get(field):
+                        existing[field] = book[field]
+                self._fill_missing(existing, book, ['author', 'publisher', 'isbn', 'description'])
+                if 'sejong' not in existing['sources']:
+                    existing['sources'].append('sejong')
+                register(existing)
+                continue
+            record = {field: book.get(field, '') for field in ALADIN_FIELDS + SEJONG_FIELDS + ['isbn']}
+            record['sources'] = ['sejong']
+            merged.append(record)
+            register(record)
+
+        both = sum(1 for record in merged if len(record['sources']) == 2)
+        print(f"통합 병합 완료: 알라딘 {len(aladin_books)}개 + 세종대 {len(sejong_books)}개 → {len(merged)}개 (양쪽 일치 {both}개)")
+        return merged
+
+    @staticmethod
+    def _fill_missing(target: Dict, source: Dict, fields: List[str]):
+        for field in fields:
+            if not target.get(field) and source.get(field):
+                target[field] = source[field]
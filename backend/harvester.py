@@ -0,0 +1,310 @@
+"""
+세종대 학술정보원 / 알라딘 대량 도서 수집기 (비동기, 스트리밍 저장, 중단 후 재개)
+
+사용법:
+    python harvester.py --keywords "자료구조,알고리즘,운영체제" --output books.jsonl
+    python harvester.py --keywords-file keywords.txt --sources sejong,aladin --output books.csv
+    python harvester.py --kdc-range 000-099 --sources sejong --output kdc.jsonl --enrich --per-query 1000
+
+검색어마다 결과 페이지를 넘기며 --per-query개까지 수집하고 (새 도서가 없는 페이지가 나오면 중단),
+중단(Ctrl+C)된 경우 같은 명령을 다시 실행하면 체크포인트에 기록된 완료 검색어는 건너뛰고,
+이미 저장된 도서는 출력 파일에서 다시 읽어 중복 저장하지 않습니다.
+검색 중 오류가 난 검색어는 체크포인트에 기록하지 않으므로 재실행 시 다시 수집합니다.
+
+KDC 분류기호는 기본적으로 일반 검색어(q=004)로 검색하므로 서명·주제어에 분류기호가 들어간 도서만 찾습니다.
+학술정보원의 청구기호 필드 검색 문법을 확인하면 --kdc-query-format으로 지정하세요 (예: "CALLNO:{kdc}*").
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import time
+from typing import Dict, Iterator, List, Optional, Set
+
+from book_utils import normalize_title
+
+CSV_FIELDS = [
+    'source', 'query', 'title', 'author', 'publisher', 'isbn', 'publication_year', 'publication_date',
+    'price', 'location', 'call_number', 'availability', 'subject_category', 'description',
+    'table_of_contents', 'image_url', 'product_url', 'detail_url'
+]
+
+
+def record_key(record: Dict) -> str:
+    """출처별 도서 식별 키 (상세 URL 우선, 없으면 ISBN/정규화 제목)"""
+    identity = (record.get('detail_url') or record.get('product_url') or record.get('isbn')
+                or normalize_title(record.get('title')))
+    return f"{record.get('source')}:{identity}"
+
+
+def parse_kdc_range(kdc_range: str, step: int = 1) -> List[str]:
+    """'000-099' 형태의 KDC 범위를 세 자리 분류기호 검색어 목록으로 변환"""
+    start, end = (int(part) for part in kdc_range.split('-', 1))
+    if not (0 <= start <= end <= 999):
+        raise ValueError(f"KDC 범위는 000-999 사이여야 합니다: {kdc_range}")
+    return [f"{number:03d}" for number in range(start, end + 1, step)]
+
+
+def read_records(path: str) -> Iterator[Dict]:
+    """수집 결과 파일(.jsonl 또는 .csv)의 레코드를 한 건씩 읽음"""
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        if path.lower().endswith('.csv'):
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+class RecordWriter:
+    """수집된 도서를 도착하는 즉시 JSONL 또는 CSV로 추가 저장"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.format = 'csv' if path.lower().endswith('.csv') else 'jsonl'
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        # 엑셀 호환 CSV (utf-8-sig는 이어쓰기 시 BOM을 다시 쓰지 않음)
+        encoding = 'utf-8-sig' if self.format == 'csv' else 'utf-8'
+        self._file = open(path, 'a', encoding=encoding, newline='')
+        self._csv = None
+        if self.format == 'csv':
+            self._csv = csv.DictWriter(self._file, fieldnames=CSV_FIELDS, extrasaction='ignore')
+            if is_new:
+                self._csv.writeheader()
+
+    @staticmethod
+    def load_seen_keys(path: str) -> Set[str]:
+        """재개 시 이미 저장된 도서 키를 출력 파일에서 복원"""
+        if not os.path.exists(path):
+            return set()
+        return {record_key(row) for row in read_records(path)}
+
+    def write(self, record: Dict):
+        if self._csv is not None:
+            self._csv.writerow(record)
+        else:
+            self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class Checkpoint:
+    """
+    완료된 (출처, 검색어) 단위를 한 줄씩 추가 기록해 중단 지점부터 재개.
+    단위마다 파일 전체를 다시 쓰지 않으며, 중단으로 잘린 마지막 줄은 읽을 때 무시합니다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.completed: Set[str] = set()
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                text = f.read()
+            if text.startswith('{"completed"'):
+                # 이전 형식(JSON 전체 저장)은 한 줄씩 기록하는 형식으로 변환
+                self.completed = set(json.loads(text).get('completed', []))
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.writelines(f"{unit}\n" for unit in sorted(self.completed))
+            else:
+                lines = text.split('\n')
+                # 마지막 원소는 줄바꿈 뒤의 빈 문자열이거나 잘린 줄
+                self.completed = {line for line in lines[:-1] if line}
+        self._file = open(path, 'a', encoding='utf-8')
+
+    @staticmethod
+    def unit_key(source: str, query: str) -> str:
+        return f"{source}:{query}"
+
+    def is_done(self, source: str, query: str) -> bool:
+        return self.unit_key(source, query) in self.completed
+
+    def mark_done(self, source: str, query: str):
+        unit = self.unit_key(source, query)
+        self.completed.add(unit)
+        self._file.write(f"{unit}\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class CatalogHarvester:
+    def __init__(self, sources: List[str], writer: RecordWriter, checkpoint: Checkpoint,
+                 per_query: int = 20, concurrency: int = 4, max_per_host: Optional[int] = None,
+                 enrich: bool = False, major_field: str = '', kdc_query_format: str = '{kdc}'):
+        self.sources = sources
+        self.writer = writer
+        self.checkpoint = checkpoint
+        self.per_query = per_query
+        self.concurrency = concurrency
+        self.enrich = enrich
+        self.major_field = major_field
+        self.kdc_query_format = kdc_query_format
+        self.seen = RecordWriter.load_seen_keys(writer.path)
+        self.stats = {'units': 0, 'skipped_units': 0, 'records': 0, 'duplicates': 0, 'failed_units': 0}
+
+        self.crawlers = {}
+        if 'sejong' in sources:
+            from sejong_library_api import crawler as sejong_crawler
+            self.crawlers['sejong'] = sejong_crawler
+        if 'aladin' in sources:
+            from book_recommendation_api import crawler as aladin_crawler
+            self.crawlers['aladin'] = aladin_crawler
+
+        # 예의 있는 수집: 호스트별 동시 요청 수 제한
+        if max_per_host:
+            for crawler in self.crawlers.values():
+                crawler.host_limit = asyncio.Semaphore(max_per_host)
+
+    async def fetch_page(self, source: str, query: str, page: int) -> List[Dict]:
+        """검색 결과 한 페이지 (검색 오류는 그대로 올려 이 단위를 완료로 기록하지 않음)"""
+        crawler = self.crawlers[source]
+        if source == 'sejong':
+            books = await crawler.search_page(query, page)
+            if self.enrich and books:
+                await crawler.enrich_books(books)
+        else:
+            books = await crawler.search_page(query, self.major_field, page)
+            if books:
+                await crawler.enrich_books(books)
+        return books
+
+    async def harvest_unit(self, source: str, query: str, search_query: Optional[str] = None):
+        """검색어 하나의 결과 페이지를 per_query개까지 넘기며 저장 (새 도서가 없는 페이지에서 중단)"""
+        found = written = 0
+        unit_keys: Set[str] = set()
+        page = 1
+        while found < self.per_query:
+            books = (await self.fetch_page(source, search_query or query, page))[:self.per_query - found]
+            if not books:
+                break
+            found += len(books)
+            page_keys = set()
+            for book in books:
+                record = dict(book, source=source, query=query)
+                key = record_key(record)
+                page_keys.add(key)
+                if key in self.seen:
+                    self.stats['duplicates'] += 1
+                    continue
+                self.seen.add(key)
+                self.writer.write(record)
+                written += 1
+            # 마지막 페이지를 넘기면 같은 페이지를 다시 주는 경우가 있어 이 검색어에서 새 도서가 없으면 중단
+            if page_keys <= unit_keys:
+                break
+            unit_keys |= page_keys
+            page += 1
+
+        self.stats['records'] += written
+        self.stats['units'] += 1
+        self.checkpoint.mark_done(source, query)
+        print(f"[{source}] '{query}': {page}페이지 {found}개 검색, {written}개 신규 저장 (누적 {self.stats['records']}개)")
+
+    async def run(self, queries: List[str], kdc_queries: Set[str] = frozenset()):
+        queue: asyncio.Queue = asyncio.Queue()
+        for query in queries:
+            for source in self.sources:
+                # KDC 분류기호 검색은 도서관 청구기호 기준이므로 세종대에만 적용
+                if query in kdc_queries and source != 'sejong':
+                    continue
+                if self.checkpoint.is_done(source, query):
+                    self.stats['skipped_units'] += 1
+                    continue
+                queue.put_nowait((source, query))
+
+        total = queue.qsize()
+        print(f"수집 대상 {total}개 (완료되어 건너뜀 {self.stats['skipped_units']}개), 동시 작업 {self.concurrency}개")
+
+        async def worker():
+            while True:
+                try:
+                    source, query = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    search_query = self.kdc_query_format.format(kdc=query) if query in kdc_queries else None
+                    await self.harvest_unit(source, query, search_query)
+                except Exception as e:
+                    # 실패한 단위는 체크포인트에 기록하지 않아 재실행 시 다시 시도
+                    self.stats['failed_units'] += 1
+                    print(f"[{source}] '{query}' 수집 실패: {e}")
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        return self.stats
+
+
+def load_queries(args) -> List[str]:
+    queries = []
+    if args.keywords:
+        queries.extend(keyword.strip() for keyword in args.keywords.split(','))
+    if args.keywords_file:
+        with open(args.keywords_file, encoding='utf-8') as f:
+            queries.extend(line.strip() for line in f)
+    return list(dict.fromkeys(query for query in queries if query))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="세종대/알라딘 대량 도서 수집기")
+    parser.add_argument("--keywords", help="쉼표로 구분한 검색어 목록")
+    parser.add_argument("--keywords-file", help="한 줄에 하나씩 검색어가 적힌 파일")
+    parser.add_argument("--kdc-range", help="KDC 분류기호 범위 (예: 000-099, 세종대만 해당)")
+    parser.add_argument("--kdc-step", type=int, default=1, help="KDC 범위 간격 (기본 1)")
+    parser.add_argument("--kdc-query-format", default="{kdc}",
+                        help="KDC 분류기호 검색어 형식 (기본 일반 검색어, 청구기호 필드 검색 문법을 확인하면 지정)")
+    parser.add_argument("--sources", default="sejong", help="sejong, aladin 중 쉼표로 선택 (기본 sejong)")
+    parser.add_argument("--output", required=True, help="출력 파일 (.jsonl 또는 .csv)")
+    parser.add_argument("--checkpoint", help="체크포인트 파일 (기본: <output>.checkpoint.json)")
+    parser.add_argument("--per-query", type=int, default=20, help="검색어당 최대 수집 도서 수 (결과 페이지를 넘기며 수집)")
+    parser.add_argument("--concurrency", type=int, default=4, help="동시에 처리할 검색어 수")
+    parser.add_argument("--max-per-host", type=int, help="호스트별 최대 동시 요청 수")
+    parser.add_argument("--enrich", action="store_true", help="세종대 상세 페이지(ISBN, 주제분류, 목차) 보강")
+    parser.add_argument("--major-field", default="", help="알라딘 전공 관련성 필터")
+    args = parser.parse_args()
+
+    sources = [source.strip() for source in args.sources.split(',') if source.strip()]
+    unknown = set(sources) - {'sejong', 'aladin'}
+    if unknown:
+        parser.error(f"지원하지 않는 출처: {', '.join(sorted(unknown))}")
+
+    queries = load_queries(args)
+    kdc_queries = set()
+    if args.kdc_range:
+        kdc_queries = set(parse_kdc_range(args.kdc_range, args.kdc_step))
+        queries.extend(sorted(kdc_queries - set(queries)))
+    if not queries:
+        parser.error("--keywords, --keywords-file, --kdc-range 중 하나 이상이 필요합니다.")
+
+    writer = RecordWriter(args.output)
+    checkpoint_path = args.checkpoint or f"{args.output}.checkpoint"
+    legacy_path = f"{args.output}.checkpoint.json"
+    if not args.checkpoint and not os.path.exists(checkpoint_path) and os.path.exists(legacy_path):
+        # 이전 버전의 체크포인트 (JSON 전체 저장)를 이어받음
+        os.replace(legacy_path, checkpoint_path)
+    checkpoint = Checkpoint(checkpoint_path)
+    harvester = CatalogHarvester(
+        sources, writer, checkpoint,
+        per_query=args.per_query,
+        concurrency=args.concurrency,
+        max_per_host=args.max_per_host,
+        enrich=args.enrich,
+        major_field=args.major_field,
+        kdc_query_format=args.kdc_query_format
+    )
+
+    started = time.time()
+    try:
+        stats = asyncio.run(harvester.run(queries, kdc_queries))
+        print(f"\n수집 완료: {stats} ({time.time() - started:.1f}초)")
+    except KeyboardInterrupt:
+        print(f"\n중단됨: {harvester.stats} - 같은 명령으로 다시 실행하면 이어서 수집합니다.")
+    finally:
+        writer.close()
+        checkpoint.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,6 @@ import requests
 from bs4 import BeautifulSoup
 import json
 import time
-import pandas as pd
 import re
 
 
@@ -211,6 +210,8 @@ class ImprovedBooksCrawler:
         크롤링된 책 정보를 CSV 파일로 저장합니다.
         """
         try:
+            import pandas as pd  # CSV 저장 시에만 필요한 선택 의존성
+
             df = pd.DataFrame(books)
             df.to_csv(filename, index=False, encoding='utf-8-sig')
             print(f"결과를 {filename}에 저장했습니다.")
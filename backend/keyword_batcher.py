@@ -0,0 +1,148 @@
+"""
+키워드 생성 LLM 호출 마이크로 배치
+
+수강신청 기간처럼 서로 다른 강의 제목이 동시에 몰리면 강의마다 chat completion을 한 번씩 호출해
+분당 요청 수(RPM) 한도에 걸립니다. 짧은 시간(기본 50ms) 동안 또는 N개(기본 8개)가 모일 때까지 요청을 모아
+여러 강의를 한 번에 묻는 JSON 형식 프롬프트로 보내고, 결과를 강의별로 나눠 기다리던 요청에 돌려줍니다.
+
+- 창 안에 강의가 하나뿐이면 배치하지 않고 None을 돌려주어 호출한 쪽이 기존 스트리밍 단일 호출을 사용합니다.
+- 배치 응답을 파싱하지 못했거나 일부 강의가 빠지면 해당 강의만 None (단일 호출로 대체).
+- KEYWORD_BATCH_WINDOW_MS=0 이면 배치를 끕니다.
+"""
+import asyncio
+import json
+import os
+import re
+from typing import Dict, List, Optional, Set
+
+from llm_scheduler import get_llm_scheduler
+from llm_usage import RequestUsage, current_request
+
+KEYWORDS_PER_TITLE = 10
+# 배치 결과를 믿고 쓸 최소 키워드 수 (이보다 적으면 단일 호출)
+MIN_KEYWORDS = 3
+JSON_OBJECT = re.compile(r'\{.*\}', re.DOTALL)
+
+
+def build_batch_prompt(titles: List[str]) -> str:
+    numbered = "\n".join(f'{i}. "{title}"' for i, title in enumerate(titles, 1))
+    return f"""
+    강의 목록:
+    {numbered}
+
+    각 강의와 관련성이 높은 도서 검색 키워드를 강의마다 {KEYWORDS_PER_TITLE}개씩 생성해주세요.
+    키워드는 구체적이고 실용적이어야 하며, 대학 도서관에서 검색할 만한 학술적인 키워드로 생성해주세요.
+
+    응답 형식 (강의 번호를 키로 하는 JSON 객체 하나만):
+    {{"1": ["키워드1", "키워드2", ...], "2": ["키워드1", ...]}}
+    """
+
+
+def parse_batch_response(content: str, titles: List[str]) -> Dict[str, List[str]]:
+    """강의 번호(또는 제목)를 키로 한 JSON에서 강의별 키워드 목록 추출 (형식이 틀리면 빈 dict)"""
+    match = JSON_OBJECT.search(content or '')
+    if not match:
+        return {}
+    try:
+        data = json.loads(match.group())
+    except json.JSONDecodeError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+
+    result = {}
+    for i, title in enumerate(titles, 1):
+        value = data.get(str(i), data.get(title))
+        if not isinstance(value, list):
+            continue
+        keywords = []
+        for keyword in value:
+            if isinstance(keyword, str) and keyword.strip() and keyword.strip() not in keywords:
+                keywords.append(keyword.strip())
+        if len(keywords) >= MIN_KEYWORDS:
+            result[title] = keywords[:KEYWORDS_PER_TITLE]
+    return result
+
+
+class KeywordBatcher:
+    def __init__(self, window_ms: float = 50, max_titles: int = 8):
+        self.window = window_ms / 1000
+        self.max_titles = max_titles
+        self._pending: Dict[str, List[asyncio.Future]] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # 실행 중인 배치 호출 (이벤트 루프는 약한 참조만 유지하므로 끝날 때까지 보관)
+        self._running: Set[asyncio.Task] = set()
+        self.stats = {'batches': 0, 'batched_titles': 0, 'fallbacks': 0}
+
+    async def submit(self, lecture_title: str) -> Optional[List[str]]:
+        """배치 결과 키워드 (혼자였거나 배치가 실패하면 None → 호출한 쪽이 단일 호출)"""
+        if self.window <= 0:
+            return None
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault(lecture_title, []).append(future)
+        if len(self._pending) >= self.max_titles:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        if len(batch) < 2:
+            self._resolve(batch, {})
+            return
+        task = asyncio.ensure_future(self._run(batch))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: Dict[str, List[asyncio.Future]]):
+        titles = list(batch)
+        result = {}
+        # 여러 요청이 함께 쓰는 호출이므로 처음 들어온 요청이 아닌 별도 항목으로 집계
+        current_request.set(RequestUsage('keyword_batch'))
+        try:
+            response = await get_llm_scheduler().chat_completion(
+                stage="keywords_batch",
+                model="gpt-3.5-turbo",
+                messages=[
+                    {"role": "system", "content": "당신은 교육 전문가이자 도서 추천 전문가입니다."},
+                    {"role": "user", "content": build_batch_prompt(titles)}
+                ],
+                max_tokens=200 * len(titles) + 100,
+                temperature=0.7
+            )
+            result = parse_batch_response(response.choices[0].message.content, titles)
+        except Exception as e:
+            print(f"키워드 배치 요청 실패: {e}")
+
+        missing = len(titles) - len(result)
+        self.stats['batches'] += 1
+        self.stats['batched_titles'] += len(result)
+        self.stats['fallbacks'] += missing
+        print(f"키워드 배치 요청: 강의 {len(titles)}개 → LLM 1회 (단일 호출로 대체 {missing}개)")
+        self._resolve(batch, result)
+
+    @staticmethod
+    def _resolve(batch: Dict[str, List[asyncio.Future]], result: Dict[str, List[str]]):
+        for title, futures in batch.items():
+            for future in futures:
+                # 기다리던 요청이 이미 취소되었으면 건너뜀
+                if not future.done():
+                    future.set_result(result.get(title))
+
+
+_batcher: Optional[KeywordBatcher] = None
+
+
+def get_keyword_batcher() -> KeywordBatcher:
+    global _batcher
+    if _batcher is None:
+        _batcher = KeywordBatcher(
+            window_ms=float(os.getenv("KEYWORD_BATCH_WINDOW_MS", "50")),
+            max_titles=int(os.getenv("KEYWORD_BATCH_MAX_TITLES", "8"))
+        )
+    return _batcher
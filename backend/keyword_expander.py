@@ -0,0 +1,311 @@
+"""
+오프라인 검색 키워드 확장기 (큐레이션 + 학습 시소러스)
+
+- 이전에 LLM이 생성한 강의 제목 → 키워드 결과를 기억해 같은 강의는 LLM 없이 바로 응답
+- 강의 제목 속 학술 용어를 관련 검색어로 확장 (큐레이션 사전 + 과거 LLM 결과 + 수집된 주제분류에서 학습)
+- 처음 보는 강의만 LLM을 호출하고, LLM이 실패하면 "입문/기초" 같은 일반어 대신 제목 기반 확장 결과 사용
+
+사용법:
+    python keyword_expander.py "자료구조및실습"                 # 확장 결과 확인
+    python keyword_expander.py --learn-harvest books.jsonl     # harvester 수집 결과의 주제분류 학습
+"""
+import argparse
+import json
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+from book_utils import normalize_title
+
+# 큐레이션 시소러스: 강의 제목에 자주 나오는 학술 용어 → 도서관 검색에 유효한 관련 검색어
+CURATED_THESAURUS: Dict[str, List[str]] = {
+    "자료구조": ["알고리즘", "연결리스트", "트리", "그래프", "해시 테이블", "정렬 알고리즘", "C언어 자료구조", "파이썬 자료구조"],
+    "알고리즘": ["자료구조", "알고리즘 설계", "동적 프로그래밍", "그래프 알고리즘", "탐색 알고리즘", "계산 복잡도", "코딩 테스트"],
+    "운영체제": ["프로세스 관리", "메모리 관리", "파일 시스템", "병행 프로그래밍", "리눅스 커널", "시스템 프로그래밍", "가상 메모리"],
+    "데이터베이스": ["SQL", "관계형 데이터베이스", "데이터 모델링", "트랜잭션", "정규화", "NoSQL", "데이터베이스 설계"],
+    "네트워크": ["TCP/IP", "컴퓨터 네트워킹", "네트워크 프로토콜", "소켓 프로그래밍", "라우팅", "네트워크 보안", "인터넷 구조"],
+    "컴퓨터구조": ["컴퓨터 아키텍처", "디지털 논리회로", "CPU 설계", "명령어 집합", "파이프라인", "캐시 메모리", "어셈블리어"],
+    "소프트웨어공학": ["요구사항 분석", "소프트웨어 설계", "UML", "디자인 패턴", "소프트웨어 테스팅", "애자일", "리팩터링"],
+    "인공지능": ["머신러닝", "딥러닝", "탐색 알고리즘", "지식 표현", "강화학습", "신경망", "자연어 처리"],
+    "머신러닝": ["기계학습", "딥러닝", "데이터 마이닝", "패턴 인식", "통계적 학습", "사이킷런", "회귀 분석"],
+    "딥러닝": ["신경망", "머신러닝", "텐서플로", "파이토치", "컴퓨터 비전", "자연어 처리", "합성곱 신경망"],
+    "데이터과학": ["데이터 분석", "파이썬 데이터 분석", "판다스", "데이터 시각화", "통계 분석", "빅데이터", "머신러닝"],
+    "빅데이터": ["하둡", "스파크", "데이터 엔지니어링", "분산 처리", "데이터 분석", "데이터 마이닝"],
+    "컴퓨터그래픽스": ["OpenGL", "렌더링", "3D 그래픽스", "셰이더 프로그래밍", "게임 그래픽스", "컴퓨터 비전"],
+    "컴퓨터비전": ["영상 처리", "OpenCV", "딥러닝", "패턴 인식", "이미지 인식", "합성곱 신경망"],
+    "정보보호": ["암호학", "네트워크 보안", "시스템 보안", "해킹", "보안 공학", "웹 보안"],
+    "보안": ["정보보호", "암호학", "네트워크 보안", "시스템 해킹", "웹 해킹", "보안 공학"],
+    "컴파일러": ["형식 언어", "오토마타", "구문 분석", "프로그래밍 언어론", "코드 최적화"],
+    "오토마타": ["형식 언어", "계산 이론", "튜링 기계", "컴파일러", "이산수학"],
+    "프로그래밍": ["C 프로그래밍", "파이썬 프로그래밍", "자바 프로그래밍", "객체지향 프로그래밍", "코딩 입문", "알고리즘"],
+    "객체지향": ["객체지향 프로그래밍", "자바", "C++", "디자인 패턴", "UML", "클린 코드"],
+    "파이썬": ["파이썬 프로그래밍", "파이썬 입문", "점프 투 파이썬", "파이썬 데이터 분석", "파이썬 알고리즘"],
+    "자바": ["자바 프로그래밍", "이것이 자바다", "객체지향 프로그래밍", "스프링", "자바의 정석"],
+    "C언어": ["C 프로그래밍", "C언어 입문", "포인터", "시스템 프로그래밍", "C언어 자료구조"],
+    "웹프로그래밍": ["HTML CSS", "자바스크립트", "웹 개발", "React", "Node.js", "백엔드 개발"],
+    "모바일프로그래밍": ["안드로이드 프로그래밍", "iOS 개발", "Flutter", "코틀린", "모바일 앱 개발"],
+    "이산수학": ["집합론", "그래프 이론", "조합론", "논리학", "수학적 귀납법", "오토마타"],
+    "선형대수": ["행렬", "벡터", "고유값", "선형대수학", "공학수학", "머신러닝 수학"],
+    "미적분": ["미분적분학", "해석학", "공학수학", "다변수 미적분", "미분방정식"],
+    "확률": ["확률론", "통계학", "확률과 통계", "수리통계학", "베이즈 통계"],
+    "통계": ["통계학", "확률과 통계", "회귀 분석", "R 통계", "데이터 분석", "실험 설계"],
+    "물리": ["일반물리학", "역학", "전자기학", "물리학 개론", "열역학"],
+    "화학": ["일반화학", "유기화학", "물리화학", "분석화학", "화학 개론"],
+    "회로": ["회로이론", "전기회로", "전자회로", "회로 해석", "아날로그 회로"],
+    "신호": ["신호 및 시스템", "디지털 신호처리", "푸리에 변환", "통신 이론", "제어 공학"],
+    "경영": ["경영학원론", "경영 전략", "조직 행동", "마케팅", "경영 관리"],
+    "마케팅": ["마케팅 원론", "소비자 행동", "브랜드 관리", "디지털 마케팅", "마케팅 전략"],
+    "회계": ["회계원리", "재무회계", "관리회계", "원가회계", "재무제표 분석"],
+    "재무": ["재무관리", "기업 재무", "투자론", "금융 시장", "재무제표 분석"],
+    "경제": ["경제학원론", "미시경제학", "거시경제학", "계량경제학", "경제 정책"],
+    "심리": ["심리학 개론", "인지 심리학", "사회 심리학", "발달 심리학", "상담 심리학"],
+    "디자인": ["시각 디자인", "UX 디자인", "UI 디자인", "타이포그래피", "디자인 씽킹"],
+    "호텔": ["호텔 경영", "관광 경영", "서비스 경영", "환대 산업", "외식 경영"],
+    "조리": ["조리 과학", "한식 조리", "서양 조리", "식품 위생", "외식 조리"],
+}
+
+# 강의 제목에 붙는 일반 접사 (알려진 강의인지 판단할 때 제외)
+GENERIC_TITLE_PARTS = [
+    "및", "실습", "설계", "개론", "입문", "기초", "응용", "특론", "세미나", "프로젝트", "이해", "원리",
+    "캡스톤", "영강", "이론", "실험", "1", "2", "3",
+]
+# 제목에서 알려진 용어가 차지해야 하는 비율 (그 미만이면 처음 보는 강의로 보고 LLM 사용)
+KNOWN_COVERAGE = 0.6
+SUBJECT_SPLIT = re.compile(r'[\s,;/>|·\-]+')
+# 학습 결과를 파일에 저장하는 최소 간격 (초, 남은 변경은 종료 시 flush)
+SAVE_INTERVAL = 30.0
+# 학습한 (용어, 관련어) 짝을 확장에 쓰기 위한 최소 관측 횟수 (한 강의에서 한 번 같이 나온 짝은 우연일 수 있음)
+MIN_PAIRINGS = 2
+
+
+class KeywordExpander:
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        # 학습은 스레드에서 실행되므로 시소러스 변경과 조회는 잠금 하에서만 (파일 입출력은 잠금 밖에서)
+        self._lock = threading.RLock()
+        # 같은 워커의 저장끼리 임시 파일이 겹치지 않도록
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        # 정규화된 강의 제목 → LLM이 생성했던 키워드
+        self.titles: Dict[str, List[str]] = {}
+        # 정규화된 용어 → {관련 검색어: 관측 횟수}
+        self.terms: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._load()
+        self._rebuild_index()
+
+    # 저장소
+    def _read_file(self) -> Dict:
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"키워드 시소러스 로드 실패: {e}")
+            return {}
+
+    def _merge(self, data: Dict):
+        for title_key, keywords in data.get('titles', {}).items():
+            self.titles.setdefault(title_key, keywords)
+        for term, related in data.get('terms', {}).items():
+            for keyword, count in related.items():
+                self.terms[term][keyword] = max(self.terms[term].get(keyword, 0), count)
+
+    def _load(self):
+        data = self._read_file()
+        with self._lock:
+            self._merge(data)
+
+    def save(self):
+        """다른 워커가 저장한 내용과 합친 뒤 원자적으로 교체"""
+        if not self.path:
+            return
+        with self._save_lock:
+            data = self._read_file()
+            with self._lock:
+                self._merge(data)
+                self._rebuild_index()
+                payload = json.dumps({'titles': self.titles, 'terms': self.terms, 'updated_at': time.time()},
+                                     ensure_ascii=False)
+                self._dirty = False
+                self._saved_at = time.monotonic()
+            try:
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(payload)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"키워드 시소러스 저장 실패: {e}")
+                self._dirty = True
+
+    def flush(self):
+        """저장 간격 때문에 미뤄 둔 학습 결과 저장 (종료 시)"""
+        if self._dirty:
+            self.save()
+
+    def _rebuild_index(self):
+        # 긴 용어부터 매칭 ("컴퓨터그래픽스"가 "그래픽스"보다 우선)
+        learned = {term for term, related in self.terms.items() if any(count >= MIN_PAIRINGS for count in related.values())}
+        vocabulary = {normalize_title(term) for term in CURATED_THESAURUS} | learned
+        self._vocabulary = sorted((term for term in vocabulary if len(term) >= 2), key=len, reverse=True)
+        self._curated = {normalize_title(term): related for term, related in CURATED_THESAURUS.items()}
+        # 큐레이션 사전의 원래 표기 (예: "c언어" → "C언어")
+        self._display = {normalize_title(term): term for term in CURATED_THESAURUS}
+
+    # 조회
+    def match_terms(self, lecture_title: str) -> List[str]:
+        """제목에 포함된 알려진 용어 (제목 내 등장 순서)"""
+        normalized = normalize_title(lecture_title)
+        matched = []
+        covered = [False] * len(normalized)
+        for term in self._vocabulary:
+            position = normalized.find(term)
+            if position < 0 or all(covered[position:position + len(term)]):
+                continue
+            matched.append((position, term))
+            for i in range(position, position + len(term)):
+                covered[i] = True
+        return [term for _, term in sorted(matched)]
+
+    def coverage(self, lecture_title: str, matched: List[str]) -> float:
+        """일반 접사를 뺀 제목 중 알려진 용어가 차지하는 비율"""
+        remainder = normalize_title(lecture_title)
+        for term in matched:
+            remainder = remainder.replace(term, '')
+        for part in GENERIC_TITLE_PARTS:
+            remainder = remainder.replace(part, '')
+        matched_length = sum(len(term) for term in matched)
+        if not matched_length:
+            return 0.0
+        return matched_length / (matched_length + len(remainder))
+
+    def related(self, term: str) -> List[str]:
+        """큐레이션 사전 → 학습된 관련어 (MIN_PAIRINGS번 이상 관측된 것만, 관측 횟수 순)"""
+        learned = sorted(
+            ((keyword, count) for keyword, count in self.terms.get(term, {}).items() if count >= MIN_PAIRINGS),
+            key=lambda item: item[1], reverse=True
+        )
+        return list(dict.fromkeys(self._curated.get(term, []) + [keyword for keyword, _ in learned]))
+
+    def _expand_terms(self, matched: List[str], limit: int) -> List[str]:
+        # 용어별 관련어를 번갈아 섞어 한 주제에 치우치지 않도록 함
+        original_terms = [self._display.get(term, term) for term in matched]
+        pools = [self.related(term) for term in matched]
+        keywords = list(original_terms)
+        depth = 0
+        while len(keywords) < limit and any(depth < len(pool) for pool in pools):
+            for pool in pools:
+                if depth < len(pool) and pool[depth] not in keywords:
+                    keywords.append(pool[depth])
+            depth += 1
+        return list(dict.fromkeys(keywords))[:limit]
+
+    def expand(self, lecture_title: str, limit: int = 10) -> Optional[List[str]]:
+        """알려진 강의면 키워드 목록, 처음 보는 강의면 None (LLM 사용)"""
+        with self._lock:
+            known = self.titles.get(normalize_title(lecture_title))
+            if known:
+                return known[:limit]
+
+            matched = self.match_terms(lecture_title)
+            if not matched or self.coverage(lecture_title, matched) < KNOWN_COVERAGE:
+                return None
+            return self._expand_terms(matched, limit)
+
+    def fallback(self, lecture_title: str, limit: int = 10) -> List[str]:
+        """LLM 실패 시: 제목 + 제목 속 용어의 관련어 (일반어 대신)"""
+        keywords = [lecture_title]
+        with self._lock:
+            matched = self.match_terms(lecture_title)
+            if matched:
+                keywords += self._expand_terms(matched, limit)
+        words = [word for word in re.split(r'[\s,/·()]+', lecture_title) if len(word) >= 2]
+        keywords += [word for word in words if word.lower() not in GENERIC_TITLE_PARTS]
+        return list(dict.fromkeys(keywords))[:limit]
+
+    # 학습
+    def learn(self, lecture_title: str, keywords: List[str], persist: bool = True):
+        """
+        LLM이 생성한 키워드를 강의 제목에 그대로 기억하고, 제목 속 용어와의 짝을 관측 (파일 저장은 SAVE_INTERVAL마다 한 번).
+        용어가 들어 있는 키워드는 바로 그 용어의 관련어가 되고, 나머지는 다른 강의에서도 같은 용어와 함께
+        나와 MIN_PAIRINGS번 관측된 뒤에만 확장에 쓰입니다. 알려진 용어가 없는 제목은 제목 기억만 남깁니다.
+        """
+        title_key = normalize_title(lecture_title)
+        if not title_key or not keywords:
+            return
+
+        with self._lock:
+            # 같은 강의를 같은 결과로 다시 학습하면 짝 관측을 중복 계산하지 않음
+            repeated = self.titles.get(title_key) == list(keywords)
+            self.titles[title_key] = list(keywords)
+            for term in [] if repeated else self.match_terms(lecture_title):
+                for keyword in keywords:
+                    keyword_key = normalize_title(keyword)
+                    if keyword_key == term:
+                        continue
+                    observed = MIN_PAIRINGS if term in keyword_key else 1
+                    self.terms[term][keyword] = self.terms[term].get(keyword, 0) + observed
+            self._rebuild_index()
+            self._dirty = True
+        if persist and time.monotonic() - self._saved_at >= SAVE_INTERVAL:
+            self.save()
+
+    def learn_from_records(self, records: Iterable[Dict]) -> int:
+        """수집된 도서의 (검색어, 주제분류)를 관련어로 학습 (harvester 출력)"""
+        learned = 0
+        with self._lock:
+            for record in records:
+                query = normalize_title(record.get('query'))
+                subject = record.get('subject_category') or ''
+                if not query or not subject:
+                    continue
+                for part in SUBJECT_SPLIT.split(subject):
+                    part = part.strip()
+                    # 분류기호(숫자)와 한 글자 항목은 제외
+                    if len(part) < 2 or re.fullmatch(r'[\d.]+', part) or normalize_title(part) == query:
+                        continue
+                    self.terms[query][part] = self.terms[query].get(part, 0) + 1
+                    learned += 1
+            self._rebuild_index()
+        self.save()
+        return learned
+
+
+_keyword_expander: Optional[KeywordExpander] = None
+
+
+def get_keyword_expander() -> KeywordExpander:
+    global _keyword_expander
+    if _keyword_expander is None:
+        _keyword_expander = KeywordExpander(os.getenv("KEYWORD_THESAURUS_PATH", "./keyword_thesaurus.json"))
+    return _keyword_expander
+
+
+def main():
+    parser = argparse.ArgumentParser(description="오프라인 검색 키워드 확장기")
+    parser.add_argument("lecture_title", nargs="?", help="확장할 강의 제목")
+    parser.add_argument("--learn-harvest", help="harvester 출력 파일(.jsonl/.csv)의 주제분류 학습")
+    args = parser.parse_args()
+
+    expander = get_keyword_expander()
+    if args.learn_harvest:
+        from harvester import read_records
+
+        learned = expander.learn_from_records(read_records(args.learn_harvest))
+        print(f"관련어 {learned}건 학습 → {expander.path}")
+    if args.lecture_title:
+        started = time.perf_counter()
+        keywords = expander.expand(args.lecture_title)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if keywords is None:
+            print(f"처음 보는 강의입니다 (LLM 필요). 대체 키워드: {expander.fallback(args.lecture_title)}")
+        else:
+            print(f"키워드 ({elapsed_ms:.3f}ms): {keywords}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+검색 키워드 수확량 기록 + 검색 계획
+
+키워드마다 (경로별로) 검색 횟수, 결과 수, 그 요청에서 처음 나온 고유 도서 수, AI 선정에 뽑힌 도서 수를 기록하고
+과거 기록으로 키워드의 예상 수확량(검색 1회당 새 고유 도서 수 + 선정 가산점)을 계산합니다.
+stream_keywords_and_search는 이 값으로
+- 여러 번 검색했는데도 새 도서를 거의 내지 못하고 선정된 적도 없는 키워드는 검색하지 않고 (prune)
+- 수확량이 낮은 키워드는 뒤로 미뤄 다른 키워드로 목표 개수를 채우지 못할 때만 검색하며 (defer)
+- 이미 시작한 검색의 예상 고유 도서 수가 후보 목표를 넘으면 키워드 생성을 일찍 멈춥니다.
+기록이 없는 키워드는 사전값(PRIOR_NEW_BOOKS)으로 예측하므로 처음에는 기존과 같이 모두 검색합니다.
+제외된 키워드도 EXPLORE_RATE 확률로 다시 검색하고, 검색 횟수가 DECAY_AFTER를 넘은 키워드는 기록을 절반으로 줄여
+결과가 달라진 키워드(새 책 출간, 검색 엔진 변경)가 영구히 제외되지 않게 합니다.
+
+여러 워커의 증가분은 파일 잠금(.lock) 안에서 파일 값에 더해 저장합니다 (KEYWORD_STATS_PATH, 기본 ./keyword_stats.json).
+
+사용법:
+    python keyword_yield.py --source aladin --top 20      # 수확량 상위/하위 키워드
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+from edition_dedup import normalize_author, normalize_edition_title
+
+try:
+    import fcntl
+except ImportError:  # Windows: 워커 간 잠금 없이 저장
+    fcntl = None
+
+STAT_FIELDS = ('searches', 'results', 'new_books', 'selected')
+# 기록이 없는 키워드의 예상 새 도서 수와 그 가중치 (검색 횟수 단위)
+PRIOR_NEW_BOOKS = 2.0
+PRIOR_WEIGHT = 1.0
+# AI 선정에 뽑힌 도서 1권의 가치 (새 도서 수 단위)
+SELECTED_WEIGHT = 2.0
+# 이만큼 검색한 뒤에도 예상 수확량이 PRUNE_BELOW 미만이고 선정된 적이 없으면 제외
+MIN_OBSERVATIONS = 3
+PRUNE_BELOW = 0.75
+DEFER_BELOW = 1.0
+# 제외 대상 키워드를 다시 검색해 볼 확률
+EXPLORE_RATE = 0.1
+# 검색 횟수가 이 값을 넘으면 저장할 때 모든 값을 절반으로 (오래된 기록의 비중 감소)
+DECAY_AFTER = 40
+SAVE_INTERVAL = 30.0
+
+
+def keyword_key(keyword: str) -> str:
+    return ' '.join(keyword.lower().split())
+
+
+def book_identity(book: Dict) -> str:
+    return f"{normalize_edition_title(book.get('title'))}:{normalize_author(book.get('author'))}"
+
+
+def attach_keywords(books: List[Dict], matches: Dict[str, List[str]]) -> List[Dict]:
+    """후보 도서 사본에 찾아 준 키워드(matched_keywords)를 표시 (캐시에 있는 원본은 그대로)"""
+    return [dict(book, matched_keywords=matches.get(book_identity(book), [])) for book in books]
+
+
+class KeywordYieldStats:
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._lock = threading.Lock()
+        # 경로 → 키워드 → {searches, results, new_books, selected}
+        self.stats: Dict[str, Dict[str, Dict[str, int]]] = defaultdict(dict)
+        # 마지막 저장 이후 증가분 (저장 시 파일 값에 더함)
+        self._pending: Dict[str, Dict[str, Dict[str, int]]] = defaultdict(dict)
+        self._saved_at = time.monotonic()
+        self._saving = False
+        self._random = random.Random()
+        self._load()
+
+    # 저장소
+    def _read_file(self) -> Dict:
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f).get('sources', {})
+        except (OSError, ValueError) as e:
+            print(f"키워드 수확량 기록 로드 실패: {e}")
+            return {}
+
+    def _load(self):
+        for source, keywords in self._read_file().items():
+            self.stats[source].update(keywords)
+
+    def _file_lock(self):
+        lock_file = open(f"{self.path}.lock", 'a')
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        return lock_file
+
+    def save(self):
+        """파일 잠금 안에서 다른 워커가 저장한 값에 이 워커의 증가분을 더해 원자적으로 교체"""
+        if not self.path:
+            return
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(dict)
+        try:
+            with self._file_lock():
+                merged = self._read_file()
+                for source, keywords in pending.items():
+                    for key, delta in keywords.items():
+                        entry = merged.setdefault(source, {}).setdefault(key, dict.fromkeys(STAT_FIELDS, 0))
+                        for field in STAT_FIELDS:
+                            entry[field] = entry.get(field, 0) + delta.get(field, 0)
+                        if entry['searches'] > DECAY_AFTER:
+                            for field in STAT_FIELDS:
+                                entry[field] = entry.get(field, 0) // 2
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump({'sources': merged, 'updated_at': time.time()}, f, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"키워드 수확량 기록 저장 실패: {e}")
+            # 저장하지 못한 증가분은 다음 저장에 다시 포함
+            with self._lock:
+                for source, keywords in pending.items():
+                    for key, delta in keywords.items():
+                        self._merge(self._pending, source, key, delta)
+            return
+        with self._lock:
+            # 파일 입출력 중에 들어온 증가분은 새 값 위에 다시 더함
+            stats = defaultdict(dict, merged)
+            for source, keywords in self._pending.items():
+                for key, delta in keywords.items():
+                    self._merge(stats, source, key, delta)
+            self.stats = stats
+            self._saved_at = time.monotonic()
+
+    def _maybe_save(self):
+        if self._saving or time.monotonic() - self._saved_at < SAVE_INTERVAL:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.save()
+            return
+        self._saving = True
+
+        def save():
+            try:
+                self.save()
+            finally:
+                self._saving = False
+
+        loop.run_in_executor(None, save)
+
+    @staticmethod
+    def _merge(target: Dict[str, Dict[str, Dict[str, int]]], source: str, key: str, deltas: Dict[str, int]):
+        entry = target[source].setdefault(key, dict.fromkeys(STAT_FIELDS, 0))
+        for field, delta in deltas.items():
+            entry[field] = entry.get(field, 0) + delta
+
+    def _add(self, source: str, keyword: str, **deltas: int):
+        key = keyword_key(keyword)
+        with self._lock:
+            for target in (self.stats, self._pending):
+                self._merge(target, source, key, deltas)
+
+    # 기록
+    def record_searches(self, source: str, keywords: List[str], results: List[List[Dict]],
+                        completed: Optional[List[bool]] = None) -> Dict[str, List[str]]:
+        """
+        한 요청의 키워드별 검색 결과 기록 (키워드 순서대로 앞에서 나오지 않은 고유 도서를 새 도서로 계산).
+        completed가 False인 검색(마감으로 취소되었거나 실패)은 빈 결과가 수확량을 깎지 않도록 기록하지 않습니다.
+        도서 식별자 → 그 도서를 찾은 키워드 목록을 반환 (attach_keywords로 후보에 표시).
+        """
+        if completed is None:
+            completed = [True] * len(keywords)
+        matches: Dict[str, List[str]] = {}
+        for keyword, books, done in zip(keywords, results, completed):
+            if not done:
+                continue
+            new_books = 0
+            for book in books or []:
+                found_by = matches.setdefault(book_identity(book), [])
+                if not found_by:
+                    new_books += 1
+                if keyword not in found_by:
+                    found_by.append(keyword)
+            self._add(source, keyword, searches=1, results=len(books or []), new_books=new_books)
+        self._maybe_save()
+        return matches
+
+    def record_selected(self, source: str, books: Iterable[Dict]):
+        """AI 선정 결과 도서를 찾아 준 키워드에 가산점"""
+        for book in books:
+            for keyword in book.get('matched_keywords') or []:
+                self._add(source, keyword, selected=1)
+        self._maybe_save()
+
+    # 예측
+    def get(self, source: str, keyword: str) -> Dict[str, int]:
+        return self.stats.get(source, {}).get(keyword_key(keyword)) or dict.fromkeys(STAT_FIELDS, 0)
+
+    def predicted_yield(self, source: str, keyword: str) -> float:
+        """검색 1회당 예상 가치 (새 고유 도서 수 + 선정 가산점, 기록이 적을수록 사전값 쪽)"""
+        entry = self.get(source, keyword)
+        weight = entry['searches'] + PRIOR_WEIGHT
+        return (entry['new_books'] + SELECTED_WEIGHT * entry['selected'] + PRIOR_NEW_BOOKS * PRIOR_WEIGHT) / weight
+
+    def classify(self, source: str, keyword: str) -> str:
+        """'search' (바로 검색) / 'defer' (다른 키워드가 모자랄 때만) / 'prune' (검색하지 않음, EXPLORE_RATE 확률로 다시 검색)"""
+        entry = self.get(source, keyword)
+        predicted = self.predicted_yield(source, keyword)
+        if entry['searches'] >= MIN_OBSERVATIONS and entry['selected'] == 0 and predicted < PRUNE_BELOW:
+            return 'search' if self._random.random() < EXPLORE_RATE else 'prune'
+        if predicted < DEFER_BELOW:
+            return 'defer'
+        return 'search'
+
+    def order(self, source: str, keywords: List[str]) -> List[str]:
+        """예상 수확량이 높은 순서 (같으면 원래 순서)"""
+        return sorted(keywords, key=lambda keyword: -self.predicted_yield(source, keyword))
+
+    def report(self, source: str, top: int = 20) -> List[Dict]:
+        rows = [
+            dict(keyword=key, predicted=round(self.predicted_yield(source, key), 2), **entry)
+            for key, entry in self.stats.get(source, {}).items()
+        ]
+        rows.sort(key=lambda row: row['predicted'], reverse=True)
+        return rows[:top] + (rows[-top:] if len(rows) > top * 2 else rows[top:])
+
+
+_stats: Optional[KeywordYieldStats] = None
+
+
+def get_keyword_stats() -> KeywordYieldStats:
+    global _stats
+    if _stats is None:
+        _stats = KeywordYieldStats(os.getenv("KEYWORD_STATS_PATH", "./keyword_stats.json"))
+    return _stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="검색 키워드 수확량 기록")
+    parser.add_argument("--source", default="aladin", help="sejong, aladin, federated")
+    parser.add_argument("--top", type=int, default=20, help="상위/하위 각각 출력할 키워드 수")
+    args = parser.parse_args()
+
+    stats = get_keyword_stats()
+    rows = stats.report(args.source, args.top)
+    if not rows:
+        print(f"'{args.source}' 경로의 기록이 없습니다 ({stats.path})")
+        return
+    print(f"{'keyword':<24} {'예상':>6} {'검색':>5} {'결과':>6} {'새 도서':>7} {'선정':>5}  판정")
+    for row in rows:
+        print(f"{row['keyword']:<24} {row['predicted']:>6} {row['searches']:>5} {row['results']:>6} "
+              f"{row['new_books']:>7} {row['selected']:>5}  {stats.classify(args.source, row['keyword'])}")
+
+
+if __name__ == "__main__":
+    main()
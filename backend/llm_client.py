@@ -0,0 +1,170 @@
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+from typing import AsyncIterator, Optional
+
+from dotenv import load_dotenv
+
+# "1. 키워드" / "2) 키워드" 형태의 번호 목록 줄
+NUMBERED_LINE = re.compile(r'^\s*\d+\s*[.)]\s*(.+?)\s*$')
+
+_env_loaded = False
+_openai_client = None
+
+
+def load_env():
+    """.env 파일은 프로세스당 한 번만 로드"""
+    global _env_loaded
+    if not _env_loaded:
+        load_dotenv()
+        _env_loaded = True
+
+
+def get_openai_client():
+    """OpenAI SDK 클라이언트는 첫 호출 시 생성 (임포트 시간 단축)"""
+    global _openai_client
+    if _openai_client is None:
+        from openai import OpenAI
+
+        load_env()
+        # 429 재시도는 llm_scheduler가 Retry-After와 모델별 예산을 보고 처리
+        _openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY", "your-api-key-here"), max_retries=0)
+    return _openai_client
+
+
+def parse_numbered_line(line: str) -> Optional[str]:
+    """번호 목록 한 줄에서 항목만 추출 (번호 줄이 아니면 None)"""
+    match = NUMBERED_LINE.match(line)
+    return match.group(1) if match else None
+
+
+class JSONArrayStreamParser:
+    """
+    LLM이 생성 중인 JSON 배열을 조각 단위로 받아, 최상위 배열의 객체가 닫히는 즉시 하나씩 돌려주는 파서.
+    배열 앞의 설명이나 ```json 같은 코드 펜스는 무시하고, JSON으로 읽을 수 없는 객체는 건너뛰고(skipped) 다음 객체를 계속 파싱합니다.
+    """
+
+    def __init__(self):
+        self.started = False
+        self.finished = False
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self._current: list = []
+        self.skipped = 0
+
+    def feed(self, text: str) -> list:
+        objects = []
+        for char in text:
+            if self.finished:
+                break
+            if not self.started:
+                if char == '[':
+                    self.started = True
+                continue
+            if self.depth > 0:
+                self._current.append(char)
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == '\\':
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+                continue
+            if char == '"':
+                self.in_string = True
+            elif char in '{[':
+                if self.depth == 0:
+                    self._current = [char]
+                self.depth += 1
+            elif char in '}]':
+                if self.depth == 0:
+                    # 최상위 배열 닫힘
+                    self.finished = True
+                    continue
+                self.depth -= 1
+                if self.depth == 0:
+                    raw = ''.join(self._current)
+                    self._current = []
+                    try:
+                        objects.append(json.loads(raw))
+                    except json.JSONDecodeError as e:
+                        self.skipped += 1
+                        print(f"스트리밍 JSON 객체 파싱 실패, 건너뜀: {e} ({raw[:80]})")
+        return objects
+
+
+async def stream_chat_lines(priority: Optional[int] = None, stage: str = 'other',
+                            **create_kwargs) -> AsyncIterator[str]:
+    """
+    chat completion을 스트리밍으로 받아 완성된 줄부터 바로 전달.
+    동기 SDK 스트림은 스레드에서 읽고, 소비자가 중간에 멈추면 연결을 닫아 남은 토큰 생성을 중단합니다.
+    요청은 llm_scheduler의 모델별 예산 안에서 시작하며, 첫 줄 전에 429를 받으면 Retry-After 후 다시 요청합니다.
+    """
+    from llm_scheduler import MAX_RETRIES, estimate_tokens, get_llm_scheduler, record_usage, retry_after_seconds
+
+    scheduler = get_llm_scheduler()
+    model = create_kwargs.get('model', '')
+    tokens = estimate_tokens(create_kwargs.get('messages'), create_kwargs.get('max_tokens'))
+    loop = asyncio.get_running_loop()
+    done = object()
+
+    for attempt in range(MAX_RETRIES + 1):
+        await scheduler.acquire(model, tokens, priority)
+        queue: asyncio.Queue = asyncio.Queue()
+        stopped = threading.Event()
+
+        def put(item, queue=queue):
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+
+        def read_stream(put=put, stopped=stopped):
+            try:
+                stream = get_openai_client().chat.completions.create(stream=True, **create_kwargs)
+                buffer = ''
+                try:
+                    for chunk in stream:
+                        if stopped.is_set():
+                            return
+                        delta = chunk.choices[0].delta.content if chunk.choices else None
+                        if not delta:
+                            continue
+                        *lines, buffer = (buffer + delta).split('\n')
+                        for line in lines:
+                            put(line)
+                finally:
+                    stream.response.close()
+                if buffer:
+                    put(buffer)
+                put(done)
+            except Exception as e:
+                put(e)
+
+        reader = asyncio.ensure_future(asyncio.to_thread(read_stream))
+        started = time.perf_counter()
+        received = []
+        yielded = False
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    return
+                if isinstance(item, Exception):
+                    if getattr(item, 'status_code', None) == 429 and not yielded and attempt < MAX_RETRIES:
+                        response = getattr(item, 'response', None)
+                        scheduler.rate_limited(model, retry_after_seconds(getattr(response, 'headers', None)))
+                        break
+                    raise item
+                yielded = True
+                received.append(item)
+                yield item
+        finally:
+            stopped.set()
+            reader.add_done_callback(lambda f: f.cancelled() or f.exception())
+            if yielded:
+                # 스트리밍은 usage가 없으므로 받은 글자 수로 추정 기록
+                record_usage(model, stage, create_kwargs.get('messages'), '\n'.join(received), None,
+                             time.perf_counter() - started)
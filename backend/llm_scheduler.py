@@ -0,0 +1,340 @@
+"""
+OpenAI 호출 스케줄러 (모델별 RPM/TPM 예산 + 우선순위 큐 + Retry-After)
+
+main.py(httpx 직접 호출)와 두 크롤러(SDK 호출)의 OpenAI 요청이 모두 이 스케줄러를 거칩니다.
+- 모델마다 최근 60초 요청 수/토큰 수를 추적해 한도 안에서만 요청을 내보내고, 나머지는 우선순위 큐에서 대기
+- 우선순위: 사용자 요청(INTERACTIVE) > 배치(BATCH) > 미리 계산(PREFETCH)
+- 429 응답을 받으면 Retry-After 동안 해당 모델 요청을 멈추고 다시 시도 (SDK 자체 재시도는 끔)
+- 모델별 대기열 길이 등은 metrics()로 확인 (GET /api/v1/llm-scheduler)
+- 호출마다 토큰/지연/비용을 llm_usage에 기록 (stage: 키워드 생성, 후보 선정 등)
+
+한도는 OPENAI_RATE_LIMITS="gpt-4o-mini=500:200000,gpt-3.5-turbo=3500:160000" 처럼 모델=RPM:TPM 으로 지정합니다.
+"""
+import asyncio
+import contextvars
+import heapq
+import itertools
+import json
+import os
+import time
+from collections import deque
+from typing import AsyncIterator, Dict, Optional
+
+from llm_usage import get_usage_tracker
+
+INTERACTIVE = 0
+BATCH = 1
+PREFETCH = 2
+PRIORITY_NAMES = {INTERACTIVE: 'interactive', BATCH: 'batch', PREFETCH: 'prefetch'}
+
+# 모델=(RPM, TPM) 기본값 (계정 등급에 맞춰 OPENAI_RATE_LIMITS로 조정)
+DEFAULT_LIMITS = {
+    'gpt-4o-mini': (500, 200000),
+    'gpt-3.5-turbo': (3500, 160000),
+    'gpt-3.5-turbo-16k': (3500, 180000),
+}
+FALLBACK_LIMIT = (500, 60000)
+WINDOW_SECONDS = 60.0
+MAX_RETRIES = 3
+# Retry-After 헤더가 없을 때 기본 대기 시간
+DEFAULT_RETRY_AFTER = 2.0
+
+# 호출한 쪽 컨텍스트의 기본 우선순위 (배치 작업은 시작 시 BATCH/PREFETCH로 설정)
+current_priority: contextvars.ContextVar[int] = contextvars.ContextVar('llm_priority', default=INTERACTIVE)
+
+
+def parse_rate_limits(value: str) -> Dict[str, tuple]:
+    limits = dict(DEFAULT_LIMITS)
+    for item in value.split(','):
+        if '=' not in item:
+            continue
+        model, budget = item.split('=', 1)
+        rpm, _, tpm = budget.partition(':')
+        limits[model.strip()] = (int(rpm), int(tpm or FALLBACK_LIMIT[1]))
+    return limits
+
+
+def estimate_tokens(messages, max_tokens: Optional[int]) -> int:
+    """프롬프트 토큰 추정 (한글 기준 약 2자당 1토큰) + 응답 최대 토큰을 예약"""
+    chars = sum(len(str(message.get('content', ''))) for message in messages or [])
+    return chars // 2 + (256 if max_tokens is None else max_tokens)
+
+
+def retry_after_seconds(headers) -> float:
+    try:
+        return max(0.0, float((headers or {}).get('retry-after')))
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER
+
+
+class ModelBudget:
+    def __init__(self, model: str, rpm: int, tpm: int):
+        self.model = model
+        self.rpm = rpm
+        self.tpm = tpm
+        self.window: deque = deque()  # [보낸 시각, 토큰] 목록
+        self.window_tokens = 0
+        self.queue: list = []  # (우선순위, 순번, future, 토큰)
+        self.blocked_until = 0.0
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.stats = {'sent': 0, 'rate_limited': 0, 'wait_seconds': 0.0}
+
+    def trim(self, now: float):
+        while self.window and now - self.window[0][0] >= WINDOW_SECONDS:
+            self.window_tokens -= self.window.popleft()[1]
+
+    def wait_time(self, now: float, tokens: int) -> float:
+        """지금 tokens 만큼 보내려면 기다려야 하는 시간 (0이면 바로 가능)"""
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        waits = [0.0]
+        if len(self.window) >= self.rpm:
+            waits.append(self.window[len(self.window) - self.rpm][0] + WINDOW_SECONDS - now)
+        # 한 요청이 TPM보다 크면 창이 비었을 때만 보냄
+        needed = min(tokens, self.tpm)
+        if self.window_tokens + needed > self.tpm:
+            freed = self.window_tokens
+            for sent_at, sent_tokens in self.window:
+                freed -= sent_tokens
+                if freed + needed <= self.tpm:
+                    waits.append(sent_at + WINDOW_SECONDS - now)
+                    break
+        return max(waits)
+
+    def record(self, now: float, tokens: int) -> list:
+        entry = [now, tokens]
+        self.window.append(entry)
+        self.window_tokens += tokens
+        self.stats['sent'] += 1
+        return entry
+
+    def settle(self, entry: list, actual_tokens: int):
+        """응답의 실제 사용량으로 예약 토큰 보정"""
+        if self.window and entry[0] >= self.window[0][0]:
+            self.window_tokens += actual_tokens - entry[1]
+            entry[1] = actual_tokens
+
+
+class LLMScheduler:
+    def __init__(self, limits: Optional[Dict[str, tuple]] = None):
+        self.limits = limits or dict(DEFAULT_LIMITS)
+        self._budgets: Dict[str, ModelBudget] = {}
+        self._sequence = itertools.count()
+
+    def budget(self, model: str) -> ModelBudget:
+        budget = self._budgets.get(model)
+        if budget is None:
+            rpm, tpm = self.limits.get(model, FALLBACK_LIMIT)
+            budget = self._budgets[model] = ModelBudget(model, rpm, tpm)
+        return budget
+
+    async def acquire(self, model: str, tokens: int, priority: Optional[int] = None) -> list:
+        """예산이 허락할 때까지 우선순위 순서로 대기 (반환값은 settle용 기록)"""
+        budget = self.budget(model)
+        priority = current_priority.get() if priority is None else priority
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(budget.queue, (priority, next(self._sequence), future, tokens))
+        started = time.monotonic()
+        self._pump(budget)
+        try:
+            entry = await future
+        finally:
+            # 취소된 대기자는 큐에서 빼고 다음 대기자 진행
+            if future.cancelled():
+                self._pump(budget)
+        budget.stats['wait_seconds'] += time.monotonic() - started
+        return entry
+
+    def _pump(self, budget: ModelBudget):
+        if budget.timer is not None:
+            budget.timer.cancel()
+            budget.timer = None
+        now = time.monotonic()
+        budget.trim(now)
+        while budget.queue:
+            priority, _, future, tokens = budget.queue[0]
+            if future.done():
+                heapq.heappop(budget.queue)
+                continue
+            wait = budget.wait_time(now, tokens)
+            if wait > 0:
+                budget.timer = asyncio.get_running_loop().call_later(wait, self._pump, budget)
+                return
+            heapq.heappop(budget.queue)
+            future.set_result(budget.record(now, tokens))
+
+    def rate_limited(self, model: str, retry_after: float):
+        """429 응답: Retry-After 동안 이 모델의 모든 요청을 멈춤"""
+        budget = self.budget(model)
+        budget.stats['rate_limited'] += 1
+        budget.blocked_until = max(budget.blocked_until, time.monotonic() + retry_after)
+        print(f"OpenAI 요청 한도 초과 ({model}): {retry_after:.1f}초 후 재시도, 대기 {len(budget.queue)}건")
+
+    def settle(self, model: str, entry: list, usage) -> None:
+        total = getattr(usage, 'total_tokens', None) if usage is not None else None
+        if total is None and isinstance(usage, dict):
+            total = usage.get('total_tokens')
+        if total:
+            self.budget(model).settle(entry, total)
+
+    def metrics(self) -> Dict:
+        now = time.monotonic()
+        result = {}
+        for model, budget in self._budgets.items():
+            budget.trim(now)
+            waiting = [item for item in budget.queue if not item[2].done()]
+            result[model] = {
+                'queue_depth': len(waiting),
+                'queue_by_priority': {
+                    name: sum(1 for item in waiting if item[0] == priority)
+                    for priority, name in PRIORITY_NAMES.items()
+                },
+                'requests_last_minute': len(budget.window),
+                'tokens_last_minute': budget.window_tokens,
+                'rpm_limit': budget.rpm,
+                'tpm_limit': budget.tpm,
+                'blocked_for_seconds': round(max(0.0, budget.blocked_until - now), 1),
+                'sent': budget.stats['sent'],
+                'rate_limited': budget.stats['rate_limited'],
+                'total_wait_seconds': round(budget.stats['wait_seconds'], 2),
+            }
+        return result
+
+    async def chat_completion(self, priority: Optional[int] = None, stage: str = 'other', **create_kwargs):
+        """SDK chat completion (비스트리밍)을 예산 안에서 실행, 429면 Retry-After 후 재시도"""
+        from llm_client import get_openai_client
+
+        model = create_kwargs.get('model', '')
+        messages = create_kwargs.get('messages')
+        tokens = estimate_tokens(messages, create_kwargs.get('max_tokens'))
+        for attempt in range(MAX_RETRIES + 1):
+            entry = await self.acquire(model, tokens, priority)
+            started = time.perf_counter()
+            call = asyncio.ensure_future(asyncio.to_thread(get_openai_client().chat.completions.create, **create_kwargs))
+            try:
+                response = await asyncio.shield(call)
+            except asyncio.CancelledError:
+                # 스레드에서 진행 중인 SDK 호출은 중단할 수 없으므로 끝나면 예산 정산과 사용량 기록만
+                call.add_done_callback(
+                    lambda task: self._settle_abandoned(model, entry, stage, messages, task, started)
+                )
+                raise
+            except Exception as e:
+                if getattr(e, 'status_code', None) != 429 or attempt == MAX_RETRIES:
+                    raise
+                self.rate_limited(model, retry_after_seconds(getattr(getattr(e, 'response', None), 'headers', None)))
+                continue
+            usage = getattr(response, 'usage', None)
+            self.settle(model, entry, usage)
+            content = response.choices[0].message.content if response.choices else ''
+            record_usage(model, stage, messages, content, usage, time.perf_counter() - started)
+            return response
+
+    def _settle_abandoned(self, model: str, entry: list, stage: str, messages, task: asyncio.Future,
+                          started: float):
+        if task.cancelled() or task.exception() is not None:
+            return
+        response = task.result()
+        usage = getattr(response, 'usage', None)
+        self.settle(model, entry, usage)
+        content = response.choices[0].message.content if response.choices else ''
+        record_usage(model, f"{stage}:abandoned", messages, content, usage, time.perf_counter() - started)
+
+    async def post(self, client, url: str, priority: Optional[int] = None, stage: str = 'other', **kwargs):
+        """httpx로 chat completions 직접 호출 (마지막 시도까지 429면 그 응답을 그대로 반환)"""
+        payload = kwargs.get('json') or {}
+        model = payload.get('model', '')
+        tokens = estimate_tokens(payload.get('messages'), payload.get('max_tokens'))
+        for attempt in range(MAX_RETRIES + 1):
+            entry = await self.acquire(model, tokens, priority)
+            started = time.perf_counter()
+            response = await client.post(url, **kwargs)
+            if response.status_code != 429 or attempt == MAX_RETRIES:
+                if response.status_code == 200:
+                    data = response.json()
+                    self.settle(model, entry, data.get('usage'))
+                    choices = data.get('choices') or [{}]
+                    record_usage(model, stage, payload.get('messages'), choices[0].get('message', {}).get('content'),
+                                 data.get('usage'), time.perf_counter() - started)
+                return response
+            self.rate_limited(model, retry_after_seconds(response.headers))
+
+    async def stream_post(self, client, url: str, priority: Optional[int] = None, stage: str = 'other',
+                          **kwargs) -> AsyncIterator[str]:
+        """
+        httpx로 chat completions를 stream=True로 호출해 내용 조각(delta)을 순서대로 전달.
+        첫 조각 전에 429를 받으면 Retry-After 후 다시 요청하고, 그 외 상태 코드는 LLMStatusError.
+        """
+        payload = kwargs.get('json') or {}
+        model = payload.get('model', '')
+        tokens = estimate_tokens(payload.get('messages'), payload.get('max_tokens'))
+        for attempt in range(MAX_RETRIES + 1):
+            entry = await self.acquire(model, tokens, priority)
+            started = time.perf_counter()
+            async with client.stream('POST', url, **kwargs) as response:
+                if response.status_code == 429 and attempt < MAX_RETRIES:
+                    self.rate_limited(model, retry_after_seconds(response.headers))
+                    continue
+                if response.status_code != 200:
+                    body = (await response.aread()).decode('utf-8', 'replace')
+                    try:
+                        message = json.loads(body)['error']['message']
+                    except (ValueError, KeyError, TypeError):
+                        message = body[:200]
+                    raise LLMStatusError(response.status_code, message)
+
+                received = []
+                usage = None
+                try:
+                    async for line in response.aiter_lines():
+                        if not line.startswith('data:'):
+                            continue
+                        data = line[5:].strip()
+                        if data == '[DONE]':
+                            break
+                        chunk = json.loads(data)
+                        usage = chunk.get('usage') or usage
+                        for choice in chunk.get('choices') or []:
+                            delta = (choice.get('delta') or {}).get('content')
+                            if delta:
+                                received.append(delta)
+                                yield delta
+                finally:
+                    if usage:
+                        self.settle(model, entry, usage)
+                    if received or usage:
+                        record_usage(model, stage, payload.get('messages'), ''.join(received), usage,
+                                     time.perf_counter() - started)
+                return
+
+
+class LLMStatusError(Exception):
+    """스트리밍 호출이 200이 아닌 상태 코드로 끝났을 때 (재시도 후에도 남은 429 포함)"""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def record_usage(model: str, stage: str, messages, completion: Optional[str], usage, elapsed: float):
+    """응답의 usage로 토큰/비용 기록 (usage가 없으면 글자 수로 추정)"""
+    if isinstance(usage, dict):
+        prompt_tokens, completion_tokens = usage.get('prompt_tokens'), usage.get('completion_tokens')
+    else:
+        prompt_tokens = getattr(usage, 'prompt_tokens', None)
+        completion_tokens = getattr(usage, 'completion_tokens', None)
+    estimated = prompt_tokens is None or completion_tokens is None
+    if estimated:
+        prompt_tokens = estimate_tokens(messages, 0) if prompt_tokens is None else prompt_tokens
+        completion_tokens = len(completion or '') // 2 if completion_tokens is None else completion_tokens
+    get_usage_tracker().record(model, stage, prompt_tokens, completion_tokens, elapsed * 1000, estimated)
+
+
+_scheduler: Optional[LLMScheduler] = None
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = LLMScheduler(parse_rate_limits(os.getenv("OPENAI_RATE_LIMITS", "")))
+    return _scheduler
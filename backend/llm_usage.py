@@ -0,0 +1,190 @@
+"""
+LLM 토큰 / 비용 집계 (요청 id · 엔드포인트 · 단계별)
+
+모든 chat completion은 llm_scheduler를 거치며, 호출이 끝날 때마다 모델, 프롬프트/응답 토큰, 지연 시간, 추정 비용을 기록합니다.
+- 엔드포인트와 요청 id는 LLMUsageMiddleware가 요청마다 컨텍스트에 설정 (X-Request-Id 헤더가 있으면 그 값 사용)
+- 단계: keywords(키워드 생성) / keywords_batch(여러 요청 묶음 키워드) / selection(후보 중 AI 선정) /
+  direct_recommendation(LLM이 직접 추천) / api_key_test
+  (클라이언트 연결이 끊겨 결과를 버린 호출은 단계 이름 뒤에 ':abandoned')
+- 응답에는 X-Request-Id, X-LLM-Usage 헤더로 해당 요청의 사용량이 붙습니다 (본문을 바꾸지 않아 ETag 유지).
+- 누적 집계는 GET /api/v1/admin/llm-usage
+
+스트리밍 응답은 사용량(usage)이 오지 않으므로 글자 수로 추정하고 estimated로 표시합니다.
+"""
+import contextvars
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional
+
+# 1K 토큰당 USD (프롬프트, 응답)
+MODEL_PRICES = {
+    'gpt-4o-mini': (0.00015, 0.0006),
+    'gpt-3.5-turbo': (0.0005, 0.0015),
+    'gpt-3.5-turbo-16k': (0.003, 0.004),
+}
+DEFAULT_PRICE = (0.0005, 0.0015)
+RECENT_RECORDS = 1000
+RECENT_REQUESTS = 500
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    prompt_price, completion_price = MODEL_PRICES.get(model, DEFAULT_PRICE)
+    return prompt_tokens / 1000 * prompt_price + completion_tokens / 1000 * completion_price
+
+
+class RequestUsage:
+    """요청 하나의 LLM 호출 기록"""
+
+    def __init__(self, endpoint: str, request_id: Optional[str] = None):
+        self.endpoint = endpoint
+        self.request_id = request_id or uuid.uuid4().hex[:16]
+        self.records: List[Dict] = []
+
+    def summary(self) -> Dict:
+        return {
+            'request_id': self.request_id,
+            'endpoint': self.endpoint,
+            'calls': len(self.records),
+            'prompt_tokens': sum(record['prompt_tokens'] for record in self.records),
+            'completion_tokens': sum(record['completion_tokens'] for record in self.records),
+            'cost_usd': round(sum(record['cost_usd'] for record in self.records), 6),
+            'latency_ms': round(sum(record['latency_ms'] for record in self.records), 1),
+        }
+
+    def header_value(self) -> str:
+        summary = self.summary()
+        return (f"calls={summary['calls']}; prompt_tokens={summary['prompt_tokens']}; "
+                f"completion_tokens={summary['completion_tokens']}; cost_usd={summary['cost_usd']:.6f}")
+
+
+current_request: contextvars.ContextVar[Optional[RequestUsage]] = contextvars.ContextVar(
+    'llm_request_usage', default=None
+)
+
+
+class UsageTracker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.totals: Dict[tuple, Dict] = {}
+        self.recent: deque = deque(maxlen=RECENT_RECORDS)
+        self.requests: OrderedDict = OrderedDict()
+
+    def record(self, model: str, stage: str, prompt_tokens: int, completion_tokens: int,
+               latency_ms: float, estimated: bool = False) -> Dict:
+        request = current_request.get()
+        record = {
+            'time': time.time(),
+            'request_id': request.request_id if request else None,
+            'endpoint': request.endpoint if request else 'background',
+            'stage': stage,
+            'model': model,
+            'prompt_tokens': int(prompt_tokens),
+            'completion_tokens': int(completion_tokens),
+            'latency_ms': round(latency_ms, 1),
+            'cost_usd': estimate_cost(model, prompt_tokens, completion_tokens),
+            'estimated': estimated,
+        }
+        with self._lock:
+            key = (record['endpoint'], stage, model)
+            total = self.totals.setdefault(key, {
+                'calls': 0, 'prompt_tokens': 0, 'completion_tokens': 0, 'cost_usd': 0.0,
+                'latency_ms': 0.0, 'estimated_calls': 0,
+            })
+            total['calls'] += 1
+            total['prompt_tokens'] += record['prompt_tokens']
+            total['completion_tokens'] += record['completion_tokens']
+            total['cost_usd'] += record['cost_usd']
+            total['latency_ms'] += record['latency_ms']
+            total['estimated_calls'] += int(estimated)
+            self.recent.append(record)
+            if request is not None:
+                if request.request_id not in self.requests:
+                    self.requests[request.request_id] = request
+                    while len(self.requests) > RECENT_REQUESTS:
+                        self.requests.popitem(last=False)
+        if request is not None:
+            request.records.append(record)
+        return record
+
+    def report(self, top: int = 10) -> Dict:
+        with self._lock:
+            rows = [
+                dict(endpoint=endpoint, stage=stage, model=model, **total,
+                     avg_latency_ms=round(total['latency_ms'] / total['calls'], 1))
+                for (endpoint, stage, model), total in self.totals.items()
+            ]
+            requests = [request.summary() for request in self.requests.values()]
+        for row in rows:
+            row['cost_usd'] = round(row['cost_usd'], 6)
+            row['latency_ms'] = round(row['latency_ms'], 1)
+        rows.sort(key=lambda row: row['cost_usd'], reverse=True)
+
+        by_stage: Dict[str, Dict] = {}
+        for row in rows:
+            stage = by_stage.setdefault(row['stage'], {'calls': 0, 'tokens': 0, 'cost_usd': 0.0})
+            stage['calls'] += row['calls']
+            stage['tokens'] += row['prompt_tokens'] + row['completion_tokens']
+            stage['cost_usd'] = round(stage['cost_usd'] + row['cost_usd'], 6)
+
+        return {
+            'since': self.started_at,
+            'total_cost_usd': round(sum(row['cost_usd'] for row in rows), 6),
+            'total_calls': sum(row['calls'] for row in rows),
+            'by_stage': by_stage,
+            'by_endpoint_stage_model': rows,
+            'most_expensive_requests': sorted(requests, key=lambda r: r['cost_usd'], reverse=True)[:top],
+        }
+
+    def request_records(self, request_id: str) -> Optional[Dict]:
+        with self._lock:
+            request = self.requests.get(request_id)
+        if request is None:
+            return None
+        return dict(request.summary(), records=list(request.records))
+
+
+_tracker: Optional[UsageTracker] = None
+
+
+def get_usage_tracker() -> UsageTracker:
+    global _tracker
+    if _tracker is None:
+        _tracker = UsageTracker()
+    return _tracker
+
+
+class LLMUsageMiddleware:
+    """요청마다 LLM 사용량 컨텍스트를 만들고 응답 헤더에 요청 id와 사용량을 붙이는 ASGI 미들웨어"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get('headers', []):
+            if name == b'x-request-id':
+                request_id = value.decode('latin-1')[:64]
+                break
+        usage = RequestUsage(scope.get('path', ''), request_id)
+        token = current_request.set(usage)
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                headers = list(message.get('headers', []))
+                headers.append((b'x-request-id', usage.request_id.encode('latin-1')))
+                if usage.records:
+                    headers.append((b'x-llm-usage', usage.header_value().encode('latin-1')))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request.reset(token)
@@ -0,0 +1,435 @@
+"""
+추천 API 부하 테스트 (업스트림 스텁 사용)
+
+세종대/알라딘 HTML과 OpenAI 응답을 지연 시간을 흉내 낸 스텁으로 대체하고,
+test_api.py와 비슷한 강의/관심 기술/난이도 조합을 세 추천 엔드포인트에 섞어 보내며
+동시 사용자 수를 늘려가면서 처리량(rps), p50/p95/p99 지연, 오류율을 측정합니다.
+
+사용법:
+    python load_test.py                                        # 앱을 프로세스 안에서 직접 호출
+    python load_test.py --concurrency 1,10,25,50 --duration 30 --report load_report.json
+    python load_test.py --compare load_report.json             # 이전 버전 보고서와 비교
+    python load_test.py --serve --port 8100                    # 스텁 서버 실행 (다른 터미널에서 --url 로 측정)
+    python load_test.py --url http://localhost:8100
+"""
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import io
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Tuple
+
+ENDPOINTS = {
+    "aladin": "/recommend-books",
+    "sejong": "/api/v1/sejong-book-recommendations",
+    "federated": "/api/v1/federated-book-recommendations",
+}
+
+# test_api.py 형태의 요청 조합
+LECTURES = [
+    ("머신러닝과 딥러닝 기초", "컴퓨터과학, 인공지능, 데이터사이언스"),
+    ("자료구조및실습", "컴퓨터공학"),
+    ("운영체제", "컴퓨터공학, 시스템 소프트웨어"),
+    ("데이터베이스 설계", "소프트웨어, 정보시스템"),
+    ("컴퓨터네트워크", "정보통신공학"),
+    ("웹프로그래밍", "소프트웨어"),
+    ("선형대수", "수학, 데이터사이언스"),
+    ("마케팅 원론", "경영학"),
+    ("호텔경영의 이해", "호텔관광경영"),
+    ("창의적 사고와 글쓰기", "교양"),
+]
+INTERESTS = [
+    "파이썬, 텐서플로우, 신경망, 자연어처리",
+    "C언어, 포인터, 알고리즘",
+    "리눅스, 시스템 프로그래밍",
+    "SQL, 데이터 모델링",
+    "React, 자바스크립트",
+    "통계, 데이터 분석",
+]
+DIFFICULTIES = ["초급자", "중급", "고급"]
+
+
+# 업스트림 스텁
+def _number(*parts) -> int:
+    return int(hashlib.md5(":".join(str(part) for part in parts).encode("utf-8")).hexdigest()[:8], 16)
+
+
+class StubResponse:
+    def __init__(self, text: str, status_code: int = 200):
+        self.text = text
+        self.content = text.encode("utf-8")
+        self.encoding = "utf-8"
+        self.headers = {"content-type": "text/html; charset=utf-8"}
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+    def iter_content(self, chunk_size: int):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+
+def sejong_search_html(query: str, count: int = 10, page_size: Optional[int] = None) -> str:
+    """OR 묶음 질의("A OR (B C)")는 키워드별 결과를 번갈아 한 페이지(page_size개)에"""
+    keywords = [part.strip().strip("()") for part in query.split(" OR ")]
+    hits = [(keyword, i) for i in range(count) for keyword in keywords]
+    items = []
+    for keyword, i in hits[:page_size]:
+        cid = _number("sejong", keyword, i) % 10_000_000
+        items.append(f"""
+<li><dl class="bookList">
+  <dt><a class="title" href="#" onclick="goDetail({cid})">{keyword} 완벽 가이드 {i + 1}</a></dt>
+  <dd><div class="body">{keyword} 완벽 가이드 / 홍길동{i}. 한빛아카데미, {2015 + i % 10}</div></dd>
+  <dd><p class="tag"><a href="#">중앙도서관 {i % 5 + 1}층</a> [005.{i} 홍{i}] {'대출가능' if i % 3 else '대출중'}</p></dd>
+</dl></li>""")
+    return f'<html><body><ul class="listType01">{"".join(items)}</ul></body></html>'
+
+
+def sejong_detail_html(cid: str) -> str:
+    isbn = f"979{_number('isbn', cid) % 10_000_000_000:010d}"
+    chapters = " ".join(f"{n}장 핵심 개념 {n}" for n in range(1, 21))
+    return f"""<html><body><table>
+<tr><th>ISBN</th><td>{isbn}</td></tr>
+<tr><th>주제분류</th><td>005.1 컴퓨터 프로그래밍</td></tr>
+<tr><th>목차</th><td>{chapters}</td></tr>
+<tr><th>요약</th><td>이 책은 기초부터 실전까지 단계별로 설명합니다. {'설명 ' * 40}</td></tr>
+</table></body></html>"""
+
+
+def aladin_search_html(keyword: str, count: int = 10) -> str:
+    items = []
+    for i in range(count):
+        item_id = _number("aladin", keyword, i) % 400_000_000
+        items.append(f"""
+<div class="ss_book_box"><table><tr>
+  <td><img src="//image.aladin.co.kr/product/{item_id % 1000}/{item_id}cover.jpg"></td>
+  <td><a class="bo3" href="/shop/wproduct.aspx?ItemId={item_id}">{keyword} 실전 입문 {i + 1}</a>
+  <br>김철수{i} (지은이) | 길벗 | {2016 + i % 9}년 {i % 12 + 1}월
+  <br><span class="ss_p2">{20 + i},000원</span></td>
+</tr></table></div>""")
+    return f'<html><body>{"".join(items)}</body></html>'
+
+
+def aladin_detail_html(item_id: str) -> str:
+    isbn = f"979{_number('aladin-isbn', item_id) % 10_000_000_000:010d}"
+    chapters = " ".join(f"Chapter {n}. 실습 {n}" for n in range(1, 26))
+    return f"""<html><body>
+<ul><li class="Ere_sub2_title">길벗 | 2023-0{int(item_id) % 9 + 1}-15</li></ul>
+<div class="Ere_prod_mconts_R">책소개 이 책은 개념과 실습을 함께 다룹니다. {'소개 ' * 60} ISBN : {isbn}</div>
+<div class="Ere_prod_mconts_LS">목차 {chapters}</div>
+</body></html>"""
+
+
+class StubUpstreams:
+    """크롤러의 HTTP 요청(_get)과 OpenAI 클라이언트를 지연 시간이 있는 스텁으로 교체"""
+
+    def __init__(self, http_latency: float, llm_latency: float):
+        self.http_latency = http_latency
+        self.llm_latency = llm_latency
+        self.counts = {"http": 0, "llm": 0}
+
+    def install(self):
+        import llm_client
+        from main import get_aladin_crawler, get_sejong_crawler
+
+        llm_client._openai_client = SimpleNamespace(
+            chat=SimpleNamespace(completions=SimpleNamespace(create=self.create_completion))
+        )
+        for crawler in (get_sejong_crawler(), get_aladin_crawler()):
+            crawler._get = self.make_get(crawler)
+
+    def make_get(self, crawler):
+        async def _get(url: str, params: Optional[Dict] = None, **kwargs) -> StubResponse:
+            # 실제 _get과 같이 호스트별 동시 요청 제한을 지킴
+            async with crawler.host_limit:
+                await asyncio.sleep(self.http_latency * random.uniform(0.5, 1.5))
+            self.counts["http"] += 1
+            response = StubResponse(self.render(url, params or {}))
+            # 스트리밍 파싱 요청은 실제 _get과 같이 consume(response) 결과를 반환
+            consume = kwargs.get("consume")
+            return consume(response) if consume else response
+        return _get
+
+    @staticmethod
+    def render(url: str, params: Dict) -> str:
+        if "Search.Result.ax" in url:
+            return sejong_search_html(params.get("q", ""), page_size=int(params.get("rows", 10)))
+        if "DetailView.ax" in url:
+            return sejong_detail_html(url.rsplit("cid=", 1)[-1])
+        if "wsearchresult.aspx" in url:
+            return aladin_search_html(params.get("SearchWord", ""))
+        if "ItemId=" in url:
+            return aladin_detail_html(url.rsplit("ItemId=", 1)[-1])
+        return "<html><body></body></html>"
+
+    def create_completion(self, messages=None, stream: bool = False, **kwargs):
+        """동기 SDK와 같이 스레드에서 블로킹 (스트리밍은 줄 단위로 나눠 지연)"""
+        self.counts["llm"] += 1
+        prompt = messages[-1]["content"] if messages else ""
+
+        if stream:
+            match = re.search(r'강의 제목: "(.+?)"', prompt)
+            title = match.group(1) if match else "강의"
+            suffixes = ["개론", "입문", "실습", "원리", "응용", "알고리즘", "설계", "프로그래밍", "이론", "사례"]
+            lines = [f"{n}. {title} {suffix}\n" for n, suffix in enumerate(suffixes, 1)]
+            return StubStream(lines, self.llm_latency)
+
+        time.sleep(self.llm_latency)
+        if "강의 목록:" in prompt:
+            titles = re.findall(r'^\s*(\d+)\. "(.+?)"$', prompt, re.MULTILINE)
+            content = json.dumps({n: [f"{title} {suffix}" for suffix in ["개론", "입문", "실습", "원리", "응용"]]
+                                  for n, title in titles}, ensure_ascii=False)
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+        content = json.dumps({"selected_books": [1, 2, 3, 4, 5], "analysis_reason": "부하 테스트용 선정 결과"},
+                             ensure_ascii=False)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+class StubStream:
+    def __init__(self, lines: List[str], latency: float):
+        self.lines = lines
+        self.latency = latency
+        self.response = SimpleNamespace(close=lambda: None)
+
+    def __iter__(self):
+        for line in self.lines:
+            time.sleep(self.latency / len(self.lines))
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=line))])
+
+
+# 부하 생성 / 집계
+class RequestMix:
+    def __init__(self, endpoints: List[str], unique_ratio: float, tier: Optional[str], seed: int):
+        self.endpoints = endpoints
+        self.unique_ratio = unique_ratio
+        self.tier = tier
+        self.random = random.Random(seed)
+        self.counter = 0
+
+    def next(self) -> Tuple[str, Dict]:
+        lecture_title, major_field = self.random.choice(LECTURES)
+        body = {
+            "lecture_title": lecture_title,
+            "major_field": major_field,
+            "interest_technology": self.random.choice(INTERESTS),
+            "learning_difficulty": self.random.choice(DIFFICULTIES),
+        }
+        # 일부 요청은 관심 기술을 바꿔 추천 캐시를 피함 (강의별 검색 캐시는 공유)
+        if self.random.random() < self.unique_ratio:
+            self.counter += 1
+            body["interest_technology"] += f", 주제{self.counter}"
+        if self.tier:
+            body["tier"] = self.tier
+        return self.random.choice(self.endpoints), body
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(samples: List[Tuple[str, float, int]], elapsed: float) -> Dict:
+    latencies = sorted(latency * 1000 for _, latency, _ in samples)
+    errors = sum(1 for _, _, status in samples if not 200 <= status < 400)
+    return {
+        "requests": len(samples),
+        "rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+    }
+
+
+async def run_level(client, base_url: str, mix: RequestMix, concurrency: int, duration: float,
+                    timeout: float) -> Dict:
+    samples: List[Tuple[str, float, int]] = []
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            endpoint, body = mix.next()
+            started = time.perf_counter()
+            try:
+                response = await client.post(base_url + ENDPOINTS[endpoint], json=body, timeout=timeout)
+                status = response.status_code
+            except Exception:
+                status = 0
+            samples.append((endpoint, time.perf_counter() - started, status))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 2),
+        "overall": summarize(samples, elapsed),
+        "endpoints": {
+            endpoint: summarize([sample for sample in samples if sample[0] == endpoint], elapsed)
+            for endpoint in mix.endpoints
+        },
+    }
+
+
+def print_level(level: Dict):
+    def row(name: str, stats: Dict) -> str:
+        return (f"  {name:<10} {stats['requests']:>6} {stats['rps']:>8.2f} {stats['p50_ms']:>9.1f} "
+                f"{stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f} {stats['error_rate'] * 100:>7.2f}%")
+
+    print(f"\n동시 사용자 {level['concurrency']}명 ({level['elapsed_s']}초)")
+    print(f"  {'endpoint':<10} {'reqs':>6} {'rps':>8} {'p50(ms)':>9} {'p95(ms)':>9} {'p99(ms)':>9} {'err%':>8}")
+    print(row("total", level["overall"]))
+    for endpoint, stats in level["endpoints"].items():
+        print(row(endpoint, stats))
+
+
+def compare_reports(baseline: Dict, current: Dict):
+    print(f"\n=== 비교: {baseline.get('revision')} ({baseline.get('timestamp')}) → {current['revision']} ===")
+    previous = {level["concurrency"]: level["overall"] for level in baseline.get("levels", [])}
+    for level in current["levels"]:
+        before = previous.get(level["concurrency"])
+        if not before:
+            continue
+        after = level["overall"]
+
+        def delta(key: str) -> str:
+            if not before[key]:
+                return "   n/a"
+            return f"{(after[key] - before[key]) / before[key] * 100:+6.1f}%"
+
+        print(f"  동시 {level['concurrency']:>3}명: rps {before['rps']:.2f} → {after['rps']:.2f} ({delta('rps')}), "
+              f"p95 {before['p95_ms']:.0f} → {after['p95_ms']:.0f}ms ({delta('p95_ms')}), "
+              f"오류율 {before['error_rate'] * 100:.2f}% → {after['error_rate'] * 100:.2f}%")
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def prepare_environment():
+    """측정이 로컬 상태에 영향을 받지 않도록 워커별 메모리 캐시와 임시 시소러스 사용"""
+    os.environ.setdefault("CACHE_BACKEND_URL", "memory://")
+    os.environ.setdefault("KEYWORD_THESAURUS_PATH", os.path.join(tempfile.mkdtemp(), "keyword_thesaurus.json"))
+    os.environ.setdefault("KEYWORD_STATS_PATH", os.path.join(tempfile.mkdtemp(), "keyword_stats.json"))
+    os.environ.setdefault("OPENAI_API_KEY", "load-test")
+
+
+async def run(args) -> Dict:
+    import httpx
+
+    endpoints = [endpoint.strip() for endpoint in args.endpoints.split(",") if endpoint.strip()]
+    levels = [int(level) for level in args.concurrency.split(",")]
+    mix = RequestMix(endpoints, args.unique_ratio, args.tier, args.seed)
+
+    if args.url:
+        client = httpx.AsyncClient(limits=httpx.Limits(max_connections=max(levels)))
+        base_url = args.url.rstrip("/")
+        stubs = None
+    else:
+        prepare_environment()
+        import main
+
+        stubs = StubUpstreams(args.http_latency_ms / 1000, args.llm_latency_ms / 1000)
+        stubs.install()
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app))
+        base_url = "http://loadtest"
+
+    results = []
+    async with client:
+        for concurrency in levels:
+            # 앱 로그는 측정 중 숨김 (--verbose 로 표시)
+            output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+            with output:
+                level = await run_level(client, base_url, mix, concurrency, args.duration, args.timeout)
+            print_level(level)
+            results.append(level)
+
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "python": sys.version.split()[0],
+        "target": args.url or "in-process",
+        "settings": {
+            "endpoints": endpoints,
+            "duration_s": args.duration,
+            "unique_ratio": args.unique_ratio,
+            "tier": args.tier,
+            "http_latency_ms": None if args.url else args.http_latency_ms,
+            "llm_latency_ms": None if args.url else args.llm_latency_ms,
+            "seed": args.seed,
+        },
+        "upstream_calls": stubs.counts if stubs else None,
+        "levels": results,
+    }
+
+
+def serve(args):
+    import uvicorn
+
+    prepare_environment()
+    import main
+
+    StubUpstreams(args.http_latency_ms / 1000, args.llm_latency_ms / 1000).install()
+    uvicorn.run(main.app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="추천 API 부하 테스트 (업스트림 스텁)")
+    parser.add_argument("--concurrency", default="1,5,10,25,50", help="쉼표로 구분한 동시 사용자 수 단계")
+    parser.add_argument("--duration", type=float, default=20, help="단계별 측정 시간(초)")
+    parser.add_argument("--endpoints", default="aladin,sejong,federated", help="aladin, sejong, federated 중 선택")
+    parser.add_argument("--unique-ratio", type=float, default=0.5, help="추천 캐시를 피하는 요청 비율 (0~1)")
+    parser.add_argument("--tier", choices=["fast", "balanced", "thorough"], help="요청에 지정할 응답 시간 등급")
+    parser.add_argument("--http-latency-ms", type=float, default=80, help="스텁 HTML 응답 평균 지연")
+    parser.add_argument("--llm-latency-ms", type=float, default=800, help="스텁 OpenAI 응답 지연")
+    parser.add_argument("--timeout", type=float, default=300, help="요청 타임아웃(초)")
+    parser.add_argument("--seed", type=int, default=42, help="요청 조합 난수 시드")
+    parser.add_argument("--url", help="이미 실행 중인 서버 주소 (--serve 로 띄운 스텁 서버)")
+    parser.add_argument("--serve", action="store_true", help="업스트림 스텁을 적용한 서버 실행")
+    parser.add_argument("--port", type=int, default=8100, help="--serve 포트")
+    parser.add_argument("--report", help="결과를 저장할 JSON 파일")
+    parser.add_argument("--compare", help="비교할 이전 보고서 JSON 파일")
+    parser.add_argument("--verbose", action="store_true", help="측정 중 앱 로그 표시")
+    args = parser.parse_args()
+
+    unknown = {endpoint.strip() for endpoint in args.endpoints.split(",")} - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"지원하지 않는 엔드포인트: {', '.join(sorted(unknown))}")
+
+    if args.serve:
+        serve(args)
+        return
+
+    report = asyncio.run(run(args))
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare_reports(json.load(f), report)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n보고서를 {args.report}에 저장했습니다.")
+
+
+if __name__ == "__main__":
+    main()
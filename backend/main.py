@@ -1,16 +1,101 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Optional
-import httpx
+import asyncio
+import contextlib
+import hashlib
 import json
 import os
-from dotenv import load_dotenv
+import sys
+from contextlib import asynccontextmanager
+from typing import Awaitable, Dict, List, Optional
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel
+
+from llm_client import JSONArrayStreamParser, load_env
+from llm_usage import LLMUsageMiddleware, get_usage_tracker
+from response_utils import CompressionMiddleware, FastJSONResponse, dumps, etag_for, if_none_match, json_response
+# 요청/응답 모델만 먼저 import (크롤러 모듈은 첫 요청 시 로드)
+from schemas import (
+    SejongBookRecommendationRequest,
+    SejongBookRecommendationResponse,
+    SejongBookInfo,
+    BookRecommendationRequest as AladinRequest,
+    BookRecommendationResponse as AladinResponse,
+    BookInfo as AladinBookInfo,
+    FederatedBookInfo,
+    FederatedBookRecommendationResponse
+)
 
 # 환경 변수 로드
-load_dotenv()
+load_env()
+
+# OpenAI API 설정
+OPENAI_API_URL = "https://api.openai.com/v1/chat/completions"
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+
+RECOMMENDATION_CACHE_TTL = int(os.getenv("RECOMMENDATION_CACHE_TTL", "3600"))
+# 지름길(마감에 걸린 검색, 로컬 순위 등)을 택한 응답은 짧게만 공유 (0이면 저장하지 않음)
+RECOMMENDATION_SHORTCUT_CACHE_TTL = int(os.getenv("RECOMMENDATION_SHORTCUT_CACHE_TTL", "60"))
+# 추천 작업 중 클라이언트 연결 끊김 확인 간격 (초)
+DISCONNECT_POLL_SECONDS = float(os.getenv("DISCONNECT_POLL_SECONDS", "0.5"))
+
+# 크롤러 지연 로딩 (임포트 시간 단축 - 세종대/알라딘 모듈, bs4, requests는 첫 사용 시 로드)
+# 추천 파이프라인·캐시·강의 목록·판본 병합·키워드 기록 모듈도 같은 이유로 사용하는 함수 안에서 import
+def get_sejong_crawler():
+    from sejong_library_api import crawler
+    return crawler
+
+def get_aladin_crawler():
+    from book_recommendation_api import crawler
+    return crawler
+
+_federated_searcher = None
+
+def get_federated_searcher():
+    global _federated_searcher
+    if _federated_searcher is None:
+        from federated_search import FederatedBookSearcher
+        _federated_searcher = FederatedBookSearcher(get_sejong_crawler(), get_aladin_crawler())
+    return _federated_searcher
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # PRELOAD_CRAWLERS=1 이면 첫 요청 대신 워커 시작 시 크롤러를 준비
+    if os.getenv("PRELOAD_CRAWLERS", "0") == "1":
+        get_federated_searcher()
+    yield
+    # 종료 시 생성된 HTTP 세션 정리
+    for module_name in ("sejong_library_api", "book_recommendation_api"):
+        module = sys.modules.get(module_name)
+        if module is not None:
+            module.crawler.close()
+    page_parser_module = sys.modules.get("page_parser")
+    if page_parser_module is not None:
+        page_parser_module.close_parse_pool()
+    cover_proxy_module = sys.modules.get("cover_proxy")
+    if cover_proxy_module is not None and cover_proxy_module._cover_proxy is not None:
+        await cover_proxy_module._cover_proxy.close()
+    # 아직 저장하지 않은 시소러스 학습 결과와 키워드 수확량 기록 저장
+    keyword_expander_module = sys.modules.get("keyword_expander")
+    if keyword_expander_module is not None and keyword_expander_module._keyword_expander is not None:
+        await asyncio.to_thread(keyword_expander_module._keyword_expander.flush)
+    keyword_yield_module = sys.modules.get("keyword_yield")
+    if keyword_yield_module is not None and keyword_yield_module._stats is not None:
+        await asyncio.to_thread(keyword_yield_module._stats.save)
+
+app = FastAPI(
+    title="UniBooks Backend",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
+)
+
+# 요청별 LLM 토큰/비용 기록 (X-Request-Id, X-LLM-Usage 응답 헤더)
+app.add_middleware(LLMUsageMiddleware)
 
-app = FastAPI(title="UniBooks Backend", version="1.0.0")
+# 응답 압축 (brotli 설치 시 br, 아니면 gzip)
+app.add_middleware(CompressionMiddleware, minimum_size=500)
 
 # CORS 설정 (Flutter 앱에서 API 호출 허용)
 app.add_middleware(
@@ -19,26 +104,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-)
-
-# OpenAI API 설정
-OPENAI_API_URL = "https://api.openai.com/v1/chat/completions"
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-
-# 세종대 학술정보원 크롤러 import
-from sejong_library_api import (
-    SejongBookRecommendationRequest,
-    SejongBookRecommendationResponse, 
-    SejongBookInfo,
-    crawler as sejong_crawler
-)
-
-# 알라딘 크롤러 import
-from book_recommendation_api import (
-    BookRecommendationRequest as AladinRequest,
-    BookRecommendationResponse as AladinResponse,
-    BookInfo as AladinBookInfo,
-    crawler as aladin_crawler
+    expose_headers=["X-Request-Id", "X-LLM-Usage"],
 )
 
 # Pydantic 모델 정의
@@ -65,6 +131,65 @@ class BookRecommendationResponse(BaseModel):
     message: Optional[str] = None
 
 # 유틸리티 함수
+def recommendation_cache_key(pipeline: str, request: BaseModel) -> str:
+    """요청 내용이 같으면 같은 키 (워커 간 공유 캐시용)"""
+    payload = json.dumps(request.model_dump(), sort_keys=True, ensure_ascii=False)
+    return f"recommend:{pipeline}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+def recommendation_cache_ttl(response: dict) -> float:
+    """지름길을 택한 응답은 일시적인 지연 때문일 수 있으므로 다음 요청이 전체 결과를 다시 계산하도록 짧게 저장"""
+    return RECOMMENDATION_SHORTCUT_CACHE_TTL if response.get('shortcuts') else RECOMMENDATION_CACHE_TTL
+
+async def cached_recommendation(pipeline: str, request: BaseModel, run) -> dict:
+    """
+    동일한 추천 요청은 여러 워커 중 한 곳에서만 계산하고 결과를 공유.
+    강의 목록(course_catalog.py)에 미리 계산된 같은 강의/관심 기술/난이도 결과가 있으면 바로 반환
+    """
+    from cache_backend import get_shared_cache
+    from course_catalog import get_course_catalog
+    from recommendation_pipeline import make_plan
+    precomputed = await get_course_catalog().response(pipeline, request)
+    if precomputed is not None:
+        return precomputed
+    
+    async def compute():
+        return (await run(request)).model_dump()
+
+    # 다른 워커가 같은 요청을 계산 중이면 이 요청의 예산까지만 기다림
+    budget_ms = make_plan(request.tier, request.deadline_ms).budget_ms
+    return await get_shared_cache().get_or_compute(
+        recommendation_cache_key(pipeline, request),
+        compute,
+        ttl=recommendation_cache_ttl,
+        wait_timeout=budget_ms / 1000
+    )
+
+async def cancel_on_disconnect(http_request: Request, work: Awaitable):
+    """
+    추천 작업을 실행하면서 클라이언트 연결이 끊겼는지 주기적으로 확인하고, 끊기면 작업을 취소.
+    취소는 진행 중인 키워드 검색, 상세 페이지 요청, LLM 대기/호출까지 전파되며 이미 끝난 검색/상세 결과는 캐시에 남습니다.
+    """
+    task = asyncio.ensure_future(work)
+    while True:
+        done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+        if done:
+            return task.result()
+        if await http_request.is_disconnected():
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+            print(f"클라이언트 연결 끊김, 작업 취소: {http_request.url.path}")
+            raise HTTPException(status_code=499, detail="클라이언트 연결이 끊어졌습니다.")
+
+async def catalog_candidates_or_collect(pipeline: str, request: BaseModel, plan, collect):
+    """미리 계산된 강의의 검색 키워드/후보가 유효하면 사용하고, 없으면 collect(request, plan)로 수집"""
+    from course_catalog import get_course_catalog
+    candidates = await get_course_catalog().candidates(pipeline, request)
+    if candidates is not None:
+        plan.take_shortcut("precomputed_candidates")
+        return candidates
+    return await collect(request, plan)
+
 def create_prompt(lecture_title: str, major_field: str, interest_technology: str, learning_difficulty: str) -> str:
     return f"""
 강의 제목: {lecture_title}
@@ -77,6 +202,41 @@ def create_prompt(lecture_title: str, major_field: str, interest_technology: str
 실제 존재하는 책들로만 추천해주시고, 한국어 번역서가 있다면 우선적으로 추천해주세요.
 """
 
+DIRECT_RECOMMENDATION_SYSTEM_PROMPT = """당신은 대학생을 위한 전문 도서 추천 시스템입니다. 
+                            사용자의 전공, 관심 기술, 학습 난이도에 맞는 책들을 추천해주세요.
+                            응답은 반드시 JSON 배열 형태로만 제공하고, 다른 텍스트는 포함하지 마세요.
+                            각 책 정보는 다음 형식을 따라주세요:
+                            [
+                              {
+                                "title": "책 제목",
+                                "author": "저자",
+                                "description": "책 설명 (200자 이내)",
+                                "difficulty": "초급/중급/고급",
+                                "isbn": "ISBN (있는 경우)",
+                                "publisher": "출판사",
+                                "publicationYear": "출간년도",
+                                "rating": 4.5,
+                                "imageUrl": null
+                              }
+                            ]"""
+
+def direct_recommendation_payload(prompt: str, stream: bool = False) -> dict:
+    """LLM 직접 추천 (gpt-4o-mini) 요청 본문"""
+    payload = {
+        "model": "gpt-4o-mini",
+        "messages": [
+            {"role": "system", "content": DIRECT_RECOMMENDATION_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt},
+        ],
+        "max_tokens": 2000,
+        "temperature": 0.7,
+    }
+    if stream:
+        # 스트리밍은 마지막 청크로 실제 사용량을 받음
+        payload["stream"] = True
+        payload["stream_options"] = {"include_usage": True}
+    return payload
+
 # API 엔드포인트
 @app.get("/")
 async def root():
@@ -86,16 +246,38 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/api/v1/llm-scheduler")
+async def llm_scheduler_metrics():
+    """모델별 OpenAI 대기열 길이 / 최근 1분 요청·토큰 사용량 / 429 횟수"""
+    from llm_scheduler import get_llm_scheduler
+    return {"models": get_llm_scheduler().metrics()}
+
+@app.get("/api/v1/admin/llm-usage")
+async def llm_usage_report(request_id: Optional[str] = None, top: int = 10):
+    """엔드포인트/단계/모델별 LLM 토큰·비용 누적 집계 (request_id를 주면 해당 요청의 호출 기록)"""
+    tracker = get_usage_tracker()
+    if request_id:
+        records = tracker.request_records(request_id)
+        if records is None:
+            raise HTTPException(status_code=404, detail="해당 요청 id의 기록이 없습니다.")
+        return records
+    return tracker.report(top)
+
 @app.post("/api/v1/test-api-key")
 async def test_api_key():
     """OpenAI API 키 유효성 테스트"""
+    from llm_scheduler import get_llm_scheduler
+    import httpx  # 첫 호출 시 로드 (임포트 시간 단축)
+    
     if not OPENAI_API_KEY:
         raise HTTPException(status_code=400, detail="API 키가 설정되지 않았습니다.")
     
     try:
         async with httpx.AsyncClient() as client:
-            response = await client.post(
+            response = await get_llm_scheduler().post(
+                client,
                 OPENAI_API_URL,
+                stage="api_key_test",
                 headers={
                     "Authorization": f"Bearer {OPENAI_API_KEY}",
                     "Content-Type": "application/json",
@@ -117,8 +299,10 @@ async def test_api_key():
         raise HTTPException(status_code=500, detail=f"API 키 테스트 중 오류: {str(e)}")
 
 @app.post("/api/v1/book-recommendations", response_model=BookRecommendationResponse)
-async def get_book_recommendations(request: BookRecommendationRequest):
-    """사용자 정보를 바탕으로 도서 추천"""
+async def get_book_recommendations(request: BookRecommendationRequest, http_request: Request, fields: Optional[str] = None):
+    """사용자 정보를 바탕으로 도서 추천 (fields=title,author 로 필요한 필드만 요청 가능)"""
+    from llm_scheduler import get_llm_scheduler
+    import httpx
     
     if not OPENAI_API_KEY:
         raise HTTPException(status_code=400, detail="OpenAI API 키가 설정되지 않았습니다. .env 파일을 확인해주세요.")
@@ -127,44 +311,19 @@ async def get_book_recommendations(request: BookRecommendationRequest):
         # 프롬프트 생성
         prompt = create_prompt(request.lecture_title, request.major_field, request.interest_technology, request.learning_difficulty)
         
-        # OpenAI API 호출
+        # OpenAI API 호출 (모델별 요청 한도 안에서, 429면 Retry-After 후 재시도, 클라이언트가 끊으면 취소)
         async with httpx.AsyncClient() as client:
-            response = await client.post(
+            response = await cancel_on_disconnect(http_request, get_llm_scheduler().post(
+                client,
                 OPENAI_API_URL,
+                stage="direct_recommendation",
                 headers={
                     "Authorization": f"Bearer {OPENAI_API_KEY}",
                     "Content-Type": "application/json",
                 },
-                json={
-                    "model": "gpt-4o-mini",
-                    "messages": [
-                        {
-                            "role": "system",
-                            "content": """당신은 대학생을 위한 전문 도서 추천 시스템입니다. 
-                            사용자의 전공, 관심 기술, 학습 난이도에 맞는 책들을 추천해주세요.
-                            응답은 반드시 JSON 배열 형태로만 제공하고, 다른 텍스트는 포함하지 마세요.
-                            각 책 정보는 다음 형식을 따라주세요:
-                            [
-                              {
-                                "title": "책 제목",
-                                "author": "저자",
-                                "description": "책 설명 (200자 이내)",
-                                "difficulty": "초급/중급/고급",
-                                "isbn": "ISBN (있는 경우)",
-                                "publisher": "출판사",
-                                "publicationYear": "출간년도",
-                                "rating": 4.5,
-                                "imageUrl": null
-                              }
-                            ]""",
-                        },
-                        {"role": "user", "content": prompt},
-                    ],
-                    "max_tokens": 2000,
-                    "temperature": 0.7,
-                },
+                json=direct_recommendation_payload(prompt),
                 timeout=60.0
-            )
+            ))
             
             print(f"OpenAI API 응답 상태 코드: {response.status_code}")
             
@@ -177,11 +336,12 @@ async def get_book_recommendations(request: BookRecommendationRequest):
                     books_data = json.loads(content)
                     books = [BookRecommendation(**book) for book in books_data]
                     
-                    return BookRecommendationResponse(
+                    result = BookRecommendationResponse(
                         books=books,
                         status="success",
                         message="도서 추천이 성공적으로 완료되었습니다."
                     )
+                    return json_response(http_request, result.model_dump(), fields, list_key="books")
                 except json.JSONDecodeError as e:
                     raise HTTPException(
                         status_code=500, 
@@ -198,10 +358,89 @@ async def get_book_recommendations(request: BookRecommendationRequest):
                 
     except httpx.TimeoutException:
         raise HTTPException(status_code=408, detail="API 요청 시간 초과")
+    except HTTPException:
+        # 재시도 후에도 남은 429 등 OpenAI 상태 코드는 그대로 전달
+        raise
     except Exception as e:
         print(f"오류 발생: {e}")
         raise HTTPException(status_code=500, detail=f"책 추천 요청 중 오류 발생: {str(e)}")
 
+@app.post("/api/v1/book-recommendations/stream")
+async def stream_book_recommendations(request: BookRecommendationRequest, fields: Optional[str] = None):
+    """
+    /api/v1/book-recommendations 의 스트리밍 버전 (NDJSON).
+    LLM 응답의 JSON 배열을 조각 단위로 파싱해 책 한 권이 완성될 때마다 {"book": {...}} 한 줄을 바로 보내고,
+    마지막 줄로 {"status": "success" | "error", "message": ..., "count": N} 를 보냅니다.
+    """
+    from llm_scheduler import LLMStatusError, get_llm_scheduler
+    import httpx
+    
+    if not OPENAI_API_KEY:
+        raise HTTPException(status_code=400, detail="OpenAI API 키가 설정되지 않았습니다. .env 파일을 확인해주세요.")
+    
+    prompt = create_prompt(request.lecture_title, request.major_field, request.interest_technology, request.learning_difficulty)
+    client = httpx.AsyncClient(timeout=60.0)
+    deltas = get_llm_scheduler().stream_post(
+        client,
+        OPENAI_API_URL,
+        stage="direct_recommendation",
+        headers={
+            "Authorization": f"Bearer {OPENAI_API_KEY}",
+            "Content-Type": "application/json",
+        },
+        json=direct_recommendation_payload(prompt, stream=True)
+    )
+    
+    # 첫 조각까지는 기다려서 OpenAI 오류는 일반 HTTP 상태 코드로 반환
+    try:
+        first = await deltas.__anext__()
+    except StopAsyncIteration:
+        first = ''
+    except Exception as e:
+        await client.aclose()
+        if isinstance(e, LLMStatusError):
+            raise HTTPException(status_code=e.status_code, detail=f"API 요청 실패: {e.status_code} - {e}")
+        if isinstance(e, httpx.TimeoutException):
+            raise HTTPException(status_code=408, detail="API 요청 시간 초과")
+        raise HTTPException(status_code=500, detail=f"책 추천 요청 중 오류 발생: {str(e)}")
+    
+    wanted = [field.strip() for field in fields.split(',') if field.strip()] if fields else None
+    
+    async def ndjson_lines():
+        parser = JSONArrayStreamParser()
+        count = 0
+        chunk = first
+        try:
+            while True:
+                for item in parser.feed(chunk):
+                    try:
+                        book = BookRecommendation(**item).model_dump()
+                    except Exception as e:
+                        print(f"추천 도서 항목 검증 실패: {e}")
+                        continue
+                    if wanted:
+                        book = {field: book[field] for field in wanted if field in book}
+                    count += 1
+                    yield dumps({"book": book}) + b"\n"
+                try:
+                    chunk = await deltas.__anext__()
+                except StopAsyncIteration:
+                    break
+            
+            if parser.started:
+                status = {"status": "success", "message": "도서 추천이 성공적으로 완료되었습니다.", "count": count}
+            else:
+                status = {"status": "error", "message": "OpenAI 응답에서 JSON 배열을 찾지 못했습니다.", "count": count}
+            yield dumps(status) + b"\n"
+        except Exception as e:
+            print(f"스트리밍 추천 오류: {e}")
+            yield dumps({"status": "error", "message": f"책 추천 요청 중 오류 발생: {str(e)}", "count": count}) + b"\n"
+        finally:
+            await deltas.aclose()
+            await client.aclose()
+    
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
 @app.get("/api/v1/mock-recommendations")
 async def get_mock_recommendations():
     """테스트용 Mock 데이터 제공"""
@@ -243,58 +482,91 @@ async def get_mock_recommendations():
         message="Mock 데이터가 성공적으로 반환되었습니다."
     )
 
-@app.post("/api/v1/sejong-book-recommendations", response_model=SejongBookRecommendationResponse)
-async def get_sejong_book_recommendations(request: SejongBookRecommendationRequest):
-    """세종대 학술정보원에서 도서 추천 - 새로운 단순화된 로직"""
+def record_selection(pipeline: str, plan, books: List[Dict]):
+    """
+    AI 선정 결과를 키워드 수확량 기록에 반영 (로컬 순위는 AI 선정이 아니므로 제외).
+    강의 목록 미리 계산 중이면 모아 두었다가 강의마다 한 번만 기록합니다.
+    """
+    from course_catalog import deferred_selections
+    from keyword_yield import get_keyword_stats
+    if any(shortcut.startswith("local_ranking") for shortcut in plan.shortcuts):
+        return
+    deferred = deferred_selections.get()
+    if deferred is not None:
+        deferred.extend(books)
+        return
+    get_keyword_stats().record_selected(pipeline, books)
+
+async def collect_sejong_candidates(request: SejongBookRecommendationRequest, plan):
+    """1~2단계: 키워드 생성 → 세종대 검색 → 판본 중복 제거 (검색 키워드, 후보 도서)"""
+    from edition_dedup import collapse_editions
+    from keyword_yield import attach_keywords, get_keyword_stats
+    from recommendation_pipeline import gather_until_deadline, stream_keywords_and_search
+    sejong_crawler = get_sejong_crawler()
+    # 1단계: 키워드 생성 (스트리밍, 2단계 검색과 겹쳐 실행)
+    print("1단계: 검색 키워드 생성 중...")
+    # 2단계: 키워드가 도착하는 즉시 도서 검색 시작 (검색 단계 마감까지 끝난 결과만 사용)
+    keywords, searches = await stream_keywords_and_search(
+        plan,
+        sejong_crawler.stream_search_keywords,
+        request.lecture_title,
+        lambda keyword: sejong_crawler.search_books_by_keyword(
+            keyword, limit=plan.per_keyword_limit, raise_errors=True
+        ),
+        source="sejong"
+    )
+    print(f"생성된 키워드: {keywords}")
+    print("2단계: 세종대 학술정보원 도서 크롤링 중...")
+    results, completed = await gather_until_deadline(plan, searches)
+    all_books = []
+    for keyword, books in zip(keywords, results):
+        print(f"키워드 '{keyword}': {len(books)}개 수집")
+        all_books.extend(books)
+    
+    # 키워드별 수확량 기록 (다음 요청의 키워드 선택에 사용, 끝까지 완료된 검색만)
+    matches = get_keyword_stats().record_searches("sejong", keywords, results, completed)
+    
+    # 중복 제거 (개정판/eBook/권차 등 판본을 묶어 대출 가능·최신 판본만, 상세 보강 전에 수행)
+    unique_books = attach_keywords(collapse_editions(all_books)[:plan.max_candidates], matches)
+    
+    print(f"총 {len(unique_books)}개의 고유 도서 수집 완료")
+    return keywords, unique_books
+
+async def run_sejong_recommendation(request: SejongBookRecommendationRequest) -> SejongBookRecommendationResponse:
+    """세종대 학술정보원에서 도서 추천 (tier / deadline_ms 에 맞춰 작업량 조절)"""
+    from book_record import to_models
+    from recommendation_pipeline import enrich_until_deadline, make_plan, rank_until_deadline
+    sejong_crawler = get_sejong_crawler()
+    plan = make_plan(request.tier, request.deadline_ms, max_candidates=30)
     try:
-        print("=== main.py에서 세종대 도서 추천 API 시작 ===")
-        
-        # 1단계: 키워드 생성
-        print("1단계: 검색 키워드 생성 중...")
-        keywords = await sejong_crawler.generate_search_keywords(request.lecture_title)
-        print(f"생성된 키워드: {keywords}")
-        
-        # 2단계: 키워드별로 도서 검색 (효율적으로 30개 정도까지)
-        print("2단계: 세종대 학술정보원 도서 크롤링 중...")
-        all_books = []
-        
-        for i, keyword in enumerate(keywords[:10], 1):
-            print(f"키워드 {i}/10: '{keyword}' 검색 중...")
-            books = await sejong_crawler.search_books_by_keyword(keyword, limit=5)
-            all_books.extend(books)
-            print(f"키워드 '{keyword}': {len(books)}개 수집")
-            
-            # 충분한 책이 모이면 중단 (효율성 개선)
-            if len(all_books) >= 30:
-                print(f"충분한 도서 수집 완료 ({len(all_books)}개), 검색 중단")
-                break
+        print(f"=== main.py에서 세종대 도서 추천 API 시작 (등급 {plan.tier}, 예산 {plan.budget_ms}ms) ===")
         
-        # 중복 제거 (제목 기준)
-        unique_books = []
-        seen_titles = set()
-        for book in all_books:
-            title = book.get('title', '')
-            if title and title not in seen_titles:
-                unique_books.append(book)
-                seen_titles.add(title)
-        
-        print(f"총 {len(unique_books)}개의 고유 도서 수집 완료")
+        # 강의 목록에 있는 강의는 미리 수집한 후보 사용 (1~2단계 생략)
+        keywords, unique_books = await catalog_candidates_or_collect(
+            "sejong", request, plan, collect_sejong_candidates
+        )
         
         if not unique_books:
             raise HTTPException(status_code=404, detail="검색된 도서가 없습니다.")
         
-        # 3단계: AI 추천 (5개 선정)
+        # 선택: 상세 페이지 보강 (ISBN, 주제분류, 목차, 요약, 미리 계산된 후보는 이미 보강됨)
+        if "precomputed_candidates" not in plan.shortcuts:
+            await enrich_until_deadline(plan, sejong_crawler.enrich_books, unique_books, request.enrich_details)
+        
+        # 3단계: AI 추천 (5개 선정, 시간이 부족하면 로컬 순위)
         print("3단계: AI 도서 추천 분석 중...")
-        recommendation_result = await sejong_crawler.get_ai_book_recommendations(
+        recommendation_result = await rank_until_deadline(
+            plan,
+            sejong_crawler.get_ai_book_recommendations,
             unique_books,
             request.interest_technology,
             request.learning_difficulty
         )
         
-        # 응답 데이터 구성 (단순화된 방식)
-        recommended_books = []
-        for book in recommendation_result['books']:
-            recommended_books.append(SejongBookInfo(**book))
+        record_selection("sejong", plan, recommendation_result['books'])
+        
+        # 응답 데이터 구성 (간결한 레코드를 거쳐 재검증 없이 응답 모델로 변환)
+        recommended_books = to_models(recommendation_result['books'], SejongBookInfo)
         
         print(f"✅ 최종 추천 도서 {len(recommended_books)}권 완료")
         
@@ -302,9 +574,13 @@ async def get_sejong_book_recommendations(request: SejongBookRecommendationReque
             recommended_books=recommended_books,
             search_keywords=keywords,
             total_books_analyzed=len(unique_books),
-            recommendation_reason=recommendation_result['reason']
+            recommendation_reason=recommendation_result['reason'],
+            tier=plan.tier,
+            shortcuts=plan.shortcuts
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ 세종대 도서 추천 API 오류: {e}")
         print(f"오류 타입: {type(e).__name__}")
@@ -312,75 +588,232 @@ async def get_sejong_book_recommendations(request: SejongBookRecommendationReque
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"세종대 도서 추천 중 오류 발생: {str(e)}")
 
-@app.post("/recommend-books", response_model=AladinResponse)
-async def recommend_books(request: AladinRequest):
+@app.post("/api/v1/sejong-book-recommendations", response_model=SejongBookRecommendationResponse)
+async def get_sejong_book_recommendations(request: SejongBookRecommendationRequest, http_request: Request,
+                                          fields: Optional[str] = None):
+    """세종대 학술정보원에서 도서 추천 (동일 요청은 워커 간 공유 캐시 사용)"""
+    result = await cancel_on_disconnect(http_request, cached_recommendation("sejong", request, run_sejong_recommendation))
+    return json_response(http_request, result, fields)
+
+async def collect_aladin_candidates(request: AladinRequest, plan):
+    """1~2단계: 키워드 생성 → 알라딘 검색 목록 → 판본 중복 제거 → 남은 후보만 상세 페이지 크롤링 (검색 키워드, 후보 도서)"""
+    from edition_dedup import collapse_editions
+    from keyword_yield import attach_keywords, get_keyword_stats
+    from recommendation_pipeline import enrich_until_deadline, gather_until_deadline, stream_keywords_and_search
+    aladin_crawler = get_aladin_crawler()
+    # 1단계: OpenAI API로 검색 키워드 생성 (스트리밍, 2단계 검색과 겹쳐 실행)
+    print(f"1단계: 검색 키워드 생성 중... (등급 {plan.tier}, 예산 {plan.budget_ms}ms)")
+    # 2단계: 키워드가 도착하는 즉시 각각 5개씩 목록 검색 시작 (검색 단계 마감까지 끝난 결과만 사용)
+    keywords, searches = await stream_keywords_and_search(
+        plan,
+        aladin_crawler.stream_search_keywords,
+        request.lecture_title,
+        lambda keyword: aladin_crawler.search_books_by_keyword(
+            keyword, request.major_field, limit=plan.per_keyword_limit, raise_errors=True
+        ),
+        source="aladin"
+    )
+    print(f"생성된 키워드: {keywords}")
+    print("2단계: 도서 검색 중...")
+    results, completed = await gather_until_deadline(plan, searches)
+    all_books = []
+    for keyword, books in zip(keywords, results):
+        print(f"키워드 '{keyword}': {len(books)}개 수집")
+        all_books.extend(books)
+    
+    matches = get_keyword_stats().record_searches("aladin", keywords, results, completed)
+    
+    # 중복 제거 (개정판/eBook/권차 등 판본을 묶어 최신 판본만, 상세 페이지 요청 전에 수행)
+    unique_books = collapse_editions(all_books)
+    
+    # 등급별 최대 후보 수로 조정 (thorough: 50개)
+    if len(unique_books) > plan.max_candidates:
+        unique_books = unique_books[:plan.max_candidates]
+    elif len(unique_books) < plan.max_candidates:
+        print(f"경고: 중복 제거 후 {len(unique_books)}개만 수집됨 (목표: {plan.max_candidates}개)")
+    unique_books = attach_keywords(unique_books, matches)
+    
+    # 남은 후보만 상세 페이지(목차, 설명, ISBN) 크롤링 (등급이 허용할 때만, 검색 단계 마감을 넘기면 받은 것까지만)
+    print(f"상세 페이지 크롤링 중... ({len(unique_books)}개)")
+    await enrich_until_deadline(plan, aladin_crawler.enrich_books, unique_books, True)
+    
+    print(f"총 {len(unique_books)}개의 고유 도서 수집 완료 (목표: {plan.max_candidates}개)")
+    return keywords, unique_books
+
+async def run_aladin_recommendation(request: AladinRequest) -> AladinResponse:
     """
-    알라딘 크롤링 기반 도서 추천 API
+    알라딘 크롤링 기반 도서 추천 API (tier / deadline_ms 에 맞춰 작업량 조절)
     """
+    from book_record import to_models
+    from recommendation_pipeline import make_plan, rank_until_deadline
+    aladin_crawler = get_aladin_crawler()
+    plan = make_plan(request.tier, request.deadline_ms, max_candidates=50)
     try:
-        # 1단계: OpenAI API로 검색 키워드 생성
-        print("1단계: 검색 키워드 생성 중...")
-        keywords = await aladin_crawler.generate_search_keywords(request.lecture_title)
-        print(f"생성된 키워드: {keywords}")
+        # 강의 목록에 있는 강의는 미리 수집한 후보 사용 (1~2단계 생략)
+        keywords, unique_books = await catalog_candidates_or_collect(
+            "aladin", request, plan, collect_aladin_candidates
+        )
         
-        # 2단계: 10개 키워드로 각각 5개씩 총 50개 책 크롤링
-        print("2단계: 도서 크롤링 중...")
-        all_books = []
+        if not unique_books:
+            raise HTTPException(status_code=404, detail="검색된 도서가 없습니다.")
         
-        for i, keyword in enumerate(keywords[:10], 1):  # 정확히 10개 키워드만
-            print(f"키워드 {i}/10: '{keyword}' 검색 중...")
-            books = await aladin_crawler.crawl_books_by_keyword(
-                keyword, 
-                request.major_field, 
-                limit=5  # 각 키워드당 정확히 5개
-            )
-            all_books.extend(books)
-            print(f"키워드 '{keyword}': {len(books)}개 수집")
+        # 3단계: 후보 도서 정보와 관심기술 유사도 분석으로 AI 추천 (시간이 부족하면 로컬 순위)
+        print("3단계: 후보 도서 목차 분석 및 AI 추천 중...")
+        recommendation_result = await rank_until_deadline(
+            plan,
+            aladin_crawler.get_ai_book_recommendations,
+            unique_books, 
+            request.interest_technology, 
+            request.learning_difficulty
+        )
         
-        # 중복 제거 (제목 기준)
-        unique_books = []
-        seen_titles = set()
-        for book in all_books:
-            title = book.get('title', '')
-            if title and title not in seen_titles:
-                unique_books.append(book)
-                seen_titles.add(title)
+        record_selection("aladin", plan, recommendation_result['books'])
         
-        # 정확히 50개가 되도록 조정
-        if len(unique_books) > 50:
-            unique_books = unique_books[:50]
-        elif len(unique_books) < 50:
-            print(f"경고: 중복 제거 후 {len(unique_books)}개만 수집됨 (목표: 50개)")
+        # 응답 데이터 구성 (간결한 레코드를 거쳐 재검증 없이 응답 모델로 변환)
+        recommended_books = to_models(recommendation_result['books'], AladinBookInfo)
         
-        print(f"총 {len(unique_books)}개의 고유 도서 수집 완료 (목표: 50개)")
+        return AladinResponse(
+            recommended_books=recommended_books,
+            search_keywords=keywords,
+            total_books_analyzed=len(unique_books),
+            recommendation_reason=recommendation_result['reason'],
+            tier=plan.tier,
+            shortcuts=plan.shortcuts
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"알라딘 API 오류: {e}")
+        raise HTTPException(status_code=500, detail=f"서버 오류: {str(e)}")
+
+@app.post("/recommend-books", response_model=AladinResponse)
+async def recommend_books(request: AladinRequest, http_request: Request, fields: Optional[str] = None):
+    """
+    알라딘 크롤링 기반 도서 추천 API (동일 요청은 워커 간 공유 캐시 사용)
+    """
+    result = await cancel_on_disconnect(http_request, cached_recommendation("aladin", request, run_aladin_recommendation))
+    return json_response(http_request, result, fields)
+
+async def collect_federated_candidates(request: AladinRequest, plan):
+    """1~2단계: 키워드 생성 → 알라딘/세종대 동시 검색 → ISBN·판본 병합 (검색 키워드, 후보 도서)"""
+    from edition_dedup import collapse_editions
+    from keyword_yield import attach_keywords, get_keyword_stats
+    from recommendation_pipeline import enrich_until_deadline, gather_until_deadline, stream_keywords_and_search
+    aladin_crawler = get_aladin_crawler()
+    federated_searcher = get_federated_searcher()
+    # 1단계: 검색 키워드 생성 (스트리밍, 2단계 검색과 겹쳐 실행)
+    print(f"1단계: 검색 키워드 생성 중... (등급 {plan.tier}, 예산 {plan.budget_ms}ms)")
+    # 2단계: 키워드가 도착하는 즉시 알라딘/세종대 동시 검색 후 ISBN 기준 병합 (검색 단계 마감까지 끝난 결과만 사용)
+    keywords, searches = await stream_keywords_and_search(
+        plan,
+        aladin_crawler.stream_search_keywords,
+        request.lecture_title,
+        lambda keyword: federated_searcher.search_keyword(
+            keyword, request.major_field, limit=plan.per_keyword_limit
+        ),
+        source="federated"
+    )
+    print(f"생성된 키워드: {keywords}")
+    print("2단계: 알라딘 + 세종대 통합 검색 중...")
+    results, completed = await gather_until_deadline(plan, searches)
+    # 한 출처라도 실패한 키워드는 수확량 기록에서 제외 (실패한 출처는 빈 결과로 병합)
+    completed = [done and None not in result for done, result in zip(completed, results)]
+    results = [tuple(books or [] for books in result) if result else ([], []) for result in results]
+    # 병합 전에 알라딘 목록의 상세 페이지(ISBN) 보강 (등급이 허용할 때만, 생략하면 ISBN 없는 도서는 제목으로 병합)
+    details = aladin_crawler.new_detail_tracker()
+    await enrich_until_deadline(
+        plan, lambda books: federated_searcher.enrich_aladin(books, details), results, True
+    )
+    matches = get_keyword_stats().record_searches(
+        "federated", keywords, [sejong_books + aladin_books for sejong_books, aladin_books in results], completed
+    )
+    unique_books = federated_searcher.merge_results(keywords, results)
+    # ISBN이 다른 판본끼리 묶어 대출 가능·최신 판본만
+    unique_books = attach_keywords(collapse_editions(unique_books), matches)
+    
+    # 도서관 소장 도서를 우선으로 등급별 최대 후보 수까지
+    unique_books.sort(key=lambda book: 'sejong' not in book['sources'])
+    unique_books = unique_books[:plan.max_candidates]
+    
+    print(f"총 {len(unique_books)}개의 통합 후보 도서 수집 완료")
+    return keywords, unique_books
+
+async def run_federated_recommendation(request: AladinRequest) -> FederatedBookRecommendationResponse:
+    """
+    알라딘 + 세종대 학술정보원 통합 검색 기반 도서 추천 API
+    (두 출처를 동시에 검색하고 ISBN 기준으로 병합한 뒤 한 번만 AI 선정)
+    """
+    from book_record import to_models
+    from recommendation_pipeline import make_plan, rank_until_deadline
+    aladin_crawler = get_aladin_crawler()
+    plan = make_plan(request.tier, request.deadline_ms, max_candidates=50)
+    try:
+        # 강의 목록에 있는 강의는 미리 수집한 후보 사용 (1~2단계 생략)
+        keywords, unique_books = await catalog_candidates_or_collect(
+            "federated", request, plan, collect_federated_candidates
+        )
         
         if not unique_books:
             raise HTTPException(status_code=404, detail="검색된 도서가 없습니다.")
         
-        # 3단계: 50개 책 정보와 관심기술 유사도 분석으로 AI 추천
-        print("3단계: 50개 도서 목차 분석 및 AI 추천 중...")
-        recommendation_result = await aladin_crawler.get_ai_book_recommendations(
-            unique_books, 
-            request.interest_technology, 
+        # 3단계: 통합 후보 집합을 한 번만 AI 분석
+        print("3단계: 통합 후보 도서 AI 추천 중...")
+        recommendation_result = await rank_until_deadline(
+            plan,
+            aladin_crawler.get_ai_book_recommendations,
+            unique_books,
+            request.interest_technology,
             request.learning_difficulty
         )
         
-        # 응답 데이터 구성
-        recommended_books = []
-        for book in recommendation_result['books']:
-            recommended_books.append(AladinBookInfo(**book))
+        record_selection("federated", plan, recommendation_result['books'])
         
-        return AladinResponse(
+        # 간결한 레코드를 거쳐 재검증 없이 응답 모델로 변환
+        recommended_books = to_models(recommendation_result['books'], FederatedBookInfo)
+        
+        return FederatedBookRecommendationResponse(
             recommended_books=recommended_books,
             search_keywords=keywords,
             total_books_analyzed=len(unique_books),
-            recommendation_reason=recommendation_result['reason']
+            recommendation_reason=recommendation_result['reason'],
+            tier=plan.tier,
+            shortcuts=plan.shortcuts
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"알라딘 API 오류: {e}")
+        print(f"통합 검색 API 오류: {e}")
         raise HTTPException(status_code=500, detail=f"서버 오류: {str(e)}")
 
+@app.post("/api/v1/federated-book-recommendations", response_model=FederatedBookRecommendationResponse)
+async def get_federated_book_recommendations(request: AladinRequest, http_request: Request,
+                                             fields: Optional[str] = None):
+    """
+    알라딘 + 세종대 학술정보원 통합 검색 기반 도서 추천 API (동일 요청은 워커 간 공유 캐시 사용)
+    """
+    result = await cancel_on_disconnect(http_request, cached_recommendation("federated", request, run_federated_recommendation))
+    return json_response(http_request, result, fields)
+
+@app.get("/api/v1/covers")
+async def get_cover_image(url: str, http_request: Request, w: int = 160):
+    """
+    알라딘 표지 이미지 프록시 (디스크 캐시 + 너비별 썸네일, w=0 이면 원본)
+    예: /api/v1/covers?url=https://image.aladin.co.kr/product/...jpg&w=160
+    """
+    from cover_proxy import CACHE_HEADERS, CoverProxyError, get_cover_proxy
+    
+    try:
+        data, content_type = await get_cover_proxy().get_cover(url, w)
+    except CoverProxyError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    
+    headers = dict(CACHE_HEADERS, ETag=etag_for(data))
+    if if_none_match(http_request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(content=data, media_type=content_type, headers=headers)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
@@ -0,0 +1,701 @@
+"""
+세종대 / 알라딘 HTML 파싱 + 도서 정보 추출 (작업자 풀에서 실행)
+
+BeautifulSoup 파싱과 정규식 추출은 순수 CPU 작업이라 이벤트 루프 스레드에서 실행하면 동시에 처리 중인 모든 요청의 지연이 늘어납니다.
+이 모듈의 파싱 함수는 응답 원본 바이트와 인코딩만 받아 간결한 도서 dict를 돌려주므로 (soup 객체가 작업자 밖으로 나오지 않음)
+프로세스 풀에서도 그대로 실행할 수 있습니다.
+
+- PARSE_POOL=process(기본) | thread | inline, PARSE_POOL_WORKERS (기본 min(4, CPU 수))
+- 프로세스 풀이 깨지면(작업자 강제 종료 등) 해당 작업은 이벤트 루프에서 직접 파싱하고 다음 작업에서 풀을 다시 만듭니다.
+- 검색 결과 페이지는 lxml이 있으면 본문을 조각 단위로 받으며 항목이 닫힐 때마다 추출하고, limit개를 읽으면 연결을 닫습니다
+  (STREAMING_PARSE=0 이면 전체를 받아 작업자 풀에서 파싱). 이때 파싱은 다운로드 스레드에서 이뤄집니다.
+
+사용법:
+    python page_parser.py --benchmark --concurrency 50 --requests 200     # 풀 유무별 이벤트 루프 지연과 처리량 비교
+    python page_parser.py --stream-benchmark --limit 5                      # 전체 파싱 vs 스트리밍 파싱 (수신량, 시간, 메모리)
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import re
+import statistics
+import threading
+import time
+from concurrent.futures import BrokenExecutor, Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+from book_utils import extract_isbn
+
+try:
+    from lxml import etree
+except ImportError:  # 선택 의존성 - 없으면 검색 결과 페이지를 모두 받아 작업자 풀에서 파싱
+    etree = None
+
+SEJONG_BASE_URL = "https://library.sejong.ac.kr"
+POOL_MODES = ('process', 'thread', 'inline')
+STREAM_CHUNK_SIZE = 16 * 1024
+SEJONG_ERROR_MARKER = "오류발생"
+
+
+def decode(content: bytes, encoding: Optional[str]) -> str:
+    return content.decode(encoding or 'utf-8', errors='replace')
+
+
+# 세종대
+def empty_sejong_book() -> Dict:
+    return {
+        'title': '',
+        'author': '',
+        'publisher': '',
+        'publication_year': '',
+        'location': '',
+        'call_number': '',
+        'availability': '',
+        'isbn': '',
+        'subject_category': '',
+        'detail_url': ''
+    }
+
+
+def extract_sejong_item(item) -> Dict:
+    """ul.listType01 li 구조에서 도서 정보 추출"""
+    book_info = empty_sejong_book()
+
+    # dl.bookList 찾기
+    book_list = item.find('dl', class_='bookList')
+    if not book_list:
+        return book_info
+
+    # 제목 링크 찾기 (a.title)
+    title_link = book_list.find('a', class_='title')
+    if title_link:
+        book_info['title'] = title_link.get_text().strip()
+
+        # JavaScript 링크에서 ID 추출
+        onclick = title_link.get('onclick', '')
+        if 'goDetail(' in onclick:
+            match = re.search(r'goDetail\((\d+)\)', onclick)
+            if match:
+                book_id = match.group(1)
+                book_info['detail_url'] = f"{SEJONG_BASE_URL}/search/DetailView.ax?cid={book_id}"
+
+    # body div에서 저자, 출판사, 출판년도 정보 추출
+    body_div = book_list.find('div', class_='body')
+    if body_div:
+        body_text = body_div.get_text()
+
+        if '/' in body_text:
+            info_part = body_text.split('/', 1)[1].strip()
+            parts = info_part.split('.')
+            if len(parts) >= 2:
+                book_info['author'] = parts[0].strip()
+
+                pub_part = parts[1].strip()
+                if ',' in pub_part:
+                    pub_parts = pub_part.split(',')
+                    book_info['publisher'] = pub_parts[0].strip()
+                    if len(pub_parts) > 1:
+                        year_text = pub_parts[1].strip()
+                        year_match = re.search(r'\d{4}', year_text)
+                        if year_match:
+                            book_info['publication_year'] = year_match.group()
+
+    # 소장 정보 추출 (p.tag)
+    tag_p = book_list.find('p', class_='tag')
+    if tag_p:
+        tag_text = tag_p.get_text()
+
+        # 소장위치 추출
+        location_link = tag_p.find('a')
+        if location_link:
+            book_info['location'] = location_link.get_text().strip()
+
+        # 청구기호 추출
+        call_number_match = re.search(r'\[([^\]]+)\]', tag_text)
+        if call_number_match:
+            book_info['call_number'] = call_number_match.group(1).strip()
+
+        # 대출상태 추출
+        if '대출가능' in tag_text:
+            book_info['availability'] = '대출가능'
+        elif '대출중' in tag_text:
+            book_info['availability'] = '대출중'
+        elif '이용불가' in tag_text:
+            book_info['availability'] = '이용불가'
+        elif '정리중' in tag_text:
+            book_info['availability'] = '정리중'
+
+    return book_info
+
+
+def parse_sejong_search(content: bytes, encoding: Optional[str], limit: int) -> Optional[Tuple[int, List[Dict]]]:
+    """검색 결과 페이지 → (발견한 항목 수, 제목이 있는 도서 최대 limit개), 서버 오류 페이지면 None"""
+    html = decode(content, encoding)
+    if "오류발생" in html:
+        return None
+
+    soup = BeautifulSoup(html, 'html.parser')
+    book_items = soup.select('ul.listType01 li')
+    books = []
+    for item in book_items[:limit]:
+        try:
+            book_info = extract_sejong_item(item)
+        except Exception as e:
+            print(f"도서 정보 추출 중 오류: {e}")
+            continue
+        if book_info.get('title'):
+            books.append(book_info)
+    return len(book_items), books
+
+
+def parse_sejong_detail(content: bytes, encoding: Optional[str]) -> Dict[str, str]:
+    """DetailView HTML의 항목명(th/dt) - 값(td/dd) 쌍에서 상세 정보 추출"""
+    soup = BeautifulSoup(decode(content, encoding), 'html.parser')
+    detail_info = {}
+
+    for label_elem in soup.find_all(['th', 'dt']):
+        label = label_elem.get_text(strip=True)
+        value_elem = label_elem.find_next_sibling(['td', 'dd'])
+        if not label or not value_elem:
+            continue
+        value = value_elem.get_text(' ', strip=True)
+        if not value:
+            continue
+
+        if 'ISBN' in label.upper() and 'isbn' not in detail_info:
+            isbn = extract_isbn(f"ISBN {value}")
+            if isbn:
+                detail_info['isbn'] = isbn
+        elif ('주제' in label or '분류' in label) and 'subject_category' not in detail_info:
+            detail_info['subject_category'] = value[:200]
+        elif ('목차' in label or '차례' in label) and 'table_of_contents' not in detail_info:
+            detail_info['table_of_contents'] = value[:1000]  # 알라딘과 동일하게 1000자 제한
+        elif ('요약' in label or '초록' in label or '책소개' in label or '내용' in label) and 'description' not in detail_info:
+            detail_info['description'] = value[:500]
+
+    return detail_info
+
+
+# 알라딘
+def is_relevant_to_major(text: str, major_field: str) -> bool:
+    """
+    텍스트가 전공분야와 관련이 있는지 간단히 체크합니다.
+    """
+    if not major_field:
+        return True
+
+    # 전공분야 키워드를 공백으로 분리
+    major_keywords = major_field.replace(',', ' ').split()
+
+    # 텍스트에 전공분야 키워드가 하나라도 포함되면 관련성 있음
+    for keyword in major_keywords:
+        if keyword.strip().lower() in text.lower():
+            return True
+
+    return True  # 기본적으로 관련성 있다고 가정
+
+
+def extract_aladin_item(item, major_field: str) -> Optional[Dict]:
+    """검색 결과 ss_book_box 하나에서 기본 책 정보 추출 (전공과 관련 없으면 None)"""
+    book_info = {}
+
+    # 제목 추출
+    title_elem = item.find('a', class_='bo3')
+    if title_elem:
+        title_text = title_elem.get_text(strip=True)
+        title_text = re.sub(r'\[.*?\]', '', title_text).strip()
+        book_info['title'] = title_text
+
+    # 전체 텍스트에서 정보 추출
+    full_text = item.get_text()
+
+    # 전공분야와 관련성 체크 (간단한 키워드 매칭)
+    if major_field and not is_relevant_to_major(full_text, major_field):
+        return None
+
+    # 저자 추출
+    author_patterns = [
+        r'([가-힣a-zA-Z\s,]+)\s*\(지은이\)',
+        r'([가-힣a-zA-Z\s,]+)\s*저',
+        r'저자\s*:\s*([^|]+)',
+    ]
+
+    for pattern in author_patterns:
+        match = re.search(pattern, full_text)
+        if match:
+            author = match.group(1).strip()
+            author = re.sub(r'\(.*?\)', '', author).strip()
+            if author and len(author) < 50:
+                book_info['author'] = author
+                break
+
+    # 출판사 추출
+    publisher_patterns = [
+        r'([가-힣a-zA-Z0-9\s]+)\s*\|\s*\d{4}',
+        r'\|\s*([가-힣a-zA-Z0-9\s]+)\s*\|\s*\d{4}',
+    ]
+
+    for pattern in publisher_patterns:
+        match = re.search(pattern, full_text)
+        if match:
+            publisher = match.group(1).strip()
+            if publisher and len(publisher) < 30:
+                book_info['publisher'] = publisher
+                break
+
+    # 가격 추출
+    price_elem = item.find('span', class_='ss_p2')
+    if price_elem:
+        book_info['price'] = price_elem.get_text(strip=True)
+
+    # 이미지 URL
+    img_elem = item.find('img')
+    if img_elem and img_elem.get('src'):
+        img_url = img_elem.get('src')
+        if img_url.startswith('//'):
+            img_url = 'https:' + img_url
+        book_info['image_url'] = img_url
+
+    # 상품 링크
+    link_elem = item.find('a', href=lambda x: x and 'ItemId=' in x)
+    if link_elem and link_elem.get('href'):
+        href = link_elem.get('href')
+        if href.startswith('/'):
+            book_info['product_url'] = 'https://www.aladin.co.kr' + href
+        else:
+            book_info['product_url'] = href
+
+    return book_info
+
+
+def parse_aladin_search(content: bytes, encoding: Optional[str], major_field: str, limit: int) -> List[Dict]:
+    """검색 결과 페이지의 앞쪽 limit개 항목 중 제목이 있는 도서의 기본 정보 (상세 정보는 호출한 쪽에서)"""
+    soup = BeautifulSoup(decode(content, encoding), 'html.parser')
+    books = []
+    for item in soup.find_all('div', class_='ss_book_box')[:limit]:
+        try:
+            book_info = extract_aladin_item(item, major_field)
+        except Exception as e:
+            print(f"책 정보 추출 중 오류: {e}")
+            continue
+        if book_info and book_info.get('title'):
+            books.append(book_info)
+    return books
+
+
+def parse_aladin_detail(content: bytes, encoding: Optional[str]) -> Dict[str, str]:
+    """상품 상세 페이지에서 책 설명, ISBN, 목차, 출간일 추출"""
+    soup = BeautifulSoup(decode(content, encoding), 'html.parser')
+    detail_info = {}
+
+    # 책 설명 추출
+    desc_elem = soup.find('div', class_='Ere_prod_mconts_R')
+    if desc_elem:
+        detail_info['description'] = desc_elem.get_text(strip=True)[:500]
+
+    # ISBN 추출 (설명 영역 우선, 없으면 페이지 전체)
+    isbn = extract_isbn(desc_elem.get_text(' ', strip=True) if desc_elem else '')
+    if not isbn:
+        isbn = extract_isbn(soup.get_text(' ', strip=True))
+    if isbn:
+        detail_info['isbn'] = isbn
+
+    # 목차 추출 - 여러 선택자 시도
+    toc_selectors = [
+        'div.Ere_prod_mconts_LS',  # 알라딘 목차 영역
+        'div#div_PublisherDesc',   # 출판사 서평
+        'div.Ere_prod_mconts_R',   # 상세 설명
+        'div.book_info_inner'      # 도서 정보
+    ]
+
+    toc_text = ""
+    for selector in toc_selectors:
+        toc_elem = soup.select_one(selector)
+        if toc_elem:
+            text = toc_elem.get_text(strip=True)
+            if '목차' in text or '차례' in text or len(text) > 100:
+                toc_text = text[:1000]  # 목차는 1000자로 제한
+                break
+
+    detail_info['table_of_contents'] = toc_text
+
+    # 출간일 추출
+    date_elem = soup.find('li', class_='Ere_sub2_title')
+    if date_elem:
+        date_text = date_elem.get_text()
+        date_match = re.search(r'(\d{4}-\d{2}-\d{2})', date_text)
+        if date_match:
+            detail_info['publication_date'] = date_match.group(1)
+
+    return detail_info
+
+
+# 스트리밍 파싱 (검색 결과 페이지)
+def streaming_enabled() -> bool:
+    """STREAMING_PARSE=0 이면 끄고, lxml이 없으면 사용할 수 없음"""
+    return etree is not None and os.getenv("STREAMING_PARSE", "1") != "0"
+
+
+def is_sejong_item(element) -> bool:
+    parent = element.getparent()
+    return (element.tag == 'li' and parent is not None and parent.tag == 'ul'
+            and 'listType01' in (parent.get('class') or '').split())
+
+
+def is_aladin_item(element) -> bool:
+    return element.tag == 'div' and 'ss_book_box' in (element.get('class') or '').split()
+
+
+class StreamingItemParser:
+    """
+    응답 본문을 조각 단위로 받아 검색 결과 항목의 하위 트리가 닫힐 때마다 바로 추출.
+    추출한 항목과 항목 밖의 요소는 즉시 비워 메모리를 돌려주고, limit개 항목을 읽으면 done이 됩니다.
+    항목 하나만 다시 직렬화해 BeautifulSoup으로 읽으므로 추출 규칙은 전체 페이지 파싱과 같습니다.
+    """
+
+    def __init__(self, is_item: Callable, extract: Callable, limit: int, encoding: Optional[str] = None,
+                 error_marker: Optional[str] = None):
+        self.is_item = is_item
+        self.extract = extract
+        self.limit = limit
+        self.error_marker = error_marker.encode(encoding or 'utf-8') if error_marker else None
+        # 인코딩을 모르면 lxml이 <meta charset>으로 판별
+        self._parser = etree.HTMLPullParser(events=('start', 'end'), encoding=encoding)
+        self._current = None
+        self._tail = b''
+        self.items_seen = 0
+        self.books: List[Dict] = []
+        self.error = False
+        self.received = 0
+
+    @property
+    def done(self) -> bool:
+        return self.error or self.items_seen >= self.limit
+
+    def feed(self, chunk: bytes) -> bool:
+        self.received += len(chunk)
+        if self.error_marker:
+            # 조각 경계에 걸친 표시도 찾도록 이전 조각의 끝부분과 이어서 확인
+            if self.error_marker in self._tail + chunk:
+                self.error = True
+                return True
+            self._tail = chunk[-len(self.error_marker):]
+        self._parser.feed(chunk)
+        self._handle_events()
+        return self.done
+
+    def close(self):
+        if not self.done:
+            try:
+                self._parser.close()
+            except etree.XMLSyntaxError:
+                pass
+            self._handle_events()
+        self._current = None
+
+    def _handle_events(self):
+        for event, element in self._parser.read_events():
+            if self.done:
+                return
+            if event == 'start':
+                if self._current is None and self.is_item(element):
+                    self._current = element
+                continue
+            if element is self._current:
+                self._current = None
+                self.items_seen += 1
+                fragment = etree.tostring(element, encoding='unicode', method='html')
+                self._release(element)
+                tag = BeautifulSoup(fragment, 'html.parser').find(element.tag)
+                try:
+                    book_info = self.extract(tag) if tag is not None else None
+                except Exception as e:
+                    print(f"도서 정보 추출 중 오류: {e}")
+                    continue
+                if book_info and book_info.get('title'):
+                    self.books.append(book_info)
+            elif self._current is None:
+                self._release(element)
+
+    @staticmethod
+    def _release(element):
+        """다 읽은 하위 트리와 앞서 비운 형제 요소를 트리에서 제거"""
+        element.clear(keep_tail=True)
+        parent = element.getparent()
+        while parent is not None and element.getprevious() is not None:
+            del parent[0]
+
+
+def declared_charset(response) -> Optional[str]:
+    """Content-Type 헤더에 명시된 charset (requests는 없으면 ISO-8859-1로 가정하므로 response.encoding 대신 사용)"""
+    match = re.search(r'charset=["\']?([\w-]+)', response.headers.get('content-type', ''), re.IGNORECASE)
+    return match.group(1) if match else None
+
+
+def consume_stream(response, parser: StreamingItemParser, source: str) -> StreamingItemParser:
+    """requests 스트리밍 응답을 조각 단위로 파싱하고 항목을 모두 읽으면 나머지 본문은 받지 않음"""
+    response.raise_for_status()
+    stopped = False
+    for chunk in response.iter_content(STREAM_CHUNK_SIZE):
+        if parser.feed(chunk):
+            stopped = True
+            break
+    parser.close()
+    if not parser.error:
+        print(f"{source} 검색 결과 {parser.items_seen}개 항목 추출, {parser.received // 1024}KB "
+              f"{'수신 후 연결 종료' if stopped else '전체 수신'}")
+    return parser
+
+
+def stream_sejong_search(response, limit: int) -> Optional[Tuple[int, List[Dict]]]:
+    """parse_sejong_search의 스트리밍 버전 (발견한 항목 수는 읽은 항목까지만)"""
+    parser = consume_stream(response, StreamingItemParser(
+        is_sejong_item, extract_sejong_item, limit, declared_charset(response), SEJONG_ERROR_MARKER
+    ), "세종대")
+    if parser.error:
+        return None
+    return parser.items_seen, parser.books
+
+
+def stream_aladin_search(response, major_field: str, limit: int) -> List[Dict]:
+    """parse_aladin_search의 스트리밍 버전"""
+    parser = consume_stream(response, StreamingItemParser(
+        is_aladin_item, lambda item: extract_aladin_item(item, major_field), limit, declared_charset(response)
+    ), "알라딘")
+    return parser.books
+
+
+# 작업자 풀
+class ParsePool:
+    """파싱 함수를 프로세스/스레드 풀에서 실행 (inline 이면 이벤트 루프에서 직접)"""
+
+    def __init__(self, mode: str = 'process', workers: Optional[int] = None):
+        if mode not in POOL_MODES:
+            raise ValueError(f"PARSE_POOL은 {', '.join(POOL_MODES)} 중 하나여야 합니다: {mode}")
+        self.mode = mode
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self._executor: Optional[Executor] = None
+        self._executor_lock = threading.Lock()
+        self.stats = {'jobs': 0, 'rebuilds': 0, 'thread_fallbacks': 0}
+
+    @property
+    def executor(self) -> Executor:
+        """풀은 첫 파싱 작업 시 생성 (프로세스는 스레드가 있는 서버에서 fork하지 않도록 spawn)"""
+        with self._executor_lock:
+            if self._executor is None:
+                if self.mode == 'process':
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='parse')
+            return self._executor
+
+    def _discard(self, broken: Executor) -> bool:
+        """망가진 풀을 정리 (동시에 실패한 작업들 중 처음 한 번만, 다음 작업 때 새 풀 생성)"""
+        with self._executor_lock:
+            if self._executor is not broken:
+                return False
+            self._executor = None
+        broken.shutdown(wait=False, cancel_futures=True)
+        self.stats['rebuilds'] += 1
+        return True
+
+    async def run(self, func: Callable, *args):
+        self.stats['jobs'] += 1
+        if self.mode == 'inline':
+            return func(*args)
+        loop = asyncio.get_running_loop()
+        executor = self.executor
+        try:
+            return await loop.run_in_executor(executor, func, *args)
+        except BrokenExecutor as e:
+            if self._discard(executor):
+                print(f"파싱 작업자 풀 오류 ({e}), 풀을 정리하고 다시 생성")
+        # 새 풀에서 한 번 더 시도하고, 그래도 실패하면 이벤트 루프를 막지 않도록 스레드에서 파싱
+        executor = self.executor
+        try:
+            return await loop.run_in_executor(executor, func, *args)
+        except BrokenExecutor as e:
+            self._discard(executor)
+            print(f"파싱 작업자 풀 다시 실패 ({e}), 스레드에서 파싱")
+            self.stats['thread_fallbacks'] += 1
+            return await asyncio.to_thread(func, *args)
+
+    def close(self):
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pool: Optional[ParsePool] = None
+
+
+def get_parse_pool() -> ParsePool:
+    global _pool
+    if _pool is None:
+        workers = os.getenv("PARSE_POOL_WORKERS")
+        _pool = ParsePool(os.getenv("PARSE_POOL", "process"), int(workers) if workers else None)
+    return _pool
+
+
+def close_parse_pool():
+    if _pool is not None:
+        _pool.close()
+
+
+# 벤치마크
+def synthetic_pages(padding_kb: int) -> List[Tuple[Callable, tuple]]:
+    """부하 테스트 스텁 페이지에 실제 페이지처럼 메뉴/스크립트 마크업을 덧붙인 파싱 작업 목록"""
+    from load_test import aladin_detail_html, aladin_search_html, sejong_detail_html, sejong_search_html
+
+    filler = ''.join(
+        f'<div class="gnb"><ul>{"".join(f"<li><a href=/menu/{i}/{j}>메뉴 {j}</a></li>" for j in range(10))}</ul></div>'
+        for i in range(padding_kb * 2)
+    )
+
+    def page(html: str) -> bytes:
+        return html.replace('<body>', f'<body>{filler}', 1).encode('utf-8')
+
+    return [
+        (parse_sejong_search, (page(sejong_search_html('자료구조')), 'utf-8', 5)),
+        (parse_sejong_detail, (page(sejong_detail_html('1234567')), 'utf-8')),
+        (parse_aladin_search, (page(aladin_search_html('자료구조')), 'utf-8', '컴퓨터공학', 5)),
+        (parse_aladin_detail, (page(aladin_detail_html('123456789')), 'utf-8')),
+    ]
+
+
+async def measure(pool: ParsePool, jobs: List[Tuple[Callable, tuple]], concurrency: int, requests: int,
+                  http_latency: float) -> Dict:
+    """동시 요청 concurrency개가 (HTTP 대기 → 파싱)을 반복하는 동안 이벤트 루프 지연 측정"""
+    lags: List[float] = []
+    done = asyncio.Event()
+
+    async def monitor(interval: float = 0.005):
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(interval)
+            lags.append((time.perf_counter() - started - interval) * 1000)
+
+    remaining = requests
+    rng = random.Random(0)
+
+    async def client():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            func, args = jobs[rng.randrange(len(jobs))]
+            await asyncio.sleep(http_latency * rng.uniform(0.5, 1.5))
+            await pool.run(func, *args)
+
+    # 작업자 시작 비용은 측정에서 제외
+    await asyncio.gather(*(pool.run(func, *args) for func, args in jobs * pool.workers))
+    monitor_task = asyncio.ensure_future(monitor())
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await monitor_task
+
+    lags.sort()
+    return {
+        'mode': pool.mode,
+        'pages_per_sec': round(requests / elapsed, 1),
+        'lag_p50_ms': round(statistics.median(lags), 2),
+        'lag_p99_ms': round(lags[int(len(lags) * 0.99) - 1], 2),
+        'lag_max_ms': round(lags[-1], 2),
+    }
+
+
+class BytesResponse:
+    """스트리밍 벤치마크용 requests.Response 대역 (본문을 조각 단위로 내줌)"""
+
+    headers = {'content-type': 'text/html; charset=utf-8'}
+
+    def __init__(self, content: bytes):
+        self.content = content
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size: int):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+
+def stream_benchmark(limit: int, page_kb: int, items: int, rounds: int = 20):
+    """검색 결과 앞뒤에 메뉴/사이드바 마크업이 있는 페이지로 전체 파싱과 스트리밍 파싱 비교"""
+    import tracemalloc
+    from load_test import aladin_search_html, sejong_search_html
+
+    filler = ''.join(
+        f'<div class="gnb"><ul>{"".join(f"<li><a href=/menu/{i}/{j}>메뉴 {j}</a></li>" for j in range(10))}</ul></div>'
+        for i in range(page_kb)
+    )
+    pages = {
+        'sejong': sejong_search_html('자료구조', items).replace('<body>', f'<body>{filler}', 1)
+                                                        .replace('</body>', f'{filler}</body>', 1).encode('utf-8'),
+        'aladin': aladin_search_html('자료구조', items).replace('<body>', f'<body>{filler}', 1)
+                                                       .replace('</body>', f'{filler}</body>', 1).encode('utf-8'),
+    }
+    runs = {
+        'sejong': (lambda page: parse_sejong_search(page, 'utf-8', limit)[1],
+                   lambda page: stream_sejong_search(BytesResponse(page), limit)[1]),
+        'aladin': (lambda page: parse_aladin_search(page, 'utf-8', '', limit),
+                   lambda page: stream_aladin_search(BytesResponse(page), '', limit)),
+    }
+    for source, page in pages.items():
+        for name, run in zip(('전체', '스트리밍'), runs[source]):
+            tracemalloc.start()
+            books = run(page)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            started = time.perf_counter()
+            for _ in range(rounds):
+                run(page)
+            elapsed = (time.perf_counter() - started) / rounds
+            print(f"{source} {name:>4}: 도서 {len(books)}권, {elapsed * 1000:6.1f}ms, 최대 메모리 {peak // 1024}KB "
+                  f"(페이지 {len(page) // 1024}KB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTML 파싱 작업자 풀 벤치마크")
+    parser.add_argument("--benchmark", action="store_true", help="풀 유무별 이벤트 루프 지연/처리량 측정")
+    parser.add_argument("--modes", default=",".join(reversed(POOL_MODES)), help="비교할 모드 (inline,thread,process)")
+    parser.add_argument("--workers", type=int, help="작업자 수 (기본 min(4, CPU 수))")
+    parser.add_argument("--concurrency", type=int, default=50, help="동시 요청 수")
+    parser.add_argument("--requests", type=int, default=200, help="파싱할 페이지 수")
+    parser.add_argument("--page-kb", type=int, default=150, help="페이지마다 덧붙일 마크업 크기 (KB, 대략)")
+    parser.add_argument("--http-latency-ms", type=float, default=50, help="페이지 사이 HTTP 대기 시간")
+    parser.add_argument("--stream-benchmark", action="store_true", help="전체 파싱 vs 스트리밍 파싱 비교")
+    parser.add_argument("--limit", type=int, default=5, help="스트리밍 비교에서 추출할 항목 수")
+    args = parser.parse_args()
+    if args.stream_benchmark:
+        if etree is None:
+            parser.error("스트리밍 파싱에는 lxml이 필요합니다.")
+        stream_benchmark(args.limit, args.page_kb // 2, items=20)
+        return
+    if not args.benchmark:
+        parser.print_help()
+        return
+
+    jobs = synthetic_pages(args.page_kb)
+    print(f"페이지 크기 {', '.join(f'{len(job_args[0]) // 1024}KB' for _, job_args in jobs)}, "
+          f"동시 요청 {args.concurrency}개, 페이지 {args.requests}개")
+    for mode in args.modes.split(','):
+        pool = ParsePool(mode.strip(), args.workers)
+        try:
+            result = asyncio.run(measure(pool, jobs, args.concurrency, args.requests, args.http_latency_ms / 1000))
+        finally:
+            pool.close()
+        print(f"{result['mode']:>8}: {result['pages_per_sec']:7.1f} 페이지/초, 이벤트 루프 지연 "
+              f"p50 {result['lag_p50_ms']:.1f}ms / p99 {result['lag_p99_ms']:.1f}ms / 최대 {result['lag_max_ms']:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
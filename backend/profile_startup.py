@@ -0,0 +1,120 @@
+"""
+백엔드 콜드 스타트(임포트 시간) 측정 스크립트
+
+사용법:
+    python profile_startup.py                      # main 모듈 5회 측정
+    python profile_startup.py --runs 10 --top 20
+    python profile_startup.py --history startup_history.jsonl   # 버전별 추적용 기록 추가
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+# 첫 요청 전까지 로드되지 않아야 하는 무거운 의존성
+HEAVY_MODULES = ["openai", "bs4", "requests", "pandas", "sejong_library_api", "book_recommendation_api"]
+
+IMPORTTIME_LINE = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def measure_once(module: str) -> dict:
+    """새 인터프리터에서 모듈을 import하고 벽시계 시간과 -X importtime 결과를 수집"""
+    code = (
+        f"import sys, json; import {module}; "
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    )
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="0")
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, env=env, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+
+    if result.returncode != 0:
+        raise RuntimeError(f"{module} import 실패:\n{result.stderr[-2000:]}")
+
+    imports = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            imports.append({
+                "module": name,
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+                "depth": len(indent) // 2,
+            })
+
+    return {
+        "wall_ms": wall_ms,
+        "imports": imports,
+        "heavy_loaded": json.loads(result.stdout.strip().splitlines()[-1]),
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="백엔드 임포트 시간 프로파일")
+    parser.add_argument("--module", default="main", help="측정할 모듈 (기본: main)")
+    parser.add_argument("--runs", type=int, default=5, help="측정 횟수 (첫 실행은 바이트코드 컴파일 워밍업으로 제외)")
+    parser.add_argument("--top", type=int, default=15, help="출력할 상위 모듈 수")
+    parser.add_argument("--history", help="측정 결과를 한 줄씩 추가할 JSONL 파일")
+    args = parser.parse_args()
+
+    measure_once(args.module)  # 워밍업 (.pyc 생성)
+    runs = [measure_once(args.module) for _ in range(args.runs)]
+    wall_times = [run["wall_ms"] for run in runs]
+
+    # 가장 빠른 실행의 importtime을 기준으로 상위 모듈 집계 (최상위 import만)
+    fastest = min(runs, key=lambda run: run["wall_ms"])
+    top_level = [entry for entry in fastest["imports"] if entry["depth"] <= 1]
+    top_level.sort(key=lambda entry: entry["cumulative_ms"], reverse=True)
+    module_total = next(
+        (entry["cumulative_ms"] for entry in fastest["imports"] if entry["module"] == args.module), None
+    )
+
+    print(f"=== '{args.module}' 임포트 시간 ({args.runs}회) ===")
+    print(f"인터프리터 포함 벽시계: 최소 {min(wall_times):.1f}ms / 중앙값 {statistics.median(wall_times):.1f}ms")
+    if module_total is not None:
+        print(f"모듈 누적 임포트: {module_total:.1f}ms")
+    print(f"로드된 무거운 의존성: {', '.join(fastest['heavy_loaded']) or '없음'}")
+    print(f"\n상위 {args.top}개 모듈 (누적 ms):")
+    for entry in top_level[:args.top]:
+        print(f"  {entry['cumulative_ms']:8.1f}  {entry['module']}")
+
+    if args.history:
+        record = {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "module": args.module,
+            "python": sys.version.split()[0],
+            "wall_ms_min": round(min(wall_times), 1),
+            "wall_ms_median": round(statistics.median(wall_times), 1),
+            "module_import_ms": module_total,
+            "heavy_loaded": fastest["heavy_loaded"],
+            "top_modules": [
+                {"module": entry["module"], "cumulative_ms": entry["cumulative_ms"]}
+                for entry in top_level[:args.top]
+            ],
+        }
+        with open(args.history, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        print(f"\n기록을 {args.history}에 추가했습니다.")
+
+
+if __name__ == "__main__":
+    main()
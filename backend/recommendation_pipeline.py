@@ -0,0 +1,275 @@
+import asyncio
+import re
+import time
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from keyword_expander import get_keyword_expander
+from keyword_yield import get_keyword_stats
+
+# 지연 시간 등급별 계획 (budget_ms: 전체 예산)
+TIER_SETTINGS = {
+    "fast": {
+        "budget_ms": 10000, "keyword_count": 3, "per_keyword_limit": 5,
+        "max_candidates": 15, "allow_enrichment": False, "llm_ranking": False,
+    },
+    "balanced": {
+        "budget_ms": 30000, "keyword_count": 6, "per_keyword_limit": 5,
+        "max_candidates": 30, "allow_enrichment": False, "llm_ranking": True,
+    },
+    "thorough": {
+        "budget_ms": 180000, "keyword_count": 10, "per_keyword_limit": 5,
+        "max_candidates": 50, "allow_enrichment": True, "llm_ranking": True,
+    },
+}
+
+# 단계별 마감 (전체 예산 대비 비율)
+KEYWORD_STAGE_FRACTION = 0.2
+SEARCH_STAGE_FRACTION = 0.7
+# 이미 시작한 검색의 예상 고유 도서 수가 후보 목표 × 이 값을 넘으면 키워드 생성 중단
+YIELD_TARGET_MARGIN = 1.2
+# 남은 시간이 이보다 짧으면 LLM 선정 대신 로컬 순위 사용
+LLM_RANKING_MIN_SECONDS = 5.0
+
+# 난이도별 가산점 키워드
+DIFFICULTY_HINTS = {
+    "초급": ["입문", "기초", "처음", "첫걸음", "쉽게", "개론"],
+    "중급": ["실무", "실전", "활용", "응용"],
+    "고급": ["고급", "심화", "전문", "고성능", "아키텍처"],
+}
+
+
+class PipelinePlan:
+    """요청의 tier / deadline_ms 로부터 정한 작업량과 단계별 마감, 실제로 택한 지름길 기록"""
+
+    def __init__(self, tier: str, budget_ms: int, keyword_count: int, per_keyword_limit: int,
+                 max_candidates: int, allow_enrichment: bool, llm_ranking: bool):
+        self.tier = tier
+        self.budget_ms = budget_ms
+        self.keyword_count = keyword_count
+        self.per_keyword_limit = per_keyword_limit
+        self.max_candidates = max_candidates
+        self.allow_enrichment = allow_enrichment
+        self.llm_ranking = llm_ranking
+        self.started_at = time.monotonic()
+        self.deadline = self.started_at + budget_ms / 1000
+        self.shortcuts: List[str] = []
+
+    def stage_deadline(self, fraction: float) -> float:
+        return self.started_at + (self.deadline - self.started_at) * fraction
+
+    def remaining(self, until: Optional[float] = None) -> float:
+        return max(0.0, (until or self.deadline) - time.monotonic())
+
+    def take_shortcut(self, shortcut: str):
+        print(f"⏱️ 지름길 선택: {shortcut} (남은 시간 {self.remaining():.1f}초)")
+        self.shortcuts.append(shortcut)
+
+
+def make_plan(tier: Optional[str] = None, deadline_ms: Optional[int] = None,
+              max_candidates: Optional[int] = None) -> PipelinePlan:
+    """tier가 없으면 deadline_ms 크기로 등급을 고르고, 둘 다 없으면 thorough (기존 동작)"""
+    if tier is None:
+        if deadline_ms is None or deadline_ms >= 45000:
+            tier = "thorough"
+        elif deadline_ms >= 15000:
+            tier = "balanced"
+        else:
+            tier = "fast"
+
+    settings = dict(TIER_SETTINGS[tier])
+    if deadline_ms is not None:
+        settings["budget_ms"] = deadline_ms
+    if max_candidates is not None:
+        settings["max_candidates"] = min(settings["max_candidates"], max_candidates)
+    return PipelinePlan(tier=tier, **settings)
+
+
+def fallback_keywords(lecture_title: str) -> List[str]:
+    """키워드 생성이 마감 안에 끝나지 않을 때 강의 제목과 시소러스로 바로 만든 검색어"""
+    return get_keyword_expander().fallback(lecture_title)
+
+
+def cancel_all(tasks: List[asyncio.Future]) -> int:
+    """끝나지 않은 작업을 모두 취소하고 취소한 수를 반환"""
+    pending = [task for task in tasks if not task.done()]
+    for task in pending:
+        task.cancel()
+    return len(pending)
+
+
+async def stream_keywords_and_search(plan: PipelinePlan, stream: Callable[[str], AsyncIterator[str]],
+                                     lecture_title: str, search: Callable[[str], Awaitable],
+                                     source: Optional[str] = None) -> Tuple[List[str], List[asyncio.Task]]:
+    """
+    스트리밍으로 도착하는 키워드마다 바로 검색을 시작해 키워드 생성과 크롤링을 겹침.
+    등급별 키워드 수에 도달하면 생성을 중단하고, 키워드 단계 마감까지 하나도 없으면 강의 제목 기반 검색어 사용.
+    source(검색 경로)를 주면 키워드 수확량 기록으로 검색할 키워드를 고름 (keyword_yield 참고):
+    수확량이 낮은 키워드는 건너뛰거나 뒤로 미루고, 예상 고유 도서 수가 후보 목표를 넘으면 생성을 일찍 멈춤.
+    """
+    keywords: List[str] = []
+    tasks: List[asyncio.Task] = []
+    deferred: List[str] = []
+    pruned: List[str] = []
+    planner = get_keyword_stats() if source else None
+    predicted_total = 0.0
+
+    def dispatch(keyword: str):
+        nonlocal predicted_total
+        keywords.append(keyword)
+        tasks.append(asyncio.ensure_future(search(keyword)))
+        if planner:
+            predicted_total += planner.predicted_yield(source, keyword)
+
+    def enough() -> bool:
+        return len(keywords) >= plan.keyword_count or predicted_total >= plan.max_candidates * YIELD_TARGET_MARGIN
+
+    def offer(keyword: str):
+        if keyword in keywords or keyword in deferred or keyword in pruned:
+            return
+        verdict = planner.classify(source, keyword) if planner else 'search'
+        if verdict == 'prune':
+            pruned.append(keyword)
+        elif verdict == 'defer':
+            deferred.append(keyword)
+        else:
+            dispatch(keyword)
+
+    keyword_stream = stream(lecture_title)
+
+    async def consume():
+        async for keyword in keyword_stream:
+            offer(keyword)
+            if enough():
+                return
+
+    try:
+        await asyncio.wait_for(consume(), timeout=plan.remaining(plan.stage_deadline(KEYWORD_STAGE_FRACTION)))
+    except asyncio.TimeoutError:
+        plan.take_shortcut(f"keyword_stream_truncated:{len(keywords)}" if keywords or deferred else "fallback_keywords")
+    except asyncio.CancelledError:
+        # 요청이 취소되면(클라이언트 연결 끊김) 이미 시작한 검색도 함께 취소
+        cancel_all(tasks)
+        raise
+    finally:
+        await keyword_stream.aclose()
+
+    if not keywords and not deferred:
+        for keyword in fallback_keywords(lecture_title):
+            offer(keyword)
+            if enough():
+                break
+    # 미뤄 둔 키워드는 목표를 채우지 못했을 때만 예상 수확량 순서로 검색
+    for keyword in (planner.order(source, deferred) if planner else deferred):
+        if enough():
+            break
+        dispatch(keyword)
+    if not keywords and pruned:
+        # 모두 제외됐으면 가장 나은 키워드 하나는 검색 (빈 결과 방지)
+        best = planner.order(source, pruned)[0]
+        pruned.remove(best)
+        dispatch(best)
+
+    if pruned:
+        plan.take_shortcut(f"keywords_pruned:{len(pruned)}")
+    if len(keywords) < plan.keyword_count and predicted_total >= plan.max_candidates * YIELD_TARGET_MARGIN:
+        plan.take_shortcut(f"keyword_yield_target:{len(keywords)}")
+    elif plan.keyword_count < TIER_SETTINGS["thorough"]["keyword_count"] and len(keywords) == plan.keyword_count:
+        plan.take_shortcut(f"keywords:{plan.keyword_count}")
+    return keywords, tasks
+
+
+async def gather_until_deadline(plan: PipelinePlan, coroutines: List[Awaitable],
+                                fraction: float = SEARCH_STAGE_FRACTION) -> Tuple[List[list], List[bool]]:
+    """
+    모든 작업을 동시에 실행하고 단계 마감까지 끝난 결과만 사용 (미완료 작업은 취소).
+    (결과, 완료 여부)를 돌려주며, 취소되거나 실패한 작업은 결과가 []이고 완료 여부가 False입니다.
+    """
+    tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+    if not tasks:
+        return [], []
+
+    try:
+        done, pending = await asyncio.wait(tasks, timeout=plan.remaining(plan.stage_deadline(fraction)))
+    except asyncio.CancelledError:
+        # asyncio.wait는 기다리던 작업을 취소하지 않으므로 직접 취소 (완료된 검색 결과는 이미 캐시에 저장됨)
+        cancel_all(tasks)
+        raise
+    for task in pending:
+        task.cancel()
+    if pending:
+        plan.take_shortcut(f"search_truncated:{len(done)}/{len(tasks)}")
+
+    results = []
+    completed = []
+    for task in tasks:
+        if task in done and task.exception() is None:
+            results.append(task.result())
+            completed.append(True)
+        else:
+            if task in done:
+                print(f"검색 작업 실패: {task.exception()}")
+            results.append([])
+            completed.append(False)
+    return results, completed
+
+
+async def enrich_until_deadline(plan: PipelinePlan, enrich: Callable[[List[Dict]], Awaitable],
+                                books: List[Dict], requested: bool):
+    """상세 정보 보강 (등급에서 허용하지 않거나 검색 단계 마감을 넘기면 생략)"""
+    if not requested:
+        return
+    if not plan.allow_enrichment:
+        plan.take_shortcut("skip_detail_enrichment")
+        return
+
+    try:
+        await asyncio.wait_for(enrich(books), timeout=plan.remaining(plan.stage_deadline(SEARCH_STAGE_FRACTION)))
+    except asyncio.TimeoutError:
+        plan.take_shortcut("detail_enrichment_timeout")
+
+
+def rank_books_locally(books: List[Dict], interest_technology: str, learning_difficulty: str,
+                       limit: int = 5) -> Dict:
+    """LLM 없이 관심 기술 용어 일치도 + 난이도 + 대출 가능 여부로 순위 결정"""
+    terms = [term.lower() for term in re.split(r'[\s,/·]+', interest_technology) if len(term) >= 2]
+    hints = next((words for level, words in DIFFICULTY_HINTS.items() if level in learning_difficulty), [])
+
+    def score(book: Dict) -> float:
+        title = (book.get('title') or '').lower()
+        body = ' '.join(
+            book.get(field) or '' for field in ('description', 'table_of_contents', 'subject_category')
+        ).lower()
+        value = 0.0
+        for term in terms:
+            value += 3.0 * title.count(term) + min(body.count(term), 5)
+        value += sum(1.0 for hint in hints if hint in title)
+        if book.get('availability') == '대출가능':
+            value += 0.5
+        return value
+
+    ranked = sorted(books, key=score, reverse=True)
+    return {
+        'books': ranked[:limit],
+        'reason': f"관심 기술 '{interest_technology}' 용어와 제목·목차·설명의 일치도, "
+                  f"학습 난이도 '{learning_difficulty}' 적합성을 기준으로 빠르게 선정했습니다."
+    }
+
+
+async def rank_until_deadline(plan: PipelinePlan, llm_rank: Callable[..., Awaitable[Dict]], books: List[Dict],
+                              interest_technology: str, learning_difficulty: str) -> Dict:
+    """남은 예산 안에서 LLM 선정, 불가능하면 로컬 순위로 대체"""
+    if not plan.llm_ranking:
+        plan.take_shortcut("local_ranking")
+        return rank_books_locally(books, interest_technology, learning_difficulty)
+    if plan.remaining() < LLM_RANKING_MIN_SECONDS:
+        plan.take_shortcut("local_ranking:deadline")
+        return rank_books_locally(books, interest_technology, learning_difficulty)
+
+    try:
+        return await asyncio.wait_for(
+            llm_rank(books, interest_technology, learning_difficulty),
+            timeout=plan.remaining()
+        )
+    except asyncio.TimeoutError:
+        plan.take_shortcut("local_ranking:llm_timeout")
+        return rank_books_locally(books, interest_technology, learning_difficulty)
@@ -0,0 +1,195 @@
+import hashlib
+import json
+import zlib
+from typing import Any, Dict, Optional
+
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import orjson
+except ImportError:  # 선택 의존성 - 없으면 표준 json 사용
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # 선택 의존성 - 없으면 gzip만 사용
+    brotli = None
+
+if orjson is not None:
+    from fastapi.responses import ORJSONResponse as FastJSONResponse
+else:
+    FastJSONResponse = JSONResponse
+
+
+def dumps(payload: Any) -> bytes:
+    """응답 본문 직렬화 (orjson이 있으면 orjson)"""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def project_fields(payload: Dict, fields: Optional[str], list_key: str) -> Dict:
+    """fields=title,author 처럼 지정한 필드만 도서 목록에 남김 (목록 화면용)"""
+    if not fields:
+        return payload
+
+    wanted = [field.strip() for field in fields.split(',') if field.strip()]
+    books = payload.get(list_key) or []
+    return dict(payload, **{list_key: [{field: book.get(field) for field in wanted if field in book} for book in books]})
+
+
+def etag_for(body: bytes) -> str:
+    """압축 전 본문의 강한 ETag (CompressionMiddleware가 압축하면 W/ 약한 ETag로 바꿔 보냄)"""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def if_none_match(request: Request, etag: str) -> bool:
+    """If-None-Match는 약한 비교 (W/ 접두어와 관계없이 같은 태그면 일치)"""
+    header = request.headers.get('if-none-match')
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(',')]
+    return '*' in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """Accept-Encoding → {인코딩: q값} (q 형식이 잘못되면 0으로 보고 사용하지 않음)"""
+    weights = {}
+    for part in header.split(','):
+        coding, *params = [token.strip() for token in part.split(';')]
+        if not coding:
+            continue
+        weight = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding.lower()] = weight
+    return weights
+
+
+def json_response(request: Request, payload: Dict, fields: Optional[str] = None,
+                  list_key: str = 'recommended_books') -> Response:
+    """
+    추천 결과 응답: 필드 선택 → 한 번만 직렬화 → ETag 비교(일치하면 304)
+    (response_model 재검증을 거치지 않도록 Response를 직접 반환)
+    """
+    body = dumps(project_fields(payload, fields, list_key))
+    etag = etag_for(body)
+    headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+
+    if if_none_match(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type='application/json', headers=headers)
+
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'text/')
+
+
+class CompressionMiddleware:
+    """
+    Accept-Encoding에 따라 brotli(설치된 경우) 또는 gzip으로 압축하는 ASGI 미들웨어.
+    스트리밍 응답(NDJSON 등)은 청크마다 flush해서 바로 전달합니다.
+    """
+
+    def __init__(self, app, minimum_size: int = 500, gzip_level: int = 6, brotli_quality: int = 5):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def choose_encoding(self, accept_encoding: str) -> Optional[str]:
+        """q값이 가장 높은 인코딩 (명시되지 않으면 * 의 q값, 같으면 br 우선, q=0은 거부)"""
+        weights = parse_accept_encoding(accept_encoding)
+        supported = ['br', 'gzip'] if brotli is not None else ['gzip']
+        best, best_weight = None, 0.0
+        for encoding in supported:
+            weight = weights.get(encoding, weights.get('*', 0.0))
+            if weight > best_weight:
+                best, best_weight = encoding, weight
+        return best
+
+    @staticmethod
+    def weaken_etag(headers: MutableHeaders):
+        """압축된 본문은 바이트가 달라지므로 같은 강한 ETag를 쓰지 않도록 W/ 약한 ETag로"""
+        etag = headers.get('etag')
+        if etag and not etag.startswith('W/'):
+            headers['ETag'] = f"W/{etag}"
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        encoding = self.choose_encoding(Headers(scope=scope).get('accept-encoding', ''))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor = None
+        passthrough = False
+
+        def compress(data: bytes, finish: bool) -> bytes:
+            if encoding == 'br':
+                chunk = compressor.process(data)
+                return chunk + (compressor.finish() if finish else compressor.flush())
+            chunk = compressor.compress(data)
+            return chunk + compressor.flush(zlib.Z_FINISH if finish else zlib.Z_SYNC_FLUSH)
+
+        async def send_wrapper(message):
+            nonlocal start_message, compressor, passthrough
+
+            if message['type'] == 'http.response.start':
+                start_message = message
+                return
+
+            if message['type'] != 'http.response.body' or passthrough:
+                await send(message)
+                return
+
+            body = message.get('body', b'')
+            more_body = message.get('more_body', False)
+
+            if start_message is not None:
+                headers = MutableHeaders(raw=start_message['headers'])
+                content_type = headers.get('content-type', '')
+                if ('content-encoding' in headers
+                        or not content_type.startswith(COMPRESSIBLE_TYPES)
+                        or (not more_body and len(body) < self.minimum_size)):
+                    passthrough = True
+                    if start_message['status'] == 304:
+                        # 압축을 받는 클라이언트에게 보낸 200 응답과 같은 (약한) ETag
+                        self.weaken_etag(headers)
+                    await send(start_message)
+                    start_message = None
+                    await send(message)
+                    return
+
+                if encoding == 'br':
+                    compressor = brotli.Compressor(quality=self.brotli_quality)
+                else:
+                    compressor = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 31)
+
+                headers['Content-Encoding'] = encoding
+                headers.add_vary_header('Accept-Encoding')
+                self.weaken_etag(headers)
+                data = compress(body, finish=not more_body)
+                if more_body:
+                    del headers['Content-Length']
+                else:
+                    headers['Content-Length'] = str(len(data))
+                await send(start_message)
+                start_message = None
+                await send({'type': 'http.response.body', 'body': data, 'more_body': more_body})
+                return
+
+            await send({'type': 'http.response.body', 'body': compress(body, finish=not more_body),
+                        'more_body': more_body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,97 @@
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+
+# 지연 시간 등급 (fast: ~10초, balanced: ~30초, thorough: 기존 전체 파이프라인)
+LatencyTier = Literal["fast", "balanced", "thorough"]
+
+
+# 세종대 학술정보원 크롤링 기반 추천
+class SejongBookRecommendationRequest(BaseModel):
+    lecture_title: str
+    major_field: str
+    interest_technology: str
+    learning_difficulty: str
+    enrich_details: bool = False
+    tier: Optional[LatencyTier] = None
+    deadline_ms: Optional[int] = Field(default=None, gt=0)
+
+class SejongBookInfo(BaseModel):
+    title: str
+    author: Optional[str] = None
+    publisher: Optional[str] = None
+    isbn: Optional[str] = None
+    publication_year: Optional[str] = None
+    location: Optional[str] = None
+    availability: Optional[str] = None
+    call_number: Optional[str] = None
+    subject_category: Optional[str] = None
+    description: Optional[str] = None
+    table_of_contents: Optional[str] = None
+    detail_url: Optional[str] = None
+
+class SejongBookRecommendationResponse(BaseModel):
+    recommended_books: List[SejongBookInfo]
+    search_keywords: List[str]
+    total_books_analyzed: int
+    recommendation_reason: str
+    tier: Optional[str] = None
+    shortcuts: List[str] = []
+
+
+# 알라딘 크롤링 기반 추천
+class BookRecommendationRequest(BaseModel):
+    lecture_title: str
+    major_field: str
+    interest_technology: str
+    learning_difficulty: str
+    tier: Optional[LatencyTier] = None
+    deadline_ms: Optional[int] = Field(default=None, gt=0)
+
+class BookInfo(BaseModel):
+    title: str
+    author: Optional[str] = None
+    publisher: Optional[str] = None
+    price: Optional[str] = None
+    image_url: Optional[str] = None
+    product_url: Optional[str] = None
+    description: Optional[str] = None
+    table_of_contents: Optional[str] = None
+    publication_date: Optional[str] = None
+    isbn: Optional[str] = None
+
+class BookRecommendationResponse(BaseModel):
+    recommended_books: List[BookInfo]
+    search_keywords: List[str]
+    total_books_analyzed: int
+    recommendation_reason: str
+    tier: Optional[str] = None
+    shortcuts: List[str] = []
+
+
+# 알라딘 + 세종대 통합 검색 기반 추천
+class FederatedBookInfo(BaseModel):
+    title: str
+    author: Optional[str] = None
+    publisher: Optional[str] = None
+    isbn: Optional[str] = None
+    price: Optional[str] = None
+    image_url: Optional[str] = None
+    product_url: Optional[str] = None
+    description: Optional[str] = None
+    table_of_contents: Optional[str] = None
+    publication_date: Optional[str] = None
+    publication_year: Optional[str] = None
+    location: Optional[str] = None
+    availability: Optional[str] = None
+    call_number: Optional[str] = None
+    subject_category: Optional[str] = None
+    detail_url: Optional[str] = None
+    sources: List[str] = []
+
+class FederatedBookRecommendationResponse(BaseModel):
+    recommended_books: List[FederatedBookInfo]
+    search_keywords: List[str]
+    total_books_analyzed: int
+    recommendation_reason: str
+    tier: Optional[str] = None
+    shortcuts: List[str] = []
@@ -1,54 +1,41 @@
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
 import requests
-from bs4 import BeautifulSoup
 import json
 import time
 import re
 import asyncio
-from typing import List, Dict, Optional
-from openai import OpenAI
+from typing import Any, AsyncIterator, Callable, List, Dict, Optional, Tuple
 import os
-from dotenv import load_dotenv
 import urllib.parse
 import urllib3
+from cache_backend import get_shared_cache
+from keyword_batcher import get_keyword_batcher
+from keyword_expander import get_keyword_expander
+from llm_client import load_env, parse_numbered_line, stream_chat_lines
+from llm_scheduler import get_llm_scheduler
+from page_parser import (
+    get_parse_pool,
+    parse_sejong_detail,
+    parse_sejong_search,
+    stream_sejong_search,
+    streaming_enabled
+)
+from sejong_query_batcher import DEFAULT_MAX_RESULTS, SejongQueryBatcher
+from schemas import (
+    SejongBookRecommendationRequest,
+    SejongBookInfo,
+    SejongBookRecommendationResponse
+)
 
-# 환경변수 로드
-load_dotenv()
+# 환경변수 로드 (프로세스당 한 번)
+load_env()
 
-app = FastAPI(title="Sejong Library Book Recommendation API", version="2.0.0")
-
-# OpenAI 클라이언트 초기화
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-class SejongBookRecommendationRequest(BaseModel):
-    lecture_title: str
-    major_field: str
-    interest_technology: str
-    learning_difficulty: str
-
-class SejongBookInfo(BaseModel):
-    title: str
-    author: Optional[str] = None
-    publisher: Optional[str] = None
-    isbn: Optional[str] = None
-    publication_year: Optional[str] = None
-    location: Optional[str] = None
-    availability: Optional[str] = None
-    call_number: Optional[str] = None
-    subject_category: Optional[str] = None
-    description: Optional[str] = None
-    detail_url: Optional[str] = None
-
-class SejongBookRecommendationResponse(BaseModel):
-    recommended_books: List[SejongBookInfo]
-    search_keywords: List[str]
-    total_books_analyzed: int
-    recommendation_reason: str
+# 검색 결과 한 페이지의 기본 항목 수 (이보다 많이 필요하면 페이지 크기 파라미터 추가)
+DEFAULT_PAGE_SIZE = 10
 
 class SejongLibraryCrawler:
     def __init__(self):
-        self.session = requests.Session()
+        self._session = None
         self.base_url = "https://library.sejong.ac.kr"
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36',
@@ -57,12 +44,83 @@ class SejongLibraryCrawler:
             'Accept-Encoding': 'gzip, deflate, br',
             'Connection': 'keep-alive',
         }
-        self.session.headers.update(self.headers)
-        self.session.verify = False
-        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+        # 세종대 서버 동시 요청 수 제한 (호스트 단위)
+        self.host_limit = asyncio.Semaphore(int(os.getenv("SEJONG_MAX_CONCURRENCY", "4")))
+        # 워커 간 공유 캐시 (CACHE_BACKEND_URL)
+        self.cache = get_shared_cache()
+        # 검색 결과는 대출 상태가 바뀌므로 짧게, 서지 정보(DetailView)는 길게 유지
+        self.search_cache_ttl = int(os.getenv("SEJONG_SEARCH_CACHE_TTL", "1800"))
+        self.detail_cache_ttl = int(os.getenv("SEJONG_DETAIL_CACHE_TTL", str(7 * 24 * 3600)))
+        # 검색 결과 페이지 크기/페이지 번호 파라미터 (학술정보원 검색 엔진에서 확인되지 않아 환경변수로 변경 가능)
+        self.page_size_param = os.getenv("SEJONG_PAGE_SIZE_PARAM", "rows")
+        self.page_param = os.getenv("SEJONG_PAGE_PARAM", "page")
+        # 캐시에 없는 키워드를 OR 질의 하나로 묶어 검색 (기본 꺼짐, SEJONG_QUERY_BATCH_WINDOW_MS > 0 이면 사용)
+        self.query_batcher = SejongQueryBatcher(
+            self._search_page,
+            window_ms=float(os.getenv("SEJONG_QUERY_BATCH_WINDOW_MS", "0")),
+            max_keywords=int(os.getenv("SEJONG_QUERY_BATCH_MAX_KEYWORDS", "5")),
+            max_results=int(os.getenv("SEJONG_QUERY_BATCH_MAX_RESULTS", str(DEFAULT_MAX_RESULTS)))
+        )
+    
+    @property
+    def session(self) -> requests.Session:
+        """requests 세션은 첫 요청 시 생성"""
+        if self._session is None:
+            self._session = requests.Session()
+            self._session.headers.update(self.headers)
+            self._session.verify = False
+            urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+        return self._session
+    
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+    
+    async def _get(self, url: str, consume: Optional[Callable[[requests.Response], Any]] = None, **kwargs):
+        """
+        호스트 동시 요청 제한 하에서 블로킹 요청을 스레드로 실행.
+        consume을 넘기면 본문을 스트리밍으로 받으며 같은 스레드에서 consume(response)의 결과를 반환 (끝나면 연결을 닫음)
+        """
+        await self.host_limit.acquire()
+        request = asyncio.ensure_future(asyncio.to_thread(self._request, url, consume, **kwargs))
+        # 기다리던 작업이 취소되어도 스레드의 요청은 끝까지 진행되므로 끝날 때 호스트 슬롯 반환
+        request.add_done_callback(lambda task: self.host_limit.release() or task.cancelled() or task.exception())
+        return await asyncio.shield(request)
+    
+    def _request(self, url: str, consume: Optional[Callable[[requests.Response], Any]], **kwargs):
+        if consume is None:
+            return self.session.get(url, **kwargs)
+        with self.session.get(url, stream=True, **kwargs) as response:
+            return consume(response)
     
     async def generate_search_keywords(self, lecture_title: str) -> List[str]:
         """OpenAI API로 검색 키워드 10개 생성"""
+        return [keyword async for keyword in self.stream_search_keywords(lecture_title)]
+    
+    async def stream_search_keywords(self, lecture_title: str) -> AsyncIterator[str]:
+        """
+        검색 키워드를 LLM 스트리밍 응답에서 한 줄씩 파싱하는 즉시 전달.
+        알려진 강의는 시소러스에서 바로 응답하고, LLM 실패 시 제목 기반 확장 키워드로 채움
+        """
+        expander = get_keyword_expander()
+        known = expander.expand(lecture_title)
+        if known:
+            print(f"시소러스 키워드 사용 (LLM 생략): {known}")
+            for keyword in known:
+                yield keyword
+            return
+        
+        # 동시에 들어온 다른 강의들과 묶어 LLM 한 번으로 생성 (혼자이거나 배치 실패 시 아래 단일 스트리밍 호출)
+        batched = await get_keyword_batcher().submit(lecture_title)
+        if batched:
+            print(f"배치 키워드 사용: {batched}")
+            await asyncio.to_thread(expander.learn, lecture_title, batched)
+            for keyword in batched:
+                yield keyword
+            return
+        
+        emitted = []
         try:
             prompt = f"""
             강의 제목: "{lecture_title}"
@@ -79,7 +137,8 @@ class SejongLibraryCrawler:
             키워드만 나열해주세요.
             """
             
-            response = client.chat.completions.create(
+            lines = stream_chat_lines(
+                stage="keywords",
                 model="gpt-3.5-turbo",
                 messages=[
                     {"role": "system", "content": "당신은 교육 전문가이자 도서 추천 전문가입니다."},
@@ -88,177 +147,154 @@ class SejongLibraryCrawler:
                 max_tokens=500,
                 temperature=0.7
             )
-            
-            content = response.choices[0].message.content
-            keywords = []
-            
-            lines = content.strip().split('\n')
-            for line in lines:
-                if re.match(r'^\d+\.', line.strip()):
-                    keyword = re.sub(r'^\d+\.\s*', '', line.strip())
-                    if keyword:
-                        keywords.append(keyword)
-            
-            return keywords[:10]
+            try:
+                async for line in lines:
+                    keyword = parse_numbered_line(line)
+                    if keyword and keyword not in emitted:
+                        emitted.append(keyword)
+                        yield keyword
+                        if len(emitted) >= 10:
+                            break
+            finally:
+                # 10개를 받으면 (또는 소비자가 멈추면) 스트림을 닫아 남은 생성을 중단
+                await lines.aclose()
             
         except Exception as e:
             print(f"키워드 생성 실패: {e}")
-            return [lecture_title, "입문", "기초", "이론", "실습", "개론", "개념", "방법론", "응용", "기본"]
+        else:
+            if emitted:
+                # 다음 요청부터 같은 강의는 LLM 없이 응답하도록 학습
+                await asyncio.to_thread(expander.learn, lecture_title, emitted)
+        
+        if emitted:
+            return
+        # 실패 시 일반어 대신 강의 제목과 제목 속 용어의 관련어 사용
+        for keyword in expander.fallback(lecture_title):
+            yield keyword
     
-    async def search_books_by_keyword(self, keyword: str, limit: int = 5) -> List[Dict]:
-        """세종대 학술정보원에서 키워드로 도서 검색"""
+    async def search_books_by_keyword(self, keyword: str, limit: int = 5, raise_errors: bool = False) -> List[Dict]:
+        """
+        세종대 학술정보원에서 키워드로 도서 검색 (워커 간 공유 캐시, 동일 키워드는 한 워커만 크롤링).
+        raise_errors가 False이면 실패를 빈 결과로 바꾸고, True이면 그대로 올려 "결과 없음"과 구별하게 합니다.
+        """
         try:
-            print(f"'{keyword}' 키워드로 세종대 학술정보원 검색 중...")
-            
-            # 메인 페이지 방문 (세션 유지)
-            main_response = self.session.get(f"{self.base_url}/index.ax", verify=False)
-            await asyncio.sleep(1)
-            
-            # 검색 URL 구성
-            search_url = f"{self.base_url}/search/Search.Result.ax"
-            params = {
-                'sid': '1',
-                'q': keyword,
-                'facet': 'Y'
-            }
-            
-            response = self.session.get(search_url, params=params, verify=False)
-            response.raise_for_status()
-            
-            if "오류발생" in response.text:
-                print("❌ 세종대 서버 오류 발생")
-                return []
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            books = []
-            
-            # ul.listType01 li 구조에서 도서 정보 추출
-            book_items = soup.select('ul.listType01 li')
-            
-            if not book_items:
-                print("검색 결과를 찾을 수 없습니다.")
-                return []
-            
-            print(f"✅ {len(book_items)}개 도서 발견")
-            
-            for item in book_items[:limit]:
-                try:
-                    book_info = await self.extract_book_info(item)
-                    if book_info and book_info.get('title'):
-                        books.append(book_info)
-                        print(f"수집된 책: {book_info['title']}")
-                    
-                    if len(books) >= limit:
-                        break
-                        
-                    await asyncio.sleep(0.5)
-                    
-                except Exception as e:
-                    print(f"책 정보 추출 실패: {e}")
-                    continue
-            
-            return books
-            
+            return await self.cache.get_or_compute(
+                f"sejong:search:{limit}:{keyword}",
+                lambda: self._search_books_by_keyword(keyword, limit),
+                ttl=self.search_cache_ttl
+            )
         except Exception as e:
+            if raise_errors:
+                raise
             print(f"'{keyword}' 검색 실패: {e}")
             return []
     
-    async def extract_book_info(self, item) -> Dict:
-        """ul.listType01 li 구조에서 도서 정보 추출"""
+    async def _search_books_by_keyword(self, keyword: str, limit: int = 5) -> List[Dict]:
+        """세종대 학술정보원에서 키워드로 도서 검색 (비슷한 시점의 다른 키워드와 OR 질의 하나로 묶을 수 있으면 묶음 검색)"""
+        batched = await self.query_batcher.submit(keyword, limit)
+        if batched is not None:
+            print(f"'{keyword}' 키워드: 묶음 검색에서 {len(batched)}개 배정")
+            return batched
+        
+        print(f"'{keyword}' 키워드로 세종대 학술정보원 검색 중...")
+        parsed = await self._search_page(keyword, limit)
+        if parsed is None:
+            print("❌ 세종대 서버 오류 발생")
+            raise RuntimeError("세종대 서버 오류")
+        found, books = parsed
+        
+        if not found:
+            print("검색 결과를 찾을 수 없습니다.")
+            return []
+        
+        print(f"✅ {found}개 도서 발견")
+        for book_info in books:
+            print(f"수집된 책: {book_info['title']}")
+        
+        return books
+    
+    async def search_page(self, query: str, page: int, page_size: int = DEFAULT_PAGE_SIZE) -> List[Dict]:
+        """
+        검색 결과의 page번째 페이지 (대량 수집용, 캐시 없이).
+        오류를 빈 결과로 바꾸지 않고 그대로 올려 수집기가 실패한 검색어를 다시 시도하게 합니다.
+        """
+        parsed = await self._search_page(query, page_size, page)
+        if parsed is None:
+            raise RuntimeError("세종대 서버 오류 페이지")
+        return parsed[1]
+    
+    async def _search_page(self, query: str, limit: int, page: int = 1) -> Optional[Tuple[int, List[Dict]]]:
+        """검색 결과 page번째 페이지 → (발견한 항목 수, 도서 최대 limit개), 서버 오류 페이지면 None"""
+        # 메인 페이지 방문 (세션 유지)
+        main_response = await self._get(f"{self.base_url}/index.ax", verify=False)
+        await asyncio.sleep(1)
+        
+        # 검색 URL 구성
+        search_url = f"{self.base_url}/search/Search.Result.ax"
+        params = {
+            'sid': '1',
+            'q': query,
+            'facet': 'Y'
+        }
+        # 기본 페이지 크기보다 많이 필요할 때만 (묶음 검색)
+        if limit > DEFAULT_PAGE_SIZE:
+            params[self.page_size_param] = str(limit)
+        if page > 1:
+            params[self.page_param] = str(page)
+        
+        if streaming_enabled():
+            # 본문을 받는 대로 파싱하고 limit개 항목을 읽으면 나머지는 받지 않음
+            return await self._get(
+                search_url, consume=lambda response: stream_sejong_search(response, limit),
+                params=params, verify=False
+            )
+        response = await self._get(search_url, params=params, verify=False)
+        response.raise_for_status()
+        # 파싱/추출은 작업자 풀에서 (원본 바이트 → 간결한 도서 dict)
+        return await get_parse_pool().run(
+            parse_sejong_search, response.content, response.encoding, limit
+        )
+    
+    async def fetch_book_detail(self, detail_url: str) -> Dict[str, str]:
+        """DetailView 페이지에서 ISBN, 주제분류, 목차, 요약 추출 (cid 기준 캐시)"""
+        match = re.search(r'cid=(\d+)', detail_url)
+        cache_key = f"sejong:detail:{match.group(1) if match else detail_url}"
+        
+        return await self.cache.get_or_compute(
+            cache_key,
+            lambda: self._fetch_book_detail(detail_url),
+            ttl=self.detail_cache_ttl
+        )
+    
+    async def _fetch_book_detail(self, detail_url: str) -> Dict[str, str]:
         try:
-            book_info = {
-                'title': '',
-                'author': '',
-                'publisher': '',
-                'publication_year': '',
-                'location': '',
-                'call_number': '',
-                'availability': '',
-                'isbn': '',
-                'subject_category': '',
-                'detail_url': ''
-            }
-            
-            # dl.bookList 찾기
-            book_list = item.find('dl', class_='bookList')
-            if not book_list:
-                return book_info
-                
-            # 제목 링크 찾기 (a.title)
-            title_link = book_list.find('a', class_='title')
-            if title_link:
-                book_info['title'] = title_link.get_text().strip()
-                
-                # JavaScript 링크에서 ID 추출
-                onclick = title_link.get('onclick', '')
-                if 'goDetail(' in onclick:
-                    match = re.search(r'goDetail\((\d+)\)', onclick)
-                    if match:
-                        book_id = match.group(1)
-                        book_info['detail_url'] = f"{self.base_url}/search/DetailView.ax?cid={book_id}"
-            
-            # body div에서 저자, 출판사, 출판년도 정보 추출
-            body_div = book_list.find('div', class_='body')
-            if body_div:
-                body_text = body_div.get_text()
-                
-                if '/' in body_text:
-                    info_part = body_text.split('/', 1)[1].strip()
-                    parts = info_part.split('.')
-                    if len(parts) >= 2:
-                        book_info['author'] = parts[0].strip()
-                        
-                        pub_part = parts[1].strip()
-                        if ',' in pub_part:
-                            pub_parts = pub_part.split(',')
-                            book_info['publisher'] = pub_parts[0].strip()
-                            if len(pub_parts) > 1:
-                                year_text = pub_parts[1].strip()
-                                year_match = re.search(r'\d{4}', year_text)
-                                if year_match:
-                                    book_info['publication_year'] = year_match.group()
-            
-            # 소장 정보 추출 (p.tag)
-            tag_p = book_list.find('p', class_='tag')
-            if tag_p:
-                tag_text = tag_p.get_text()
-                
-                # 소장위치 추출
-                location_link = tag_p.find('a')
-                if location_link:
-                    book_info['location'] = location_link.get_text().strip()
-                
-                # 청구기호 추출
-                call_number_match = re.search(r'\[([^\]]+)\]', tag_text)
-                if call_number_match:
-                    book_info['call_number'] = call_number_match.group(1).strip()
-                
-                # 대출상태 추출
-                if '대출가능' in tag_text:
-                    book_info['availability'] = '대출가능'
-                elif '대출중' in tag_text:
-                    book_info['availability'] = '대출중'
-                elif '이용불가' in tag_text:
-                    book_info['availability'] = '이용불가'
-                elif '정리중' in tag_text:
-                    book_info['availability'] = '정리중'
-            
-            return book_info
-            
+            response = await self._get(detail_url, verify=False)
+            response.raise_for_status()
+            return await get_parse_pool().run(parse_sejong_detail, response.content, response.encoding)
         except Exception as e:
-            print(f"도서 정보 추출 중 오류: {e}")
-            return {
-                'title': '',
-                'author': '',
-                'publisher': '',
-                'publication_year': '',
-                'location': '',
-                'call_number': '',
-                'availability': '',
-                'isbn': '',
-                'subject_category': '',
-                'detail_url': ''
-            }
+            print(f"상세 정보 크롤링 실패 {detail_url}: {e}")
+            return {}
+    
+    async def enrich_books(self, books: List[Dict]) -> List[Dict]:
+        """검색 결과 도서들의 상세 페이지를 호스트 제한 하에서 동시에 가져와 보강"""
+        targets = [book for book in books if book.get('detail_url')]
+        detail_urls = list(dict.fromkeys(book['detail_url'] for book in targets))
+        details = await asyncio.gather(
+            *(self.fetch_book_detail(detail_url) for detail_url in detail_urls)
+        )
+        details_by_url = dict(zip(detail_urls, details))
+        
+        enriched = 0
+        for book in targets:
+            detail_info = details_by_url[book['detail_url']]
+            for field, value in detail_info.items():
+                if value and not book.get(field):
+                    book[field] = value
+            if detail_info:
+                enriched += 1
+        
+        print(f"상세 정보 보강 완료: {enriched}/{len(targets)}권")
+        return books
     
     async def get_ai_book_recommendations(self, books: List[Dict], interest_technology: str, learning_difficulty: str) -> Dict:
         """AI를 사용해서 책들 중 최적의 5개 선정"""
@@ -280,6 +316,13 @@ class SejongLibraryCrawler:
                     "소장위치": book.get('location', 'N/A'),
                     "도서상태": book.get('availability', 'N/A')
                 }
+                # 상세 정보 보강 결과가 있으면 함께 전달
+                if book.get('subject_category'):
+                    book_info["주제분류"] = book['subject_category']
+                if book.get('description'):
+                    book_info["설명"] = book['description']
+                if book.get('table_of_contents'):
+                    book_info["목차"] = book['table_of_contents']
                 books_data.append(book_info)
             
             books_json = json.dumps(books_data, ensure_ascii=False, indent=2)
@@ -303,7 +346,8 @@ class SejongLibraryCrawler:
 }}
 """
             
-            response = client.chat.completions.create(
+            response = await get_llm_scheduler().chat_completion(
+                stage="selection",
                 model="gpt-3.5-turbo",
                 messages=[
                     {"role": "system", "content": "당신은 대학 도서관 전문 사서입니다."},
@@ -365,7 +409,6 @@ class SejongLibraryCrawler:
 # 전역 크롤러 인스턴스
 crawler = SejongLibraryCrawler()
 
-@app.post("/api/v1/sejong-book-recommendations", response_model=SejongBookRecommendationResponse)
 async def get_sejong_book_recommendations(request: SejongBookRecommendationRequest):
     """세종대 학술정보원에서 도서 추천 - direct_test.py 로직 기반"""
     try:
@@ -404,6 +447,11 @@ async def get_sejong_book_recommendations(request: SejongBookRecommendationReque
         if not unique_books:
             raise HTTPException(status_code=404, detail="검색된 도서가 없습니다.")
         
+        # 선택: 상세 페이지 보강 (ISBN, 주제분류, 목차, 요약)
+        if request.enrich_details:
+            print("상세 정보 보강 중...")
+            await crawler.enrich_books(unique_books)
+        
         # 3단계: AI 추천 (5개 선정)
         print("3단계: AI 도서 추천 분석 중...")
         recommendation_result = await crawler.get_ai_book_recommendations(
@@ -432,14 +480,27 @@ async def get_sejong_book_recommendations(request: SejongBookRecommendationReque
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"서버 오류: {str(e)}")
 
-@app.get("/")
 async def root():
     return {"message": "Sejong Library Book Recommendation API v2.0", "version": "2.0.0"}
 
-@app.get("/health")
 async def health_check():
     return {"status": "healthy", "message": "API is running perfectly!"}
 
+def create_app() -> FastAPI:
+    """단독 실행용 FastAPI 앱 (main.py에서 import할 때는 만들지 않음)"""
+    standalone_app = FastAPI(title="Sejong Library Book Recommendation API", version="2.0.0")
+    standalone_app.post("/api/v1/sejong-book-recommendations", response_model=SejongBookRecommendationResponse)(get_sejong_book_recommendations)
+    standalone_app.get("/")(root)
+    standalone_app.get("/health")(health_check)
+    return standalone_app
+
+def __getattr__(name: str):
+    # `uvicorn 모듈:app` 으로 실행할 때 최초 접근 시에만 앱 생성
+    if name == "app":
+        globals()["app"] = create_app()
+        return globals()["app"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001) 
\ No newline at end of file
+    uvicorn.run(create_app(), host="0.0.0.0", port=8001) 
\ No newline at end of file
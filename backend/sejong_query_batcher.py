@@ -0,0 +1,146 @@
+"""
+세종대 학술정보원 검색 질의 묶음
+
+키워드마다 Search.Result.ax를 한 번씩 요청하면 10개 키워드 요청에 메인 페이지 방문 + 1초 대기 + 검색이 10번 필요합니다.
+묶음을 켜면(SEJONG_QUERY_BATCH_WINDOW_MS > 0) 그 시간 동안 또는 N개(기본 5개)가 모일 때까지 캐시에 없는 키워드를 모아 OR 질의 하나로 검색하고
+(페이지 크기도 키워드 수만큼 늘림), 돌아온 도서를 제목에 키워드가 들어 있는지로 키워드별로 나눠 기다리던 검색에 돌려줍니다.
+
+- 키워드의 모든 단어가 제목에 있으면 그 키워드의 결과 (여러 키워드에 해당하면 모두에),
+  없으면 글자 2-gram이 가장 많이 겹치는 키워드 하나 (절반 이상 겹칠 때만)에 배정합니다.
+- 제목으로 배정하지 못한 도서(주제어·목차로 검색된 도서)는 알 수 없으므로, limit개를 채우지 못한 키워드는
+  항상 None을 돌려주어 호출한 쪽이 기존 단일 검색을 합니다 (묶음 검색이 단일 검색보다 적은 도서를 돌려주지 않음).
+- 창 안에 키워드가 하나뿐이면 묶지 않고 None (단일 검색).
+- 묶음 질의의 전체 결과 수가 max_results(기본 500)를 넘으면 너무 넓은 질의로 보고 배정하지 않고 모두 단일 검색으로 돌립니다
+  (한 페이지에 일부만 오므로 흔한 키워드가 결과를 독차지하고, OR가 다르게 해석됐을 가능성도 큼).
+- 학술정보원 검색 엔진의 OR 문법과 페이지 크기 파라미터를 확인하지 못했으므로 기본값은 꺼짐(0)입니다.
+  켜기 전에 SEJONG_OR_OPERATOR(기본 " OR "), SEJONG_PAGE_SIZE_PARAM(기본 rows)을 실제 검색 결과로 확인하세요.
+"""
+import asyncio
+import os
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+# 묶음 질의 하나의 최대 페이지 크기
+MAX_PAGE_SIZE = 100
+# 부분 일치로 배정할 최소 2-gram 겹침 비율
+MIN_BIGRAM_OVERLAP = 0.5
+# 묶음 질의 결과가 이보다 많으면 묶음 결과를 쓰지 않고 키워드별 단일 검색
+DEFAULT_MAX_RESULTS = 500
+
+SearchPage = Callable[[str, int], Awaitable[Optional[Tuple[int, List[Dict]]]]]
+
+
+def keyword_terms(keyword: str) -> List[str]:
+    return keyword.lower().split()
+
+
+def bigrams(text: str) -> Set[str]:
+    text = ''.join(text.lower().split())
+    return {text[i:i + 2] for i in range(len(text) - 1)} or {text}
+
+
+def combine_query(keywords: List[str], operator: str = " OR ") -> str:
+    """여러 단어로 된 키워드는 괄호로 묶어 OR 질의 하나로"""
+    return operator.join(f"({keyword})" if len(keyword.split()) > 1 else keyword for keyword in keywords)
+
+
+def attribute_books(keywords: List[str], books: List[Dict]) -> Tuple[Dict[str, List[Dict]], int]:
+    """묶음 질의 결과를 키워드별로 나눔 (검색 결과 순서 유지) → (키워드별 도서, 배정하지 못한 도서 수)"""
+    by_keyword: Dict[str, List[Dict]] = {keyword: [] for keyword in keywords}
+    terms = {keyword: keyword_terms(keyword) for keyword in keywords}
+    keyword_bigrams = {keyword: bigrams(keyword) for keyword in keywords}
+    unassigned = 0
+    for book in books:
+        title = (book.get('title') or '').lower()
+        matched = [keyword for keyword in keywords if all(term in title for term in terms[keyword])]
+        if not matched:
+            title_bigrams = bigrams(title)
+            overlap, best = max(
+                (len(keyword_bigrams[keyword] & title_bigrams) / len(keyword_bigrams[keyword]), keyword)
+                for keyword in keywords
+            )
+            if overlap >= MIN_BIGRAM_OVERLAP:
+                matched = [best]
+        if not matched:
+            unassigned += 1
+        for keyword in matched:
+            by_keyword[keyword].append(dict(book))
+    return by_keyword, unassigned
+
+
+class SejongQueryBatcher:
+    def __init__(self, search_page: SearchPage, window_ms: float = 0, max_keywords: int = 5,
+                 max_results: int = DEFAULT_MAX_RESULTS):
+        self.search_page = search_page
+        self.window = window_ms / 1000
+        self.max_keywords = max_keywords
+        self.max_results = max_results
+        self._pending: Dict[str, List[Tuple[asyncio.Future, int]]] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # 실행 중인 묶음 검색 (이벤트 루프는 약한 참조만 유지하므로 끝날 때까지 보관)
+        self._running: Set[asyncio.Task] = set()
+        self.stats = {'batches': 0, 'batched_keywords': 0, 'fallbacks': 0, 'too_broad': 0}
+
+    async def submit(self, keyword: str, limit: int) -> Optional[List[Dict]]:
+        """키워드에 배정된 도서 최대 limit개 (혼자였거나 묶음 결과를 믿을 수 없으면 None → 호출한 쪽이 단일 검색)"""
+        if self.window <= 0 or self.max_keywords < 2:
+            return None
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault(keyword, []).append((future, limit))
+        if len(self._pending) >= self.max_keywords:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        if len(batch) < 2:
+            self._resolve(batch, {})
+            return
+        task = asyncio.ensure_future(self._run(batch))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: Dict[str, List[Tuple[asyncio.Future, int]]]):
+        keywords = list(batch)
+        limit = max(limit for waiters in batch.values() for _, limit in waiters)
+        page_size = min(MAX_PAGE_SIZE, limit * len(keywords) * 2)
+        result: Dict[str, List[Dict]] = {}
+        try:
+            parsed = await self.search_page(combine_query(keywords, os.getenv("SEJONG_OR_OPERATOR", " OR ")), page_size)
+            if parsed is not None:
+                found, books = parsed
+                if found > self.max_results:
+                    # 너무 넓은 질의는 배정하지 않고 모두 단일 검색
+                    self.stats['too_broad'] += 1
+                    print(f"세종대 묶음 검색: 키워드 {len(keywords)}개 → {found}개 결과 (기준 {self.max_results}개 초과)")
+                else:
+                    by_keyword, unassigned = attribute_books(keywords, books)
+                    # limit개를 채운 키워드만 묶음 결과 사용 (나머지는 단일 검색)
+                    result = {keyword: matched for keyword, matched in by_keyword.items() if len(matched) >= limit}
+                    print(f"세종대 묶음 검색: 키워드 {len(keywords)}개 → {found}개 결과, 배정하지 못한 도서 {unassigned}개")
+        except asyncio.CancelledError:
+            self._resolve(batch, {})
+            raise
+        except Exception as e:
+            print(f"세종대 묶음 검색 실패: {e}")
+
+        missing = len(keywords) - len(result)
+        self.stats['batches'] += 1
+        self.stats['batched_keywords'] += len(result)
+        self.stats['fallbacks'] += missing
+        print(f"세종대 묶음 검색: 키워드 {len(keywords)}개 → 요청 1회 (단일 검색으로 대체 {missing}개)")
+        self._resolve(batch, result)
+
+    @staticmethod
+    def _resolve(batch: Dict[str, List[Tuple[asyncio.Future, int]]], result: Dict[str, List[Dict]]):
+        for keyword, waiters in batch.items():
+            for future, limit in waiters:
+                # 기다리던 검색이 이미 취소되었으면 건너뜀
+                if not future.done():
+                    books = result.get(keyword)
+                    future.set_result(books[:limit] if books is not None else None)
@@ -0,0 +1,20 @@
+import book_record
+from book_record import BookRecord
+
+
+def fresh(value):
+    return (value + ' ')[:-1]
+
+
+def test_repeated_values_share_one_object():
+    first = BookRecord.from_dict({'title': '자료구조', 'publisher': fresh('한빛미디어'), 'sources': ['sejong']})
+    second = BookRecord.from_dict({'title': '알고리즘', 'publisher': fresh('한빛미디어'), 'sources': ['sejong']})
+    assert first.publisher is second.publisher
+    assert first.sources is second.sources
+    assert first.to_dict() == {'title': '자료구조', 'publisher': '한빛미디어', 'sources': ['sejong']}
+
+
+def test_intern_cache_is_bounded():
+    for i in range(book_record.INTERN_CACHE_SIZE * 2):
+        BookRecord(publisher=f'출판사 {i}')
+    assert book_record._shared.cache_info().currsize <= book_record.INTERN_CACHE_SIZE
@@ -0,0 +1,179 @@
+import asyncio
+import time
+
+import pytest
+
+import cache_backend
+from cache_backend import CacheBackend, MemoryCache, SQLiteCache
+
+
+def test_concurrent_requests_compute_once():
+    cache = MemoryCache()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return ['도서']
+
+    async def scenario():
+        return await asyncio.gather(*(cache.get_or_compute('key', compute, ttl=60) for _ in range(5)))
+
+    results = asyncio.run(scenario())
+    assert results == [['도서']] * 5
+    assert len(calls) == 1
+    # 호출자마다 독립된 사본
+    results[0].append('수정')
+    assert results[1] == ['도서']
+
+
+def test_follower_takes_over_when_leader_is_cancelled():
+    cache = MemoryCache()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return ['도서']
+
+    async def scenario():
+        leader = asyncio.ensure_future(cache.get_or_compute('key', compute, ttl=60))
+        await asyncio.sleep(0.01)
+        follower = asyncio.ensure_future(cache.get_or_compute('key', compute, ttl=60))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        result = await follower
+        return leader.cancelled(), result
+
+    cancelled, result = asyncio.run(scenario())
+    assert cancelled
+    assert result == ['도서']
+    assert len(calls) == 2
+
+
+def test_cancelled_follower_does_not_cancel_leader():
+    cache = MemoryCache()
+
+    async def compute():
+        await asyncio.sleep(0.05)
+        return ['도서']
+
+    async def scenario():
+        leader = asyncio.ensure_future(cache.get_or_compute('key', compute, ttl=60))
+        await asyncio.sleep(0.01)
+        follower = asyncio.ensure_future(cache.get_or_compute('key', compute, ttl=60))
+        await asyncio.sleep(0.01)
+        follower.cancel()
+        return await leader, follower.cancelled()
+
+    assert asyncio.run(scenario()) == (['도서'], True)
+
+
+def test_errors_propagate_and_empty_results_are_not_cached():
+    cache = MemoryCache()
+
+    async def fail():
+        raise ValueError('크롤링 실패')
+
+    async def empty():
+        return []
+
+    async def scenario():
+        try:
+            await cache.get_or_compute('key', fail, ttl=60)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('예외가 전달되지 않음')
+        assert await cache.get_or_compute('key', empty, ttl=60) == []
+        return await cache.get('key'), cache._inflight, cache._locks
+
+    assert asyncio.run(scenario()) == (None, {}, {})
+
+
+def test_lock_is_renewed_while_computing(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    leader, other_worker = SQLiteCache(path), SQLiteCache(path)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.5)
+        return ['도서']
+
+    async def scenario():
+        first = asyncio.ensure_future(leader.get_or_compute('key', compute, ttl=60, lock_ttl=0.2))
+        await asyncio.sleep(0.05)
+        second = await other_worker.get_or_compute('key', compute, ttl=60, lock_ttl=0.2)
+        return await first, second
+
+    assert asyncio.run(scenario()) == (['도서'], ['도서'])
+    assert len(calls) == 1
+
+
+def test_follower_computes_locally_after_wait_timeout(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    leader, other_worker = SQLiteCache(path), SQLiteCache(path)
+
+    async def slow():
+        await asyncio.sleep(5)
+        return ['느린 결과']
+
+    async def fast():
+        return ['직접 계산']
+
+    async def scenario():
+        first = asyncio.ensure_future(leader.get_or_compute('key', slow, ttl=60))
+        await asyncio.sleep(0.05)
+        started = time.monotonic()
+        second = await other_worker.get_or_compute('key', fast, ttl=60, wait_timeout=0.3)
+        waited = time.monotonic() - started
+        first.cancel()
+        return second, waited
+
+    result, waited = asyncio.run(scenario())
+    assert result == ['직접 계산']
+    assert waited < 2
+
+
+def test_backend_must_implement_storage_methods():
+    class Incomplete(CacheBackend):
+        async def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_sqlite_cleanup_removes_expired_rows(tmp_path, monkeypatch):
+    cache = SQLiteCache(str(tmp_path / 'cache.db'))
+
+    async def scenario():
+        await cache.set('old', ['도서'], ttl=-1)
+        await cache.set('fresh', ['도서'], ttl=60)
+        monkeypatch.setattr(cache_backend, 'CLEANUP_INTERVAL', 0)
+        await cache.set('new', ['도서'], ttl=60)
+
+    asyncio.run(scenario())
+    assert [row[0] for row in cache._conn.execute("SELECT key FROM cache ORDER BY key")] == ['fresh', 'new']
+    assert time.monotonic() - cache._cleaned_at < 5
+
+
+def test_ttl_can_depend_on_the_result():
+    cache = MemoryCache()
+
+    def ttl(result):
+        return 0 if result.get('shortcuts') else 60
+
+    async def scenario():
+        async def degraded():
+            return {'books': ['도서'], 'shortcuts': ['search_truncated:3/6']}
+
+        async def full():
+            return {'books': ['도서'], 'shortcuts': []}
+
+        await cache.get_or_compute('degraded', degraded, ttl=ttl)
+        await cache.get_or_compute('full', full, ttl=ttl)
+        return await cache.get('degraded'), await cache.get('full')
+
+    assert asyncio.run(scenario()) == (None, {'books': ['도서'], 'shortcuts': []})
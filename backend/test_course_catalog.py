@@ -0,0 +1,84 @@
+import asyncio
+from types import SimpleNamespace
+
+from course_catalog import CourseCatalogStore, prepared_candidates, selection_key
+
+COURSE = {'lecture_title': '자료구조', 'major_field': '컴퓨터공학', 'interests': ['파이썬']}
+
+
+def request(difficulty='초급자', interest='파이썬', title='자료구조'):
+    return SimpleNamespace(lecture_title=title, major_field='컴퓨터 공학', interest_technology=interest,
+                           learning_difficulty=difficulty)
+
+
+def test_lookup_by_course_key(tmp_path):
+    store = CourseCatalogStore(str(tmp_path / 'catalog.db'))
+    store.put('aladin', COURSE, ['자료구조'], [{'title': '자료구조 입문'}],
+              {selection_key('초급', '파이썬'): {'recommended_books': [], 'shortcuts': []}}, ttl=3600)
+
+    response = asyncio.run(store.response('aladin', request()))
+    assert response['shortcuts'] == ['precomputed']
+    assert asyncio.run(store.response('aladin', request(difficulty='고급'))) is None
+    assert asyncio.run(store.candidates('aladin', request(interest='웹'))) == (['자료구조'], [{'title': '자료구조 입문'}])
+    assert asyncio.run(store.candidates('sejong', request())) is None
+    assert asyncio.run(store.candidates('aladin', request(title='운영체제'))) is None
+
+
+def test_expired_entries_are_ignored(tmp_path):
+    store = CourseCatalogStore(str(tmp_path / 'catalog.db'))
+    store.put('aladin', COURSE, ['자료구조'], [{'title': '자료구조 입문'}], {}, ttl=-1)
+    assert asyncio.run(store.candidates('aladin', request())) is None
+    assert store.stats['expired'] == 1
+
+
+def test_missing_database_is_not_created(tmp_path):
+    path = tmp_path / 'missing.db'
+    store = CourseCatalogStore(str(path))
+    assert asyncio.run(store.response('aladin', request())) is None
+    assert not path.exists()
+
+
+def test_prepared_candidates_take_precedence(tmp_path):
+    store = CourseCatalogStore(str(tmp_path / 'catalog.db'))
+
+    async def scenario():
+        token = prepared_candidates.set((['키워드'], [{'title': '방금 수집'}]))
+        try:
+            keywords, books = await store.candidates('aladin', request())
+        finally:
+            prepared_candidates.reset(token)
+        books[0]['title'] = '수정'
+        return keywords, prepared_candidates.get()
+
+    keywords, after = asyncio.run(scenario())
+    assert keywords == ['키워드']
+    assert after is None
+
+
+def test_precompute_records_selection_once_per_course(tmp_path, monkeypatch):
+    import course_catalog
+    import keyword_yield
+    import main
+    from course_catalog import CatalogPrecomputer
+    from keyword_yield import KeywordYieldStats
+
+    stats = KeywordYieldStats()
+    monkeypatch.setattr(course_catalog, 'get_keyword_stats', lambda: stats)
+    monkeypatch.setattr(keyword_yield, 'get_keyword_stats', lambda: stats)
+    picked = {'title': '자료구조 입문', 'author': '홍길동', 'matched_keywords': ['자료구조']}
+
+    async def collect(_request, _plan):
+        return ['자료구조'], [picked]
+
+    async def run(_request):
+        main.record_selection('aladin', SimpleNamespace(shortcuts=[]), [dict(picked)])
+        return SimpleNamespace(model_dump=lambda: {'recommended_books': [], 'shortcuts': []})
+
+    precomputer = CatalogPrecomputer(CourseCatalogStore(str(tmp_path / 'catalog.db')), ['aladin'])
+    precomputer.main = SimpleNamespace(AladinRequest=lambda **fields: SimpleNamespace(**fields),
+                                       collect_aladin_candidates=collect, run_aladin_recommendation=run,
+                                       collect_sejong_candidates=None, run_sejong_recommendation=None,
+                                       collect_federated_candidates=None, run_federated_recommendation=None)
+    course = dict(COURSE, interests=['파이썬', '자바'])
+    asyncio.run(precomputer.compute('aladin', course))
+    assert stats.get('aladin', '자료구조')['selected'] == 1
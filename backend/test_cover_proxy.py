@@ -0,0 +1,98 @@
+import asyncio
+
+import httpx
+import pytest
+
+import cover_proxy
+from cover_proxy import CoverImageProxy, CoverProxyError
+
+COVER = "https://image.aladin.co.kr/product/1/cover.jpg"
+
+
+def make_proxy(tmp_path, handler, max_bytes=10 * 1024 * 1024):
+    proxy = CoverImageProxy(str(tmp_path / "covers"), max_bytes)
+    proxy._client = httpx.AsyncClient(transport=httpx.MockTransport(handler), follow_redirects=False)
+    return proxy
+
+
+def image(request):
+    return httpx.Response(200, headers={"content-type": "image/jpeg"}, content=b"jpeg" * 10)
+
+
+def test_original_is_downloaded_once_and_cached(tmp_path):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return image(request)
+
+    proxy = make_proxy(tmp_path, handler)
+
+    async def scenario():
+        results = await asyncio.gather(*(proxy.get_cover(COVER, 0) for _ in range(3)))
+        results.append(await proxy.get_cover(COVER, 0))
+        return results
+
+    assert asyncio.run(scenario()) == [(b"jpeg" * 10, "image/jpeg")] * 4
+    assert len(requests) == 1
+
+
+def test_redirects_are_validated_on_every_hop(tmp_path):
+    def handler(request):
+        if request.url.path == "/product/1/cover.jpg":
+            return httpx.Response(302, headers={"location": "/moved/cover.jpg"})
+        if request.url.path == "/moved/cover.jpg":
+            return httpx.Response(302, headers={"location": "http://169.254.169.254/latest/meta-data"})
+        return image(request)
+
+    proxy = make_proxy(tmp_path, handler)
+    with pytest.raises(CoverProxyError) as error:
+        asyncio.run(proxy.get_cover(COVER, 0))
+    assert error.value.status_code == 502
+    assert "리다이렉트" in error.value.detail
+
+
+def test_redirect_within_allowed_hosts_is_followed(tmp_path):
+    def handler(request):
+        if request.url.scheme == "http":
+            return httpx.Response(301, headers={"location": str(request.url.copy_with(scheme="https"))})
+        return image(request)
+
+    proxy = make_proxy(tmp_path, handler)
+    assert asyncio.run(proxy.get_cover(COVER.replace("https:", "http:"), 0))[1] == "image/jpeg"
+
+
+def test_download_size_is_capped(tmp_path, monkeypatch):
+    monkeypatch.setattr(cover_proxy, "MAX_IMAGE_BYTES", 100)
+
+    def handler(request):
+        body = b"x" * 500
+        if request.url.path.endswith("declared.jpg"):
+            return httpx.Response(200, headers={"content-type": "image/jpeg"}, content=body)
+        # Content-Length 없이 스트리밍
+        return httpx.Response(200, headers={"content-type": "image/jpeg"}, stream=httpx.ByteStream(body))
+
+    proxy = make_proxy(tmp_path, handler)
+    for name in ("declared.jpg", "streamed.jpg"):
+        with pytest.raises(CoverProxyError) as error:
+            asyncio.run(proxy.get_cover(f"https://image.aladin.co.kr/{name}", 0))
+        assert "너무 큽니다" in error.value.detail
+
+
+def test_disallowed_hosts_and_widths_are_rejected(tmp_path):
+    proxy = make_proxy(tmp_path, image)
+    for url, width in (("https://example.com/cover.jpg", 0), (COVER, 123)):
+        with pytest.raises(CoverProxyError) as error:
+            asyncio.run(proxy.get_cover(url, width))
+        assert error.value.status_code == 400
+
+
+def test_disk_cache_is_evicted_over_capacity(tmp_path):
+    proxy = make_proxy(tmp_path, image, max_bytes=200)
+
+    async def scenario():
+        for i in range(10):
+            await proxy.get_cover(f"https://image.aladin.co.kr/product/{i}/cover.jpg", 0)
+
+    asyncio.run(scenario())
+    assert proxy._total_bytes <= 200
@@ -0,0 +1,129 @@
+import asyncio
+
+from book_recommendation_api import DetailFetchTracker
+
+BOOK = {'title': '자료구조', 'author': '홍길동', 'product_url': 'https://www.aladin.co.kr/shop/wproduct.aspx?ItemId=1'}
+
+
+def test_same_book_is_fetched_once():
+    async def scenario():
+        tracker = DetailFetchTracker()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {'isbn': '1'}
+
+        results = await asyncio.gather(*(tracker.get_or_fetch(dict(BOOK), fetch) for _ in range(3)))
+        return results, calls, tracker
+
+    results, calls, tracker = asyncio.run(scenario())
+    assert results == [{'isbn': '1'}] * 3
+    assert len(calls) == 1
+    assert (tracker.fetched, tracker.saved) == (1, 2)
+
+
+def test_waiter_fetches_itself_when_owner_is_cancelled():
+    async def scenario():
+        tracker = DetailFetchTracker()
+        started = asyncio.Event()
+
+        async def slow_fetch():
+            started.set()
+            await asyncio.sleep(10)
+            return {'isbn': 'owner'}
+
+        async def fetch():
+            return {'isbn': 'waiter'}
+
+        owner = asyncio.ensure_future(tracker.get_or_fetch(dict(BOOK), slow_fetch))
+        await started.wait()
+        waiter = asyncio.ensure_future(tracker.get_or_fetch(dict(BOOK), fetch))
+        await asyncio.sleep(0)
+        owner.cancel()
+        return await waiter, owner
+
+    result, owner = asyncio.run(scenario())
+    assert owner.cancelled()
+    assert result == {'isbn': 'waiter'}
+
+
+def test_waiter_fetches_itself_when_owner_fails():
+    async def scenario():
+        tracker = DetailFetchTracker()
+
+        async def failing_fetch():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("연결 실패")
+
+        async def fetch():
+            return {'isbn': 'retry'}
+
+        owner = asyncio.ensure_future(tracker.get_or_fetch(dict(BOOK), failing_fetch))
+        await asyncio.sleep(0)
+        waiter = await tracker.get_or_fetch(dict(BOOK), fetch)
+        return waiter, owner
+
+    result, owner = asyncio.run(scenario())
+    assert result == {'isbn': 'retry'}
+    assert isinstance(owner.exception(), RuntimeError)
+
+
+def test_cancelled_waiter_does_not_cancel_shared_fetch():
+    async def scenario():
+        tracker = DetailFetchTracker()
+
+        async def fetch():
+            await asyncio.sleep(0.02)
+            return {'isbn': '1'}
+
+        owner = asyncio.ensure_future(tracker.get_or_fetch(dict(BOOK), fetch))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(tracker.get_or_fetch(dict(BOOK), fetch))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        return await owner, waiter
+
+    result, waiter = asyncio.run(scenario())
+    assert result == {'isbn': '1'}
+    assert waiter.cancelled()
+
+
+def test_different_item_ids_with_same_normalized_title_are_fetched_separately():
+    first = {'title': '자료구조: C언어판', 'author': '홍길동', 'product_url': 'https://www.aladin.co.kr/shop/wproduct.aspx?ItemId=11'}
+    second = {'title': '자료구조: 파이썬판', 'author': '홍길동', 'product_url': 'https://www.aladin.co.kr/shop/wproduct.aspx?ItemId=22'}
+
+    async def scenario():
+        tracker = DetailFetchTracker()
+
+        def fetch_for(book):
+            async def fetch():
+                await asyncio.sleep(0.01)
+                return {'isbn': book['product_url'][-2:]}
+            return fetch
+
+        results = await asyncio.gather(*(tracker.get_or_fetch(book, fetch_for(book)) for book in (first, second)))
+        return results, tracker
+
+    results, tracker = asyncio.run(scenario())
+    assert results == [{'isbn': '11'}, {'isbn': '22'}]
+    assert (tracker.fetched, tracker.saved) == (2, 0)
+
+
+def test_rows_without_item_id_share_by_title_and_author():
+    book = {'title': '자료구조 (개정판)', 'author': '홍길동'}
+
+    async def scenario():
+        tracker = DetailFetchTracker()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            return {'isbn': '1'}
+
+        await tracker.get_or_fetch(dict(book), fetch)
+        await tracker.get_or_fetch(dict(book, title='자료구조'), fetch)
+        return calls
+
+    assert len(asyncio.run(scenario())) == 1
@@ -0,0 +1,49 @@
+from edition_dedup import collapse_editions, normalize_edition_title, volume_tokens
+
+
+def titles(books):
+    return [book['title'] for book in collapse_editions(books)]
+
+
+def book(title, author='홍길동 지음', year='2020'):
+    return {'title': title, 'author': author, 'publication_year': year}
+
+
+def test_editions_of_same_book_collapse_to_latest():
+    books = [
+        book('자료구조 (개정판)', year='2022'),
+        book('[eBook] 자료구조', author='홍길동', year='2019'),
+        book('자료구조 제3판 : 기초부터 실전까지', year='2018'),
+    ]
+    assert titles(books) == ['자료구조 (개정판)']
+
+
+def test_different_subject_parts_are_kept():
+    books = [book('Do it! 점프 투 프로그래밍: 파이썬 편'), book('Do it! 점프 투 프로그래밍: 자바 편')]
+    assert len(collapse_editions(books)) == 2
+
+
+def test_different_volumes_are_kept():
+    assert len(collapse_editions([book('컴퓨터 구조 1권'), book('컴퓨터 구조 2권')])) == 2
+    assert len(collapse_editions([book('알고리즘 (상)'), book('알고리즘 (하)')])) == 2
+
+
+def test_longer_title_is_a_different_book():
+    books = [book('데이터베이스 시스템'), book('데이터베이스 시스템 설계')]
+    assert len(collapse_editions(books)) == 2
+
+
+def test_missing_author_is_not_merged():
+    books = [book('자료구조', author=''), book('자료구조 (개정판)')]
+    assert len(collapse_editions(books)) == 2
+
+
+def test_different_authors_are_not_merged():
+    assert len(collapse_editions([book('자료구조', author='김철수'), book('자료구조', author='이영희')])) == 2
+
+
+def test_volume_tokens():
+    assert volume_tokens('컴퓨터 구조 제2권') == ('2',)
+    assert volume_tokens('Do it!: 파이썬 편') == ('파이썬',)
+    assert volume_tokens('자료구조 (개정판)') == ()
+    assert normalize_edition_title('[eBook] 자료구조 (개정판)') == normalize_edition_title('자료구조')
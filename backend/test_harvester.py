@@ -0,0 +1,84 @@
+import asyncio
+import json
+
+from harvester import CatalogHarvester, Checkpoint, RecordWriter, read_records
+
+
+class FakeSejong:
+    def __init__(self, pages, fail_on=()):
+        self.pages = pages
+        self.fail_on = fail_on
+        self.requests = []
+
+    async def search_page(self, query, page):
+        self.requests.append((query, page))
+        if query in self.fail_on:
+            raise RuntimeError("세종대 서버 오류 페이지")
+        return [dict(book) for book in self.pages.get(page, [])]
+
+
+def book(i):
+    return {'title': f'도서 {i}', 'detail_url': f'https://library.sejong.ac.kr/DetailView.ax?cid={i}'}
+
+
+def make_harvester(tmp_path, crawler, **kwargs):
+    writer = RecordWriter(str(tmp_path / 'books.jsonl'))
+    checkpoint = Checkpoint(str(tmp_path / 'books.jsonl.checkpoint'))
+    harvester = CatalogHarvester([], writer, checkpoint, **kwargs)
+    harvester.sources = ['sejong']
+    harvester.crawlers = {'sejong': crawler}
+    return harvester, writer, checkpoint
+
+
+def test_pages_until_per_query_or_no_new_books(tmp_path):
+    # 마지막 페이지를 넘기면 같은 페이지를 다시 주는 검색 엔진
+    pages = {1: [book(i) for i in range(10)], 2: [book(i) for i in range(10, 15)], 3: [book(i) for i in range(10, 15)]}
+    crawler = FakeSejong(pages)
+    harvester, writer, checkpoint = make_harvester(tmp_path, crawler, per_query=100)
+    asyncio.run(harvester.run(['자료구조']))
+    writer.close()
+    checkpoint.close()
+    assert crawler.requests == [('자료구조', 1), ('자료구조', 2), ('자료구조', 3)]
+    assert len(list(read_records(writer.path))) == 15
+
+    crawler = FakeSejong(pages)
+    harvester, writer, checkpoint = make_harvester(tmp_path, crawler, per_query=12)
+    asyncio.run(harvester.run(['알고리즘']))
+    assert crawler.requests == [('알고리즘', 1), ('알고리즘', 2)]
+    assert harvester.stats['duplicates'] == 12
+
+
+def test_failed_units_are_retried(tmp_path):
+    harvester, writer, checkpoint = make_harvester(tmp_path, FakeSejong({1: [book(1)]}, fail_on={'운영체제'}))
+    stats = asyncio.run(harvester.run(['자료구조', '운영체제']))
+    checkpoint.close()
+    assert stats['failed_units'] == 1
+    assert Checkpoint(checkpoint.path).completed == {'sejong:자료구조'}
+
+
+def test_kdc_query_format(tmp_path):
+    crawler = FakeSejong({1: [book(1)]})
+    harvester, _, _ = make_harvester(tmp_path, crawler, kdc_query_format='CALLNO:{kdc}*')
+    asyncio.run(harvester.run(['004'], kdc_queries={'004'}))
+    assert crawler.requests[0] == ('CALLNO:004*', 1)
+    assert harvester.checkpoint.is_done('sejong', '004')
+
+
+def test_checkpoint_appends_and_ignores_truncated_line(tmp_path):
+    path = tmp_path / 'checkpoint'
+    checkpoint = Checkpoint(str(path))
+    checkpoint.mark_done('sejong', '자료구조')
+    checkpoint.mark_done('aladin', '자료구조')
+    checkpoint.close()
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('sejong:파이')
+    assert Checkpoint(str(path)).completed == {'sejong:자료구조', 'aladin:자료구조'}
+
+
+def test_legacy_json_checkpoint_is_converted(tmp_path):
+    path = tmp_path / 'checkpoint'
+    path.write_text(json.dumps({'completed': ['sejong:자료구조'], 'updated_at': 0}), encoding='utf-8')
+    checkpoint = Checkpoint(str(path))
+    checkpoint.mark_done('sejong', '알고리즘')
+    checkpoint.close()
+    assert Checkpoint(str(path)).completed == {'sejong:자료구조', 'sejong:알고리즘'}
@@ -0,0 +1,81 @@
+import json
+import threading
+
+import keyword_expander
+from keyword_expander import KeywordExpander
+
+
+def test_known_course_expands_without_llm():
+    expander = KeywordExpander()
+    assert expander.expand('자료구조및실습')[:2] == ['자료구조', '알고리즘']
+    assert expander.expand('현대 미술의 이해') is None
+    assert expander.fallback('자료구조및실습')[0] == '자료구조및실습'
+
+
+def test_learning_is_saved_at_most_once_per_interval(tmp_path, monkeypatch):
+    path = tmp_path / 'thesaurus.json'
+    expander = KeywordExpander(str(path))
+    expander.learn('양자컴퓨팅', ['양자 알고리즘', '큐비트'])
+    assert not path.exists()
+    assert expander.expand('양자컴퓨팅') == ['양자 알고리즘', '큐비트']
+
+    monkeypatch.setattr(keyword_expander, 'SAVE_INTERVAL', 0)
+    expander.learn('블록체인', ['암호화폐', '스마트 컨트랙트'])
+    saved = json.loads(path.read_text(encoding='utf-8'))
+    assert set(saved['titles']) == {'양자컴퓨팅', '블록체인'}
+    assert not expander._dirty
+
+
+def test_flush_merges_other_workers(tmp_path):
+    path = str(tmp_path / 'thesaurus.json')
+    first, second = KeywordExpander(path), KeywordExpander(path)
+    first.learn('양자컴퓨팅', ['큐비트'])
+    first.flush()
+    second.learn('블록체인', ['암호화폐'])
+    second.flush()
+    assert set(KeywordExpander(path).titles) == {'양자컴퓨팅', '블록체인'}
+    # 변경이 없으면 다시 쓰지 않음
+    second.path = str(tmp_path / 'missing' / 'thesaurus.json')
+    second.flush()
+
+
+def test_concurrent_learn_and_expand():
+    expander = KeywordExpander()
+    errors = []
+
+    def learn():
+        for i in range(300):
+            expander.learn(f'자료구조 특강 {i}', [f'관련어 {i}', '알고리즘'], persist=False)
+
+    def expand():
+        try:
+            for i in range(300):
+                expander.expand(f'자료구조 특강 {i}')
+                expander.fallback('자료구조 알고리즘')
+        except RuntimeError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=learn)] + [threading.Thread(target=expand) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert expander.expand('자료구조 특강 299') == ['관련어 299', '알고리즘']
+
+
+def test_learned_pairings_need_co_occurrence():
+    expander = KeywordExpander()
+    expander.learn('자료구조 특강', ['자료구조 면접', '트라이', '요리'], persist=False)
+    assert '자료구조 면접' in expander.related('자료구조')
+    assert '트라이' not in expander.related('자료구조')
+
+    expander.learn('고급 자료구조', ['트라이', '세그먼트 트리'], persist=False)
+    assert '트라이' in expander.related('자료구조')
+    assert '요리' not in expander.related('자료구조')
+    assert '세그먼트 트리' not in expander.related('자료구조')
+
+    # 알려진 용어가 없는 제목은 제목 전체를 용어로 만들지 않음
+    expander.learn('현대 미술의 이해', ['미술사', '현대 미술'], persist=False)
+    assert expander.expand('현대 미술의 이해') == ['미술사', '현대 미술']
+    assert '현대미술의이해' not in expander.terms
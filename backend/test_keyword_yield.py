@@ -0,0 +1,148 @@
+import asyncio
+import json
+import threading
+
+import keyword_yield
+import recommendation_pipeline
+from keyword_yield import KeywordYieldStats
+from recommendation_pipeline import gather_until_deadline, make_plan, stream_keywords_and_search
+
+
+def book(title, author='홍길동'):
+    return {'title': title, 'author': author}
+
+
+def stats_with(entries, source='aladin'):
+    stats = KeywordYieldStats()
+    stats.stats[source].update(entries)
+    return stats
+
+
+def entry(searches, new_books, selected=0):
+    return {'searches': searches, 'results': new_books, 'new_books': new_books, 'selected': selected}
+
+
+def test_record_searches_counts_books_new_to_the_request():
+    stats = KeywordYieldStats()
+    matches = stats.record_searches('aladin', ['파이썬', '파이썬 입문'],
+                                    [[book('파이썬 기초'), book('파이썬 실전')], [book('파이썬 기초'), book('혼자 공부하는 파이썬')]])
+    assert stats.get('aladin', '파이썬') == entry(1, 2) | {'results': 2}
+    assert stats.get('aladin', '파이썬  입문')['new_books'] == 1
+    assert stats.get('aladin', '파이썬 입문')['results'] == 2
+    assert sorted(len(found) for found in matches.values()) == [1, 1, 2]
+
+
+def test_incomplete_searches_are_not_recorded():
+    async def finished():
+        return [book('파이썬 기초')]
+
+    async def failed():
+        raise RuntimeError('검색 서버 오류')
+
+    async def slow():
+        await asyncio.sleep(10)
+        return [book('늦은 도서')]
+
+    plan = make_plan('fast', deadline_ms=300)
+    results, completed = asyncio.run(gather_until_deadline(plan, [finished(), failed(), slow()]))
+    assert results == [[book('파이썬 기초')], [], []]
+    assert completed == [True, False, False]
+
+    stats = KeywordYieldStats()
+    stats.record_searches('aladin', ['파이썬', '실패', '마감'], results, completed)
+    assert stats.get('aladin', '파이썬')['searches'] == 1
+    assert stats.get('aladin', '실패')['searches'] == 0
+    assert stats.get('aladin', '마감')['searches'] == 0
+
+
+def test_classify_and_order(monkeypatch):
+    monkeypatch.setattr(keyword_yield, 'EXPLORE_RATE', 0.0)
+    stats = stats_with({'빈손': entry(5, 0), '선정됨': entry(5, 0, selected=1), '보통': entry(3, 2), '풍부': entry(3, 12)})
+    assert stats.classify('aladin', '빈손') == 'prune'
+    assert stats.classify('aladin', '선정됨') == 'defer'
+    assert stats.classify('aladin', '보통') == 'search'
+    assert stats.classify('aladin', '처음 보는 키워드') == 'search'
+    assert stats.order('aladin', ['빈손', '보통', '풍부']) == ['풍부', '보통', '빈손']
+
+
+def test_pruned_keywords_are_explored_again():
+    stats = stats_with({'빈손': entry(5, 0)})
+    stats._random.seed(1)
+    verdicts = [stats.classify('aladin', '빈손') for _ in range(1000)]
+    assert 0 < verdicts.count('search') < 200
+    assert verdicts.count('search') + verdicts.count('prune') == 1000
+
+
+def test_save_merges_concurrent_workers(tmp_path):
+    path = str(tmp_path / 'keyword_stats.json')
+    workers = [KeywordYieldStats(path) for _ in range(4)]
+
+    def run(stats):
+        for _ in range(10):
+            stats.record_searches('aladin', ['파이썬'], [[book('파이썬 기초')]])
+            stats.save()
+
+    threads = [threading.Thread(target=run, args=(stats,)) for stats in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with open(path, encoding='utf-8') as f:
+        saved = json.load(f)['sources']['aladin']['파이썬']
+    assert saved['searches'] == 40
+    assert KeywordYieldStats(path).get('aladin', '파이썬')['new_books'] == 40
+
+
+def test_save_decays_long_histories(tmp_path):
+    path = str(tmp_path / 'keyword_stats.json')
+    stats = KeywordYieldStats(path)
+    for _ in range(keyword_yield.DECAY_AFTER + 1):
+        stats.record_searches('aladin', ['빈손'], [[]])
+    stats.save()
+    assert stats.get('aladin', '빈손')['searches'] == (keyword_yield.DECAY_AFTER + 1) // 2
+
+
+def test_stream_skips_pruned_and_stops_at_yield_target(monkeypatch):
+    stats = stats_with({'빈손': entry(5, 0), '풍부': entry(9, 400)})
+    monkeypatch.setattr(keyword_yield, 'EXPLORE_RATE', 0.0)
+    monkeypatch.setattr(recommendation_pipeline, 'get_keyword_stats', lambda: stats)
+    plan = make_plan('balanced')
+    produced = []
+
+    async def stream(_title):
+        for keyword in ['빈손', '풍부', '다음 키워드', '또 다른 키워드']:
+            produced.append(keyword)
+            yield keyword
+
+    async def search(keyword):
+        return [book(keyword)]
+
+    async def scenario():
+        keywords, tasks = await stream_keywords_and_search(plan, stream, '자료구조', search, source='aladin')
+        await asyncio.gather(*tasks)
+        return keywords
+
+    keywords = asyncio.run(scenario())
+    assert keywords == ['풍부']
+    assert produced == ['빈손', '풍부']
+    assert 'keywords_pruned:1' in plan.shortcuts
+    assert 'keyword_yield_target:1' in plan.shortcuts
+
+
+def test_stream_searches_best_keyword_when_all_pruned(monkeypatch):
+    stats = stats_with({'빈손': entry(5, 0), '조금': entry(5, 1)})
+    monkeypatch.setattr(keyword_yield, 'EXPLORE_RATE', 0.0)
+    monkeypatch.setattr(recommendation_pipeline, 'get_keyword_stats', lambda: stats)
+    monkeypatch.setattr(recommendation_pipeline, 'fallback_keywords', lambda _title: [])
+    plan = make_plan('fast')
+
+    async def stream(_title):
+        for keyword in ['빈손', '조금']:
+            yield keyword
+
+    async def search(keyword):
+        return []
+
+    keywords, tasks = asyncio.run(stream_keywords_and_search(plan, stream, '자료구조', search, source='aladin'))
+    assert keywords == ['조금']
@@ -0,0 +1,40 @@
+from llm_client import JSONArrayStreamParser, parse_numbered_line
+
+
+def feed_in_chunks(parser, text, size):
+    objects = []
+    for i in range(0, len(text), size):
+        objects += parser.feed(text[i:i + size])
+    return objects
+
+
+def test_objects_are_emitted_as_soon_as_they_close():
+    parser = JSONArrayStreamParser()
+    assert parser.feed('```json\n[{"title": "자료구조", "tags": ["a", "b"]}, {"ti') == [{'title': '자료구조', 'tags': ['a', 'b']}]
+    assert parser.started and not parser.finished
+    assert parser.feed('tle": "괄호 } 와 \\" 따옴표"}]\n```') == [{'title': '괄호 } 와 " 따옴표'}]
+    assert parser.finished
+
+
+def test_chunk_boundaries_do_not_matter():
+    text = '설명입니다.\n[{"title": "A", "rating": 4.5}, {"title": "B {중괄호}"}, {"title": "C"}]'
+    for size in (1, 3, 7, len(text)):
+        assert [book['title'] for book in feed_in_chunks(JSONArrayStreamParser(), text, size)] == ['A', 'B {중괄호}', 'C']
+
+
+def test_malformed_object_is_skipped_and_parsing_continues():
+    parser = JSONArrayStreamParser()
+    text = '[{"title": "A"}, {"title": "B",}, {title: C}, {"title": "D"}]'
+    assert feed_in_chunks(parser, text, 5) == [{'title': 'A'}, {'title': 'D'}]
+    assert parser.skipped == 2
+    assert parser.finished
+
+
+def test_text_without_array_yields_nothing():
+    parser = JSONArrayStreamParser()
+    assert parser.feed('죄송합니다. 추천할 수 없습니다.') == []
+    assert not parser.started
+
+
+def test_parse_numbered_line():
+    assert parse_numbered_line('1. 자료구조') == '자료구조'
@@ -0,0 +1,59 @@
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+import response_utils
+from response_utils import CompressionMiddleware, json_response, parse_accept_encoding
+
+PAYLOAD = {'recommended_books': [{'title': f'자료구조 {i}', 'author': '홍길동'} for i in range(50)]}
+
+
+def make_client():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware)
+
+    @app.get('/books')
+    async def books(request: Request):
+        return json_response(request, PAYLOAD)
+
+    return TestClient(app)
+
+
+def test_parse_accept_encoding():
+    assert parse_accept_encoding('gzip;q=0.0, br; q=0.5, *;q=0.1, deflate;q=abc') == {
+        'gzip': 0.0, 'br': 0.5, '*': 0.1, 'deflate': 0.0,
+    }
+
+
+def test_choose_encoding_respects_q_values(monkeypatch):
+    middleware = CompressionMiddleware(app=None)
+    monkeypatch.setattr(response_utils, 'brotli', object())
+    assert middleware.choose_encoding('gzip, br') == 'br'
+    assert middleware.choose_encoding('gzip;q=1.0, br;q=0.5') == 'gzip'
+    assert middleware.choose_encoding('br;q=0.0, gzip') == 'gzip'
+    assert middleware.choose_encoding('gzip;q=0.0') is None
+    assert middleware.choose_encoding('*;q=0.3, br;q=0') == 'gzip'
+    assert middleware.choose_encoding('identity') is None
+    monkeypatch.setattr(response_utils, 'brotli', None)
+    assert middleware.choose_encoding('br') is None
+
+
+def test_compressed_responses_use_weak_etag():
+    client = make_client()
+    plain = client.get('/books', headers={'Accept-Encoding': 'identity'})
+    compressed = client.get('/books', headers={'Accept-Encoding': 'gzip'})
+    assert 'content-encoding' not in plain.headers
+    assert compressed.headers['content-encoding'] == 'gzip'
+    assert compressed.json() == plain.json()
+    assert not plain.headers['etag'].startswith('W/')
+    assert compressed.headers['etag'] == f"W/{plain.headers['etag']}"
+
+
+def test_not_modified_with_either_etag():
+    client = make_client()
+    etag = client.get('/books', headers={'Accept-Encoding': 'identity'}).headers['etag']
+    weak = client.get('/books', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert weak.status_code == 304
+    assert weak.headers['etag'] == f"W/{etag}"
+    plain = client.get('/books', headers={'Accept-Encoding': 'identity', 'If-None-Match': f"W/{etag}"})
+    assert plain.status_code == 304
+    assert plain.headers['etag'] == etag
@@ -0,0 +1,73 @@
+import asyncio
+
+from sejong_query_batcher import SejongQueryBatcher, attribute_books, combine_query
+
+
+def test_combine_query_groups_multi_word_keywords():
+    assert combine_query(['자료구조', '운영 체제']) == '자료구조 OR (운영 체제)'
+    assert combine_query(['a', 'b'], operator=' | ') == 'a | b'
+
+
+def test_attribute_books_by_title_terms():
+    books = [
+        {'title': '자료구조와 운영체제'},
+        {'title': '운영체제의 원리'},
+        {'title': '컴퓨터 네트워킹'},
+        {'title': '요리책'},
+    ]
+    by_keyword, unassigned = attribute_books(['자료구조', '운영체제 원리', '네트워크'], books)
+    assert [book['title'] for book in by_keyword['자료구조']] == ['자료구조와 운영체제']
+    # 모든 단어가 제목에 있으면 배정
+    assert [book['title'] for book in by_keyword['운영체제 원리']] == ['운영체제의 원리']
+    # 단어가 없으면 2-gram이 절반 이상 겹치는 키워드 하나에
+    assert [book['title'] for book in by_keyword['네트워크']] == ['컴퓨터 네트워킹']
+    assert unassigned == 1
+
+
+def test_attribute_books_returns_copies():
+    book = {'title': '자료구조 입문'}
+    by_keyword, _ = attribute_books(['자료구조', '입문'], [book])
+    assert by_keyword['자료구조'][0] == book
+    assert by_keyword['자료구조'][0] is not book
+    assert by_keyword['자료구조'][0] is not by_keyword['입문'][0]
+
+
+def run_batch(page_books, submissions, window_ms=10, found=None, max_results=500):
+    queries = []
+
+    async def search_page(query, page_size):
+        queries.append((query, page_size))
+        return (len(page_books) if found is None else found), page_books
+
+    async def scenario():
+        batcher = SejongQueryBatcher(search_page, window_ms=window_ms, max_results=max_results)
+        results = await asyncio.gather(*(batcher.submit(keyword, limit) for keyword, limit in submissions))
+        return results, batcher.stats
+
+    results, stats = asyncio.run(scenario())
+    return results, stats, queries
+
+
+def test_keywords_short_of_limit_fall_back_to_single_search():
+    books = [{'title': f'자료구조 {i}'} for i in range(6)] + [{'title': '운영체제 1'}]
+    results, stats, queries = run_batch(books, [('자료구조', 5), ('운영체제', 5), ('자료구조', 3)])
+    assert queries == [('자료구조 OR 운영체제', 20)]
+    assert [None if result is None else len(result) for result in results] == [5, None, 3]
+    assert stats == {'batches': 1, 'batched_keywords': 1, 'fallbacks': 1, 'too_broad': 0}
+
+
+def test_single_keyword_or_disabled_is_not_batched():
+    results, _, queries = run_batch([], [('자료구조', 5)])
+    assert results == [None] and queries == []
+    results, _, queries = run_batch([], [('자료구조', 5), ('운영체제', 5)], window_ms=0)
+    assert results == [None, None] and queries == []
+
+
+def test_too_broad_batch_falls_back_to_single_search():
+    books = [{'title': f'자료구조 {i}'} for i in range(5)] + [{'title': f'운영체제 {i}'} for i in range(5)]
+    results, stats, queries = run_batch(books, [('자료구조', 5), ('운영체제', 5)], found=501)
+    assert len(queries) == 1
+    assert results == [None, None]
+    assert stats == {'batches': 1, 'batched_keywords': 0, 'fallbacks': 2, 'too_broad': 1}
+    results, _, _ = run_batch(books, [('자료구조', 5), ('운영체제', 5)], found=500)
+    assert [len(result) for result in results] == [5, 5]
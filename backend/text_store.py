@@ -0,0 +1,298 @@
+"""
+목차 / 책 설명 텍스트 압축 저장소 (학습된 사전 기반 압축, 레코드 단위 임의 접근)
+
+알라딘/세종대 목차와 설명은 "목차", "ISBN", "주제 분류", 분류 경로 같은 상용구가 반복되므로
+수집된 텍스트로 압축 사전을 학습해 레코드마다 따로 압축합니다 (zstandard 설치 시 zstd, 아니면 zlib 프리셋 사전).
+
+사용법:
+    python text_store.py --harvest books.jsonl --db text_store.db          # 사전 학습 + 저장 + 압축률/복원 속도 측정
+    python text_store.py --db text_store.db --get "aladin:https://..."     # 레코드 하나 조회
+"""
+import argparse
+import random
+import sqlite3
+import threading
+import time
+import zlib
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # 선택 의존성 - 없으면 zlib 프리셋 사전 사용
+    zstandard = None
+
+TEXT_FIELDS = ('description', 'table_of_contents')
+# zlib 프리셋 사전은 창 크기(32KB)까지만 유효
+ZLIB_DICT_SIZE = 32 * 1024
+ZSTD_DICT_SIZE = 64 * 1024
+
+
+def train_zlib_dictionary(samples: List[str], size: int = ZLIB_DICT_SIZE) -> bytes:
+    """여러 텍스트에 반복되는 1~4어절 구절을 모아 프리셋 사전 구성 (자주 쓰이는 구절일수록 뒤쪽에 배치)"""
+    document_frequency = Counter()
+    for text in samples:
+        words = text.split()
+        phrases = set()
+        for n in (1, 2, 3, 4):
+            for i in range(len(words) - n + 1):
+                phrases.add(' '.join(words[i:i + n]))
+        document_frequency.update(phrases)
+
+    # 절약되는 바이트 추정치 = (등장 문서 수 - 1) × 길이
+    candidates = sorted(
+        ((count - 1) * len(phrase.encode('utf-8')), phrase)
+        for phrase, count in document_frequency.items() if count > 1 and len(phrase) > 1
+    )
+    selected: List[str] = []
+    total = 0
+    for _, phrase in reversed(candidates):
+        if any(phrase in chosen for chosen in selected[-200:]):
+            continue
+        encoded_size = len(phrase.encode('utf-8')) + 1
+        if total + encoded_size > size:
+            break
+        selected.append(phrase)
+        total += encoded_size
+    return ' '.join(reversed(selected)).encode('utf-8')
+
+
+class ZlibCodec:
+    name = 'zlib'
+
+    def __init__(self, dictionary: Optional[bytes] = None, level: int = 9):
+        self.dictionary = dictionary
+        self.level = level
+
+    @staticmethod
+    def train(samples: List[str]) -> bytes:
+        return train_zlib_dictionary(samples)
+
+    def compress(self, text: str) -> bytes:
+        # raw deflate (헤더/체크섬 생략) - 짧은 레코드에서 6바이트도 아낌
+        if self.dictionary:
+            compressor = zlib.compressobj(self.level, zlib.DEFLATED, -15, zdict=self.dictionary)
+        else:
+            compressor = zlib.compressobj(self.level, zlib.DEFLATED, -15)
+        return compressor.compress(text.encode('utf-8')) + compressor.flush()
+
+    def decompress(self, data: bytes) -> str:
+        if self.dictionary:
+            decompressor = zlib.decompressobj(-15, zdict=self.dictionary)
+        else:
+            decompressor = zlib.decompressobj(-15)
+        return (decompressor.decompress(data) + decompressor.flush()).decode('utf-8')
+
+
+class ZstdCodec:
+    name = 'zstd'
+
+    def __init__(self, dictionary: Optional[bytes] = None, level: int = 9):
+        self.dictionary = dictionary
+        dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+        self._compressor = zstandard.ZstdCompressor(level=level, dict_data=dict_data, write_content_size=True)
+        self._decompressor = zstandard.ZstdDecompressor(dict_data=dict_data)
+
+    @staticmethod
+    def train(samples: List[str]) -> bytes:
+        encoded = [text.encode('utf-8') for text in samples]
+        try:
+            return zstandard.train_dictionary(ZSTD_DICT_SIZE, encoded).as_bytes()
+        except zstandard.ZstdError as e:
+            # 표본이 너무 적으면 학습이 실패하므로 상용구 기반 raw 사전 사용
+            print(f"zstd 사전 학습 실패 ({e}), 반복 구절 사전 사용")
+            return train_zlib_dictionary(samples, ZSTD_DICT_SIZE)
+
+    def compress(self, text: str) -> bytes:
+        return self._compressor.compress(text.encode('utf-8'))
+
+    def decompress(self, data: bytes) -> str:
+        return self._decompressor.decompress(data).decode('utf-8')
+
+
+CODECS = {'zlib': ZlibCodec, 'zstd': ZstdCodec}
+
+
+def default_codec_name() -> str:
+    return 'zstd' if zstandard is not None else 'zlib'
+
+
+class CompressedTextStore:
+    """(레코드 id, 필드) 단위로 압축해 SQLite에 저장하고, 조회 시 해당 레코드만 복원"""
+
+    def __init__(self, path: str, codec: Optional[str] = None):
+        self.path = path
+        self.codec_name = codec or default_codec_name()
+        self._db_lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS dictionaries "
+            "(id INTEGER PRIMARY KEY, codec TEXT NOT NULL, data BLOB NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS texts (record_id TEXT NOT NULL, field TEXT NOT NULL, codec TEXT NOT NULL, "
+            "dict_id INTEGER, raw_size INTEGER NOT NULL, data BLOB NOT NULL, PRIMARY KEY (record_id, field))"
+        )
+        self._conn.commit()
+        # 사전 id → 코덱 (이전 사전으로 압축된 레코드도 복원할 수 있도록 보관)
+        self._codecs: Dict[Optional[int], object] = {}
+        self.dict_id = self._latest_dictionary_id()
+
+    def _latest_dictionary_id(self) -> Optional[int]:
+        row = self._conn.execute(
+            "SELECT id FROM dictionaries WHERE codec = ? ORDER BY id DESC LIMIT 1", (self.codec_name,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _codec(self, codec_name: str, dict_id: Optional[int]):
+        key = (codec_name, dict_id)
+        codec = self._codecs.get(key)
+        if codec is None:
+            dictionary = None
+            if dict_id is not None:
+                dictionary = self._conn.execute("SELECT data FROM dictionaries WHERE id = ?", (dict_id,)).fetchone()[0]
+            codec = CODECS[codec_name](dictionary)
+            self._codecs[key] = codec
+        return codec
+
+    def train(self, samples: Iterable[str], max_samples: int = 5000) -> int:
+        """표본 텍스트로 새 사전을 학습하고 이후 저장에 사용 (기존 레코드는 이전 사전으로 복원)"""
+        samples = [text for text in samples if text]
+        if len(samples) > max_samples:
+            samples = random.Random(0).sample(samples, max_samples)
+        dictionary = CODECS[self.codec_name].train(samples)
+        with self._db_lock:
+            cursor = self._conn.execute(
+                "INSERT INTO dictionaries (codec, data, created_at) VALUES (?, ?, ?)",
+                (self.codec_name, dictionary, time.time())
+            )
+            self._conn.commit()
+        self.dict_id = cursor.lastrowid
+        return len(dictionary)
+
+    def put_many(self, items: Iterable[Tuple[str, str, str]]):
+        """(레코드 id, 필드, 텍스트) 목록 저장"""
+        with self._db_lock:
+            codec = self._codec(self.codec_name, self.dict_id)
+            rows = [
+                (record_id, field, self.codec_name, self.dict_id, len(text.encode('utf-8')), codec.compress(text))
+                for record_id, field, text in items if text
+            ]
+            self._conn.executemany("INSERT OR REPLACE INTO texts VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._conn.commit()
+
+    def put(self, record_id: str, field: str, text: str):
+        self.put_many([(record_id, field, text)])
+
+    def get(self, record_id: str, field: str) -> Optional[str]:
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT codec, dict_id, data FROM texts WHERE record_id = ? AND field = ?", (record_id, field)
+            ).fetchone()
+            if row is None:
+                return None
+            return self._codec(row[0], row[1]).decompress(row[2])
+
+    def get_record(self, record_id: str) -> Dict[str, str]:
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT field, codec, dict_id, data FROM texts WHERE record_id = ?", (record_id,)
+            ).fetchall()
+            return {field: self._codec(codec, dict_id).decompress(data) for field, codec, dict_id, data in rows}
+
+    def record_ids(self) -> List[str]:
+        with self._db_lock:
+            return [row[0] for row in self._conn.execute("SELECT DISTINCT record_id FROM texts")]
+
+    def stats(self) -> Dict:
+        with self._db_lock:
+            count, raw_size, stored_size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(raw_size), 0), COALESCE(SUM(LENGTH(data)), 0) FROM texts"
+            ).fetchone()
+            dictionary_size = self._conn.execute(
+                "SELECT COALESCE(LENGTH(data), 0) FROM dictionaries WHERE id = ?", (self.dict_id,)
+            ).fetchone() if self.dict_id else (0,)
+        return {
+            'texts': count,
+            'raw_bytes': raw_size,
+            'stored_bytes': stored_size,
+            'dictionary_bytes': dictionary_size[0],
+            'ratio': round(raw_size / stored_size, 2) if stored_size else 0.0,
+        }
+
+    def close(self):
+        self._conn.close()
+
+
+def collect_texts(path: str) -> List[Tuple[str, str, str]]:
+    from harvester import read_records, record_key
+
+    items = []
+    for record in read_records(path):
+        for field in TEXT_FIELDS:
+            text = record.get(field)
+            if text:
+                items.append((record_key(record), field, text))
+    return items
+
+
+def benchmark(store: CompressedTextStore, items: List[Tuple[str, str, str]], reads: int):
+    raw_size = sum(len(text.encode('utf-8')) for _, _, text in items)
+    plain_size = sum(len(ZlibCodec().compress(text)) for _, _, text in items)
+
+    started = time.perf_counter()
+    dictionary_size = store.train(text for _, _, text in items)
+    train_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    store.put_many(items)
+    write_s = time.perf_counter() - started
+    stats = store.stats()
+
+    # 임의 레코드 복원 속도 (조회 + 압축 해제)
+    keys = [(record_id, field) for record_id, field, _ in items]
+    sample = [random.choice(keys) for _ in range(reads)]
+    started = time.perf_counter()
+    decoded = sum(len(store.get(record_id, field).encode('utf-8')) for record_id, field in sample)
+    read_s = time.perf_counter() - started
+
+    print(f"=== 텍스트 압축 저장소 ({store.codec_name}, 텍스트 {len(items):,}개) ===")
+    print(f"원본: {raw_size / 1024:.1f}KB")
+    print(f"사전 없이 레코드별 압축: {plain_size / 1024:.1f}KB (압축률 {raw_size / plain_size:.2f}x)")
+    print(f"학습 사전 사용: {stats['stored_bytes'] / 1024:.1f}KB (압축률 {stats['ratio']:.2f}x, "
+          f"사전 {dictionary_size / 1024:.1f}KB 별도, 학습 {train_s:.2f}초)")
+    print(f"저장 속도: {raw_size / write_s / 1024 / 1024:.1f}MB/s")
+    print(f"임의 접근 복원: {reads / read_s:,.0f}건/s, {decoded / read_s / 1024 / 1024:.1f}MB/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="목차/설명 텍스트 압축 저장소")
+    parser.add_argument("--db", default="text_store.db", help="저장소 SQLite 파일")
+    parser.add_argument("--harvest", help="harvester 출력 파일(.jsonl/.csv) - 사전 학습 후 저장하고 측정")
+    parser.add_argument("--codec", choices=sorted(CODECS), help="압축 방식 (기본: zstd 설치 시 zstd, 아니면 zlib)")
+    parser.add_argument("--reads", type=int, default=5000, help="복원 속도 측정 시 임의 조회 횟수")
+    parser.add_argument("--get", help="조회할 레코드 id")
+    args = parser.parse_args()
+
+    if args.codec == 'zstd' and zstandard is None:
+        parser.error("zstd 코덱에는 zstandard 패키지가 필요합니다.")
+
+    store = CompressedTextStore(args.db, args.codec)
+    try:
+        if args.harvest:
+            items = collect_texts(args.harvest)
+            if not items:
+                parser.error("목차/설명이 있는 레코드가 없습니다 (harvester.py --enrich 로 수집하세요).")
+            benchmark(store, items, args.reads)
+        if args.get:
+            for field, text in store.get_record(args.get).items():
+                print(f"[{field}]\n{text}\n")
+        if not args.harvest and not args.get:
+            print(store.stats())
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()